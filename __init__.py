@@ -29,223 +29,103 @@ bl_info = {
 if "bpy" in locals():
 
     import importlib
+    importlib.reload(core.profiling)
+    importlib.reload(core.files)
+    importlib.reload(core.procedural)
+    importlib.reload(core.geo)
+    importlib.reload(core.loc)
+    importlib.reload(core.diff)
+    importlib.reload(core.hierarchy)
+    importlib.reload(core.proxy)
+    importlib.reload(core.lint)
+    importlib.reload(core.material_library)
+    importlib.reload(properties)
     importlib.reload(ui)
     importlib.reload(operators)
     importlib.reload(utils)
+    importlib.reload(live_export)
+    importlib.reload(proxy_import)
 
 else:
 
-    import bpy
+    # the core library is importable from plain python (no blender, e.g. worker processes):
+    # add-on modules are only imported if bpy is available
+    try:
+        import bpy
+    except ImportError:
+        bpy = None
 
-    from bpy.props import (
-        StringProperty,
-        BoolProperty,
-        # IntProperty,
-        FloatProperty,
-        FloatVectorProperty,
-        EnumProperty,
-        PointerProperty,
-    )
-
-    from bpy.types import (
-        Operator,
-        AddonPreferences,
-        PropertyGroup,
-    )
-
-    from . import (
-        ui,
-        operators,
-        utils,
-    )
-
-
-def get_embedded_text_names(self, context):
-    """populate comments drop down with embedded text file names"""
-
-    # init
-    out = []
-    out.append(("DISABLED", "Disabled", "", 1))
-
-    # loop over text files
-    for i_key, key in enumerate(bpy.data.texts.keys()):
-        out.append((key, key, "", i_key+2))
-
-    return out
-
-
-class SceneProperties(PropertyGroup):
-
-    export_path: StringProperty(
-        name="Export Folder",
-        description="Path to the directory where the file will be saved",
-        default="//",
-        maxlen=1024,
-        subtype="DIR_PATH",
-    )
-
-    debug: BoolProperty(
-        name="Show Console Logs",
-        description='Print logs to blender console',
-        default=False,
-    )
-
-    room_file_name: StringProperty(
-        name="File",
-        description="Name of the room file created upon export",
-        default="master.geo",
-        maxlen=1024,
-    )
-
-    triangulate_faces: BoolProperty(
-        name="Triangulate Faces",
-        description='Transform ngons in triangles upon export',
-        default=False,
-    )
-
-    apply_modifiers: BoolProperty(
-        name="Apply Modifiers",
-        description='Apply objects modifiers upon export',
-        default=False,
-    )
-
-    merge_objects: BoolProperty(
-        name="Merge Objects",
-        description='Merge objects into single mesh upon export (enables remove duplicate vertices)',
-        default=False,
-    )
+    if bpy is not None:
 
-    frequency_bands: FloatVectorProperty(
-        name="Frequency Bands",
-        description='Frequency bands (in Hz) for which absorption/diffraction coefs are defined',
-        size=8,
-        default=(125, 250, 500, 1000, 2000, 4000, 8000, 16000),
-    )
-
-    rm_duplicates_dist: FloatProperty(
-        name="Merge Vertices Distance",
-        description='Distance (in m) below which two vertices are merged when creating the export mesh',
-        default=1e-7,
-        min=0.0, max=1.0, soft_min=0.0, soft_max=1.0,
-    )
-
-    export_face_ids: BoolProperty(
-        name="Export Face IDs",
-        description='Add face id information in exported plane names (for debug purpose)',
-        default=False,
-    )
-
-    # export_progress: IntProperty(
-    #         name="Progress", description="",
-    #         default=0,
-    #         min=0, max=100,
-    #         step=1, subtype='PERCENTAGE'
-    #         )
-
-    editor_scripts: EnumProperty(
-        name="Comments",
-        description="Select an embedded text, its content will be added as comments at the top of the exported .GEO file",
-        items=get_embedded_text_names,
-    )
-
-    room_collection: StringProperty(
-        name="Room",
-        description="Collection of objects to export as room",
-        default="", maxlen=1024,
-    )
+        from bpy.props import PointerProperty
 
-    receiver_file_name: StringProperty(
-        name="File",
-        description="Name of the file created upon export",
-        default="rec.loc",
-        maxlen=1024,
-    )
-
-    receiver_object: StringProperty(
-        name="Receiver",
-        description="Object which animation will be exported as receiver positions",
-        default="", maxlen=1024,
-    )
+        from bpy.app.handlers import persistent
 
-    receiver_collection: StringProperty(
-        name="Receivers",
-        description="Collection of objects to export as receivers",
-        default="", maxlen=1024,
-    )
+        from . import (
+            core,
+            properties,
+            ui,
+            operators,
+            utils,
+            live_export,
+            proxy_import,
+        )
 
-    receiver_export_type: EnumProperty(
-        name="Export",
-        description="Export either animated object or collection of objects",
-        items=[("ANIMATED", "Object/Animation", ""), ("COLLECTION", "Collection", "")],
-        default="COLLECTION"
-    )
 
-    receiver_dist_thresh: FloatProperty(
-        name="Merge Distance",
-        description="Minimum distance (in m) between two exported positions along animation curve",
-        default=0,
-        min=0.0, max=100.0, soft_min=0.0, soft_max=100.0,
-    )
+if bpy is not None:
 
-    source_file_name: StringProperty(
-        name="File",
-        description="Name of the file created upon export",
-        default="src.loc",
-        maxlen=1024,
-    )
+    @persistent
+    def load_post_handler(dummy):
+        """update outdated catt materials once, upon file load"""
 
-    source_object: StringProperty(
-        name="Source",
-        description="Object which animation will be exported as source positions",
-        default="", maxlen=1024,
-    )
+        scene = bpy.context.scene
+        if scene is None: return
 
-    source_collection: StringProperty(
-        name="Sources",
-        description="Collection of objects to export as sources",
-        default="", maxlen=1024,
-    )
+        operators.update_deprecated_catt_materials(scene.catt_io)
 
-    source_export_type: EnumProperty(
-        name="Export",
-        description="Export either animated object or collection of objects",
-        items=[("ANIMATED", "Object/Animation", ""), ("COLLECTION", "Collection", "")],
-        default="COLLECTION"
-    )
 
-    source_dist_thresh: FloatProperty(
-        name="Merge Distance",
-        description="Minimum distance (in m) between two exported positions along animation curve",
-        default=0,
-        min=0.0, max=100.0, soft_min=0.0, soft_max=100.0,
+    classes = (
+        properties.SceneProperties,
+        ui.VIEW3D_PT_catt_main,
+        ui.VIEW3D_PT_catt_material,
+        ui.VIEW3D_PT_catt_material_library,
+        ui.VIEW3D_PT_catt_analysis,
+        operators.MESH_OT_catt_import,
+        operators.MESH_OT_catt_realize_proxies,
+        operators.MESH_OT_catt_export_room,
+        operators.MESH_OT_catt_export_room_sweep,
+        operators.MESH_OT_catt_reverb_preview,
+        operators.MESH_OT_catt_visibility,
+        operators.MESH_OT_catt_export_receiver_animation,
+        operators.MESH_OT_catt_export_receiver_collection,
+        operators.MESH_OT_catt_export_source_animation,
+        operators.MESH_OT_catt_export_source_collection,
+        operators.MESH_OT_catt_material_convert,
+        operators.MESH_OT_catt_library_assign,
+        # operators.MESH_OT_catt_material_retro_compat,
+        operators.MESH_OT_catt_utils,
     )
 
 
-classes = (
-    SceneProperties,
-    ui.VIEW3D_PT_catt_main,
-    ui.VIEW3D_PT_catt_material,
-    operators.MESH_OT_catt_import,
-    operators.MESH_OT_catt_export_room,
-    operators.MESH_OT_catt_export_receiver_animation,
-    operators.MESH_OT_catt_export_receiver_collection,
-    operators.MESH_OT_catt_export_source_animation,
-    operators.MESH_OT_catt_export_source_collection,
-    operators.MESH_OT_catt_material_convert,
-    # operators.MESH_OT_catt_material_retro_compat,
-    operators.MESH_OT_catt_utils,
-)
-
-
 def register():
 
     for cls in classes:
         bpy.utils.register_class(cls)
 
-    bpy.types.Scene.catt_io = PointerProperty(type=SceneProperties)
+    bpy.types.Scene.catt_io = PointerProperty(type=properties.SceneProperties)
+
+    bpy.app.handlers.load_post.append(load_post_handler)
+    live_export.register()
+    proxy_import.register()
 
 def unregister():
 
+    proxy_import.unregister()
+    live_export.unregister()
+
+    if load_post_handler in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(load_post_handler)
+
     for cls in classes:
         bpy.utils.unregister_class(cls)
 
@@ -0,0 +1,182 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Headless export from the command line, e.g.:
+#   blender -b room.blend --python io_export_catt/cli.py -- --job job.json --export room receivers
+#   blender -b room.blend --python-expr "import io_export_catt.cli as cli; cli.main()" -- --set export_path=//catt
+# (see utils/batch_export.py to run it over many .blend files)
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+import bpy
+
+
+# prefix of the stdout line holding the json report (parsed by utils/batch_export.py)
+REPORT_PREFIX = 'CATT_CLI_REPORT '
+
+# exit codes
+EXIT_OK = 0
+EXIT_EXPORT_FAILED = 1
+EXIT_BAD_ARGUMENTS = 2
+
+# available exports (see get_export_operators)
+EXPORT_NAMES = ('room', 'sweep', 'receivers', 'sources', 'visibility', 'reverb')
+
+
+def get_addon():
+    """ return add-on package, imported from the folder of this file if run as a script """
+
+    if __package__: return sys.modules[__package__]
+
+    folder = os.path.dirname(os.path.abspath(__file__))
+    if os.path.dirname(folder) not in sys.path: sys.path.append(os.path.dirname(folder))
+
+    return importlib.import_module(os.path.basename(folder))
+
+
+def get_export_operators(catt_io):
+    """ return dict of export names to operator (as set in scene settings) """
+
+    return {
+        'room': bpy.ops.catt.export_room,
+        'sweep': bpy.ops.catt.export_room_sweep,
+        'receivers': bpy.ops.catt.export_receiver_collection if catt_io.receiver_export_type == 'COLLECTION' else bpy.ops.catt.export_receiver_animation,
+        'sources': bpy.ops.catt.export_source_collection if catt_io.source_export_type == 'COLLECTION' else bpy.ops.catt.export_source_animation,
+        'visibility': bpy.ops.catt.visibility_matrix,
+        'reverb': bpy.ops.catt.reverb_preview,
+    }
+
+
+def parse_value(text):
+    """ parse --set value as json (numbers, booleans, lists), plain string otherwise """
+
+    try: return json.loads(text)
+    except ValueError: return text
+
+
+def parse_args(argv):
+    """ parse arguments following '--' on blender command line """
+
+    parser = argparse.ArgumentParser(prog='blender -b file.blend --python cli.py --', description='Export CATT-Acoustic files from a .blend file without user interface')
+    parser.add_argument('--job', help='json job file: {"settings": {<scene catt_io property>: value}, "exports": [<export name>]}')
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE', help='scene setting (overrides job file), value parsed as json if possible')
+    parser.add_argument('--export', nargs='+', choices=EXPORT_NAMES, help='exports to run, in order (default: job file exports, else room)')
+    parser.add_argument('--report', help='write json report (timings, status) to this file')
+
+    return parser.parse_args(argv)
+
+
+def get_job(args):
+    """ return settings and exports of job from job file and arguments """
+
+    # job file
+    job = dict()
+    if args.job is not None:
+        with open(args.job, 'r') as file: job = json.load(file)
+
+    # settings
+    settings = dict(job.get('settings', dict()))
+    for item in args.set:
+        if '=' not in item: raise ValueError('expected KEY=VALUE, got: {0}'.format(item))
+        key, value = item.split('=', 1)
+        settings[key.strip()] = parse_value(value)
+
+    # exports
+    exports = args.export if args.export is not None else job.get('exports', ['room'])
+    for name in exports:
+        if name not in EXPORT_NAMES: raise ValueError('unknown export: {0} (expecting one of {1})'.format(name, ', '.join(EXPORT_NAMES)))
+
+    return [settings, exports]
+
+
+def apply_settings(catt_io, settings):
+    """ set scene catt_io properties from dict """
+
+    for key, value in settings.items():
+
+        if key not in catt_io.bl_rna.properties.keys() or key == 'rna_type':
+            raise ValueError('unknown setting: {0}'.format(key))
+
+        setattr(catt_io, key, value)
+
+
+def run_job(context, settings, exports):
+    """ apply settings and run exports, return report (dict) """
+
+    # init locals
+    catt_io = context.scene.catt_io
+    report = {'file': bpy.data.filepath, 'exports': [], 'status': EXIT_OK}
+
+    # settings
+    apply_settings(catt_io, settings)
+    operators = get_export_operators(catt_io)
+
+    # loop over exports
+    for name in exports:
+
+        # run export
+        time_start = time.perf_counter()
+        try:
+            result = operators[name]()
+            error = None if 'FINISHED' in result else 'cancelled'
+        except RuntimeError as exception:
+            error = str(exception).strip()
+
+        # save to locals
+        report['exports'].append({'name': name, 'time': time.perf_counter() - time_start, 'error': error})
+        if error is not None: report['status'] = EXIT_EXPORT_FAILED
+
+    return report
+
+
+def main(argv=None):
+    """ command line entry point (arguments after '--' if argv is None), exits blender with status code """
+
+    # get arguments
+    if argv is None: argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    args = parse_args(argv)
+
+    # register add-on if need be (e.g. blender started with --factory-startup)
+    addon = get_addon()
+    if not hasattr(bpy.types.Scene, 'catt_io'):
+        addon.register()
+        addon.operators.update_deprecated_catt_materials(bpy.context.scene.catt_io) # file loaded before handler registration
+
+    # run job
+    time_start = time.perf_counter()
+    try:
+        settings, exports = get_job(args)
+        report = run_job(bpy.context, settings, exports)
+    except (OSError, ValueError, TypeError, AttributeError) as exception:
+        report = {'file': bpy.data.filepath, 'exports': [], 'status': EXIT_BAD_ARGUMENTS, 'error': str(exception)}
+    report['time'] = time.perf_counter() - time_start
+
+    # output report
+    print(REPORT_PREFIX + json.dumps(report))
+    if args.report is not None:
+        with open(args.report, 'w') as file: json.dump(report, file, indent=2)
+
+    sys.exit(report['status'])
+
+
+if __name__ == '__main__':
+    main()
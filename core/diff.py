@@ -0,0 +1,278 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Geometric diff of two CATT .GEO files, independent of corners and planes numbering (no bpy dependency):
+#   python -m io_export_catt.core.diff old.geo new.geo --dist 0.01
+
+import argparse
+import json
+import numpy as np
+
+from .geo import get_close_pairs, parse_geo_file
+
+
+# plane status codes (see diff_geometry, REMOVED only applies to planes of a)
+UNCHANGED = 0
+ADDED = 1
+MOVED = 2
+REMATERIALED = 3
+REMOVED = 4
+STATUS_NAMES = ('unchanged', 'added', 'moved', 'rematerialed', 'removed')
+
+
+def get_geometry_arrays(vertices, faces):
+    """ return corner positions (n x 3) and corner ids, plane ids, and planes as lists of corner rows
+    (from parse_geo_file dicts; undefined corners referenced as -1) """
+
+    # corners
+    corner_ids = np.array(sorted(vertices.keys()), dtype=np.int64)
+    positions = np.array([vertices[corner_id]['xyz'] for corner_id in corner_ids.tolist()], dtype=np.float64).reshape(-1, 3)
+    rows = {corner_id: row for row, corner_id in enumerate(corner_ids.tolist())}
+
+    # planes (in file order)
+    plane_ids = list(faces.keys())
+    planes = [[rows.get(corner_id, -1) for corner_id in faces[plane_id]['vertices']] for plane_id in plane_ids]
+
+    return [positions, corner_ids, plane_ids, planes]
+
+
+def get_corner_labels(positions_a, positions_b, dist):
+    """ return labels of corners of both files, corners closer than dist sharing the same label """
+
+    # map each corner to the first corner it is merged with (as remove_doubles)
+    positions = np.concatenate((positions_a, positions_b))
+    labels = np.arange(len(positions))
+    for i_corner, j_corner in get_close_pairs(positions, dist).tolist():
+        if labels[i_corner] == i_corner and labels[j_corner] == j_corner: labels[j_corner] = i_corner
+
+    return [labels[:len(positions_a)], labels[len(positions_a):]]
+
+
+def get_plane_signatures(planes, labels, positions, names, materials, dist, undefined_offset):
+    """ return per plane corner set signature, and translation invariant shape signature (name, material
+    and corners relative to centroid, rounded to dist) """
+
+    # init locals
+    scale = 1.0 / dist if dist > 0 else 1e6
+    loop_totals = np.array([len(rows) for rows in planes], dtype=np.int64)
+    loop_rows = np.array([row for rows in planes for row in rows], dtype=np.int64)
+    loop_starts = np.concatenate(([0], np.cumsum(loop_totals)[:-1])).astype(np.int64) if len(planes) > 0 else np.zeros(0, dtype=np.int64)
+    loop_planes = np.repeat(np.arange(len(planes)), loop_totals)
+
+    # corner labels, undefined corners getting labels no other plane shares
+    defined = loop_rows >= 0
+    loop_labels = np.where(defined, labels[np.maximum(loop_rows, 0)] if len(labels) > 0 else 0, undefined_offset + loop_planes)
+    is_valid = np.bincount(loop_planes[~defined], minlength=len(planes)) == 0
+
+    # centroids and corners relative to centroids (vectorised)
+    points = positions[np.maximum(loop_rows, 0)] if len(positions) > 0 else np.zeros((len(loop_rows), 3))
+    centroids = np.add.reduceat(points, loop_starts, axis=0) / loop_totals[:, None] if len(planes) > 0 else np.zeros((0, 3))
+    relative = np.round((points - centroids[loop_planes]) * scale).astype(np.int64).tolist()
+    loop_labels = loop_labels.tolist()
+
+    # loop over planes
+    vertex_signatures = []
+    shape_signatures = []
+    for i_plane, (start, total, valid) in enumerate(zip(loop_starts.tolist(), loop_totals.tolist(), is_valid.tolist())):
+
+        vertex_signatures.append(tuple(sorted(loop_labels[start:start + total])))
+        shape_signatures.append((names[i_plane], materials[i_plane], tuple(sorted(map(tuple, relative[start:start + total])))) if valid else None)
+
+    return [vertex_signatures, shape_signatures, centroids]
+
+
+def group_signatures(signatures_a, signatures_b, ids_a, ids_b):
+    """ return dict of signature to (ids of a, ids of b), for signatures of a (None signatures discarded) """
+
+    groups = dict()
+    for i_a in ids_a:
+        if signatures_a[i_a] is not None: groups.setdefault(signatures_a[i_a], ([], []))[0].append(i_a)
+    for i_b in ids_b:
+        if signatures_b[i_b] in groups: groups[signatures_b[i_b]][1].append(i_b)
+
+    return groups
+
+
+def get_unpaired(pairs, ids_a, ids_b):
+    """ return ids of a and b not in pairs """
+
+    paired_a = set(i_a for i_a, i_b in pairs)
+    paired_b = set(i_b for i_a, i_b in pairs)
+
+    return [[i_a for i_a in ids_a if i_a not in paired_a], [i_b for i_b in ids_b if i_b not in paired_b]]
+
+
+def pair_signatures(signatures_a, signatures_b, ids_a, ids_b):
+    """ return pairs of (a, b) with equal signatures (in order of appearance), and unpaired ids of a and b """
+
+    pairs = []
+    for group_a, group_b in group_signatures(signatures_a, signatures_b, ids_a, ids_b).values(): pairs.extend(zip(group_a, group_b))
+
+    return [sorted(pairs)] + get_unpaired(pairs, ids_a, ids_b)
+
+
+# max number of (a, b) candidates of a group paired by distance (see pair_moved)
+MAX_NEAREST_GROUP = 4096
+
+
+def pair_moved(signatures_a, signatures_b, ids_a, ids_b, centroids_a, centroids_b, dist):
+    """ return pairs of (a, b) planes with equal shape signatures, and unpaired ids of a and b
+
+    Planes of an object usually move together: the translation most candidate pairs of an object name
+    agree on is voted, then planes are paired greedily on distance once translated. Groups with more
+    than MAX_NEAREST_GROUP candidate pairs (e.g. tiles) are paired in centroids lexicographic order.
+    """
+
+    # init locals
+    groups = group_signatures(signatures_a, signatures_b, ids_a, ids_b)
+    scale = 1.0 / dist if dist > 0 else 1e6
+
+    # vote translation of each object name
+    votes = dict()
+    for (name, material, shape), (group_a, group_b) in groups.items():
+        if len(group_b) == 0 or len(group_a) * len(group_b) > MAX_NEAREST_GROUP: continue
+        offsets = np.round((centroids_b[group_b][None, :, :] - centroids_a[group_a][:, None, :]) * scale).astype(np.int64).reshape(-1, 3)
+        counter = votes.setdefault(name, dict())
+        for offset in map(tuple, offsets.tolist()): counter[offset] = counter.get(offset, 0) + 1
+    translations = {name: np.array(max(counter, key=counter.get), dtype=np.float64) / scale for name, counter in votes.items()}
+
+    # pair planes of each group
+    pairs = []
+    for (name, material, shape), (group_a, group_b) in groups.items():
+
+        if len(group_b) == 0: continue
+
+        # large groups: pair in lexicographic order of centroids
+        if len(group_a) * len(group_b) > MAX_NEAREST_GROUP:
+            order_a = np.lexsort(centroids_a[group_a].T[::-1])
+            order_b = np.lexsort(centroids_b[group_b].T[::-1])
+            pairs.extend((group_a[i], group_b[j]) for i, j in zip(order_a.tolist(), order_b.tolist()))
+            continue
+
+        # greedy pairing on sorted distances (after object translation)
+        distances = np.linalg.norm(centroids_a[group_a][:, None, :] + translations[name] - centroids_b[group_b][None, :, :], axis=2)
+        used_a, used_b = set(), set()
+        for i, j in zip(*np.unravel_index(np.argsort(distances, axis=None, kind='stable'), distances.shape)):
+            if i in used_a or j in used_b: continue
+            pairs.append((group_a[i], group_b[j]))
+            used_a.add(i)
+            used_b.add(j)
+
+    return [sorted(pairs)] + get_unpaired(pairs, ids_a, ids_b)
+
+
+def diff_geometry(geo_a, geo_b, dist=0.01):
+    """ return geometric diff of two parsed .GEO files ([vertices, faces] dicts from parse_geo_file)
+
+    Corners closer than dist are matched (grid hashing, near linear time). Planes sharing the same
+    corners are paired: unchanged or rematerialed (different material). Remaining planes with the
+    same name, material and shape (up to dist), only translated, are moved (see pair_moved); others are removed from a
+    or added in b. Returns dict of:
+        'removed': plane ids of a
+        'added': plane ids of b
+        'moved': list of (plane id a, plane id b, translation)
+        'rematerialed': list of (plane id a, plane id b, material a, material b)
+        'unchanged': list of (plane id a, plane id b)
+        'status_b': per plane of b (in file order) status code (UNCHANGED, ADDED, MOVED, REMATERIALED)
+    """
+
+    # init locals
+    vertices_a, faces_a = geo_a[:2]
+    vertices_b, faces_b = geo_b[:2]
+    positions_a, corner_ids_a, plane_ids_a, planes_a = get_geometry_arrays(vertices_a, faces_a)
+    positions_b, corner_ids_b, plane_ids_b, planes_b = get_geometry_arrays(vertices_b, faces_b)
+    names_a, materials_a = [faces_a[i]['obj_name'] for i in plane_ids_a], [faces_a[i]['material'] for i in plane_ids_a]
+    names_b, materials_b = [faces_b[i]['obj_name'] for i in plane_ids_b], [faces_b[i]['material'] for i in plane_ids_b]
+
+    # match corners
+    labels_a, labels_b = get_corner_labels(positions_a, positions_b, dist)
+
+    # plane signatures (undefined corners labels beyond corners labels, distinct between files)
+    undefined_offset = len(positions_a) + len(positions_b)
+    vertex_signatures_a, shape_signatures_a, centroids_a = get_plane_signatures(planes_a, labels_a, positions_a, names_a, materials_a, dist, undefined_offset)
+    vertex_signatures_b, shape_signatures_b, centroids_b = get_plane_signatures(planes_b, labels_b, positions_b, names_b, materials_b, dist, undefined_offset + len(planes_a))
+
+    # pair planes with same corners, identical material first
+    signatures_a = [(signature, material) for signature, material in zip(vertex_signatures_a, materials_a)]
+    signatures_b = [(signature, material) for signature, material in zip(vertex_signatures_b, materials_b)]
+    unchanged, unpaired_a, unpaired_b = pair_signatures(signatures_a, signatures_b, range(len(planes_a)), range(len(planes_b)))
+    rematerialed, unpaired_a, unpaired_b = pair_signatures(vertex_signatures_a, vertex_signatures_b, unpaired_a, unpaired_b)
+
+    # pair translated planes
+    moved, removed, added = pair_moved(shape_signatures_a, shape_signatures_b, unpaired_a, unpaired_b, centroids_a, centroids_b, dist)
+
+    # per plane status of b
+    status_b = np.full(len(planes_b), ADDED, dtype=np.int8)
+    status_b[[i_b for i_a, i_b in unchanged]] = UNCHANGED
+    status_b[[i_b for i_a, i_b in moved]] = MOVED
+    status_b[[i_b for i_a, i_b in rematerialed]] = REMATERIALED
+
+    return {
+        'removed': [plane_ids_a[i_a] for i_a in removed],
+        'added': [plane_ids_b[i_b] for i_b in added],
+        'moved': [(plane_ids_a[i_a], plane_ids_b[i_b], (centroids_b[i_b] - centroids_a[i_a]).tolist()) for i_a, i_b in moved],
+        'rematerialed': [(plane_ids_a[i_a], plane_ids_b[i_b], materials_a[i_a], materials_b[i_b]) for i_a, i_b in rematerialed],
+        'unchanged': [(plane_ids_a[i_a], plane_ids_b[i_b]) for i_a, i_b in unchanged],
+        'status_b': status_b,
+    }
+
+
+def diff_geo_files(file_path_a, file_path_b, dist=0.01, num_bands=8):
+    """ return geometric diff of two .GEO files (see diff_geometry) """
+
+    return diff_geometry(parse_geo_file(file_path_a, False, num_bands), parse_geo_file(file_path_b, False, num_bands), dist)
+
+
+def format_diff(diff, max_items=20):
+    """ return human readable diff summary (first max_items planes of each category) """
+
+    # init locals
+    lines = ['{0} unchanged, {1} moved, {2} rematerialed, {3} removed, {4} added planes'.format(*[len(diff[key]) for key in ('unchanged', 'moved', 'rematerialed', 'removed', 'added')])]
+
+    # shape lines
+    for plane_id in diff['removed'][:max_items]: lines.append('- plane {0}'.format(plane_id))
+    for plane_id in diff['added'][:max_items]: lines.append('+ plane {0}'.format(plane_id))
+    for plane_id_a, plane_id_b, offset in diff['moved'][:max_items]: lines.append('~ plane {0} -> {1} moved by ({2:.2f}, {3:.2f}, {4:.2f})'.format(plane_id_a, plane_id_b, *offset))
+    for plane_id_a, plane_id_b, material_a, material_b in diff['rematerialed'][:max_items]: lines.append('* plane {0} -> {1} material {2} -> {3}'.format(plane_id_a, plane_id_b, material_a, material_b))
+
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """ command line entry point, exits with status 1 if files differ """
+
+    # get arguments
+    parser = argparse.ArgumentParser(description='Compare the geometry of two CATT .GEO files, independently of corners and planes numbering')
+    parser.add_argument('file_a', help='reference .GEO file')
+    parser.add_argument('file_b', help='compared .GEO file')
+    parser.add_argument('--dist', type=float, default=0.01, help='distance (in m) under which corners are considered identical')
+    parser.add_argument('--bands', type=int, default=8, help='number of frequency bands of materials')
+    parser.add_argument('--json', help='write diff (plane ids) to this json file')
+    args = parser.parse_args(argv)
+
+    # diff
+    diff = diff_geo_files(args.file_a, args.file_b, args.dist, args.bands)
+    print(format_diff(diff))
+    if args.json is not None:
+        with open(args.json, 'w') as file: json.dump({key: value for key, value in diff.items() if key != 'status_b'}, file, indent=2)
+
+    raise SystemExit(1 if any(len(diff[key]) > 0 for key in ('moved', 'rematerialed', 'removed', 'added')) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Atomic, content hashed export files (no bpy dependency)
+
+import hashlib
+import os
+import tempfile
+
+
+# first line of exported files: checksum of the rest of the file (fixed length, see ExportFile)
+CHECKSUM_PREFIX = '; CHECKSUM SHA1 '
+
+
+def read_checksum(file_path):
+    """ return checksum stamped on first line of exported file, None if file doesn't exist or has no checksum """
+
+    if not os.path.isfile(file_path): return None
+
+    with open(file_path, 'r', errors='replace') as file:
+        line = file.readline(len(CHECKSUM_PREFIX) + 64).rstrip()
+
+    if not line.startswith(CHECKSUM_PREFIX): return None
+
+    return line[len(CHECKSUM_PREFIX):].strip()
+
+
+class ExportFile:
+    """ text file written to a temporary file (same folder) and atomically renamed over file_path on
+    exit, only if content changed: unchanged files keep their modification time, crashes never leave
+    half written files. First line holds the content checksum, compared to that of the existing file
+    (with file size) to avoid re-reading it. After exit, changed tells if file_path was replaced.
+    """
+
+    def __init__(self, file_path, newline='\r\n'):
+
+        self.file_path = file_path
+        self.newline = newline
+        self.changed = False
+
+    def __enter__(self):
+
+        # open temp file (hidden, next to target so that rename is atomic)
+        folder, name = os.path.split(os.path.abspath(self.file_path))
+        fd, self.temp_path = tempfile.mkstemp(prefix='.{0}.'.format(name), suffix='.tmp', dir=folder)
+        self.file = os.fdopen(fd, 'w', newline=self.newline)
+        self.hash = hashlib.sha1()
+
+        # reserve checksum line
+        self.file.write('{0}{1} \n'.format(CHECKSUM_PREFIX, '0' * self.hash.digest_size * 2))
+
+        return self
+
+    def write(self, text):
+
+        self.hash.update(text.encode('utf-8', 'surrogatepass'))
+        self.file.write(text)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        # discard temp file on error
+        if exc_type is not None:
+            self.file.close()
+            os.remove(self.temp_path)
+            return False
+
+        # stamp checksum (same length as reserved line)
+        checksum = self.hash.hexdigest()
+        self.file.seek(0)
+        self.file.write('{0}{1} \n'.format(CHECKSUM_PREFIX, checksum))
+        self.file.close()
+
+        # keep existing file if unchanged
+        if read_checksum(self.file_path) == checksum and os.path.getsize(self.file_path) == os.path.getsize(self.temp_path):
+            os.remove(self.temp_path)
+            return False
+
+        # mkstemp creates owner only files: use permissions of replaced file (or default ones)
+        if os.path.isfile(self.file_path):
+            os.chmod(self.temp_path, os.stat(self.file_path).st_mode & 0o777)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(self.temp_path, 0o666 & ~umask)
+
+        # replace file
+        os.replace(self.temp_path, self.file_path)
+        self.changed = True
+
+        return False
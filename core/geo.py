@@ -0,0 +1,432 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Reading and writing CATT .GEO files (no bpy dependency)
+
+import contextlib
+import re
+import numpy as np
+
+from .files import ExportFile
+from .procedural import expand_geo_file, is_procedural_file
+from .profiling import log
+
+
+# default frequency bands (in Hz) of coefficient lists
+DEFAULT_FREQUENCY_BANDS = (125, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+# lowest frequency (in Hz) of the bands written after the colon of CATT coefficient lists
+COLON_FREQUENCY = 8000
+
+
+def freq_to_str(freq):
+    """convert float frequency to string"""
+
+    # kHz
+    if freq < 1000.0: return '{0}Hz'.format(int(freq))
+
+    # Hz
+    return '{0}kHz'.format(int(freq/1000.0))
+
+
+def bands_to_str(values, round_factor=1, frequency_bands=DEFAULT_FREQUENCY_BANDS):
+    """convert per band coefficients to CATT string (bands from COLON_FREQUENCY after a colon)"""
+
+    values = np.round(np.asarray(values, dtype=np.float64), round_factor).tolist()
+    i_colon = next((i for i, freq in enumerate(frequency_bands) if freq >= COLON_FREQUENCY), len(frequency_bands))
+    values_str = ' '.join(map(str, values[:i_colon]))
+    if len(values) > i_colon: values_str += ' : ' + ' '.join(map(str, values[i_colon:]))
+
+    return values_str
+
+
+def name_to_file_str(name):
+    """convert string (e.g. collection name) to string usable in file names"""
+
+    return re.sub(r'[^\w\-]', '_', name)
+
+
+def mat_name_to_str(mat_name):
+    """convert string material name to string that will correctly be interpreted by CATT"""
+
+    return mat_name.replace('.', '_')
+
+
+def parse_geo_file(filepath, is_debug, num_bands=8, expand=False):
+    """ return [vertices, faces, materials, error_detected] of .GEO file, CATT procedural syntax
+    (INCLUDE, variables, expressions, transforms) expanded first if expand and file contains
+    procedural statements (line ids reported then refer to the expanded file) """
+
+    # init locals
+    materials = dict()
+    vertices = dict()
+    faces = dict()
+    error_detected = False
+    expand = expand and is_procedural_file(filepath)
+
+    # loop over lines
+    with (contextlib.nullcontext(line + '\n' for line in expand_geo_file(filepath)) if expand else open(filepath, "r")) as file_reader:
+        for line_id, line in enumerate(file_reader, 1):
+
+            # shape data
+            line_split = line.split()
+            if( is_debug ): log('parse_geo_file', 'parsing line', line_id)
+
+            # discard empty lines
+            if( len(line_split) == 0 ): continue
+
+            # line: material definition
+            if( line_split[0].lower() == 'abs' ):
+
+                # init locals
+                nFreq = num_bands
+                material = {'absorption': [0.0]*nFreq, 'diffraction': [0.0]*nFreq, 'color': [0, 0, 0], 'use_diffraction': True, 'is_diff_estimate': False, 'diff_estimate': 0.0}
+
+                # extract data: material name (assumes no spaces)
+                material_name = line_split[1]
+
+                # prepare absorption and diffraction extraction
+                abs_index_start = line.index('<')
+                abs_index_end = line.index('>')
+                dif_index_start = line[abs_index_end+1::].index('<') + abs_index_end + 1
+                dif_index_end = line[abs_index_end+1::].index('>') + abs_index_end + 1
+
+                # extract data: absorption
+                absorption = onlyDigitList( line[abs_index_start:abs_index_end].split() )
+
+                # deal with incomplete absorption definition
+                if( len( absorption ) < nFreq ):
+
+                    # pad with last value
+                    last_value = absorption[-1]
+                    for i in range(nFreq-len( absorption )): absorption.append(last_value)
+
+                    # log error
+                    error_detected = True
+                    print("\nWARNING: expecting", nFreq, "freq. bands absorption definition at line", line_id, "\n-> padding high frequencies with last band value")
+
+                # extract data: store absorption to locals
+                material['absorption'] = absorption
+
+                # extract data: diffraction
+                diffraction = onlyDigitList( line[dif_index_start:dif_index_end].split() )
+                if( dif_index_start == 0 ):
+
+                    # diffraction not defined
+                    material['use_diffraction'] = False
+
+                elif( 'estimate' in line[dif_index_start:dif_index_end] ):
+
+                    # material diffraction is defined using catt "estimate(..)" syntax
+                    material['is_diff_estimate'] = True
+                    material['diff_estimate'] = diffraction[0]
+
+                else:
+
+                    # diffraction is defined using classic (per band) syntax
+                    if( len( diffraction ) < nFreq ):
+
+                        # pad with last value
+                        last_value = diffraction[-1]
+                        for i in range(nFreq-len( diffraction )): diffraction.append(last_value)
+
+                        # log error
+                        error_detected = True
+                        print("\nWARNING: expecting", nFreq, "freq. bands diffraction definition at line", line_id, "\n-> padding high frequencies with last band value")
+
+                    # update locals
+                    material['diffraction'] = diffraction
+
+                # colour definition
+                color = onlyDigitList( line[dif_index_end::].split() )
+                color = [round(float(x)/255.0, 3) for x in color]
+                color.append(1.0) # alpha
+                material['color'] = color
+
+                # save material to locals
+                materials[material_name] = material
+
+            # line: vertex (corner) definition
+            elif( line_split[0].isnumeric() ):
+
+                # extract data
+                vertice_id = int( line_split[0] )
+                vertice_id -= 1 # start from 0 compared to catt that starts from 1
+                vertice_xyz = [float(x) for x in line_split[1:4]]
+
+                # save to locals
+                vertices[vertice_id] = {'xyz': vertice_xyz}
+
+            # line: face (plane) definition
+            elif( line_split[0][0] == "[" ):
+
+                # check that catt didn't split line in two (does if line is too long)
+                try:
+
+                    index_open = line.index("[")
+                    index_close = line.index("]")
+
+                except ValueError:
+
+                    print("\nERROR: Unexpected line break at line", line_id, "\n->", line + "Face import discarded\n")
+                    error_detected = True
+                    continue
+
+                # shape data
+                line_strip = line.replace("[", "").replace("]", "")
+                line_split = line_strip.split()
+
+                # deal with object names containing spaces
+                index_slash_1 = line_split.index("/")
+                index_slash_2 = line_split.index("/", index_slash_1+1, len(line_split)-1)
+
+                # extract data
+                face_id = int( line_split[0] )
+                obj_name = ' '.join(line_split[1:index_slash_1])
+                face_vertices = [int(x)-1 for x in line_split[(index_slash_1+1):index_slash_2]]
+                face_material = line_split[-1]
+
+                # deal with automatic edge diffraction syntax
+                # ('*' at end of material name, that need to be moved to end of object name to be preserved in blender scene for next export)
+                # note: can't use material names with * at the end in original CATT scene
+                if( face_material[-1] == '*' ):
+
+                    face_material = face_material[:-1] # remove last character
+                    obj_name = obj_name + '*'
+
+                # save to locals
+                faces[face_id] = {'obj_name': obj_name, 'vertices': face_vertices, 'material': face_material}
+
+    # report suppressed debug progress lines (warnings and errors printed unthrottled)
+    log.flush()
+
+    return [vertices, faces, materials, error_detected]
+
+
+def onlyDigitList(list_in):
+
+    list_str = [''.join(c for c in x if (c.isdigit() or c =='.')) for x in list_in]
+    list_str = list( filter(None, list_str) )
+    list_float = [float(x) for x in list_str]
+
+    return list_float
+
+
+def transform_arrays(arrays, matrix):
+    """ return copy of mesh arrays with transformed vertices
+
+    Polygons winding is reversed for mirroring transforms (negative scale), so that exported
+    normals match the normals displayed in blender.
+    """
+
+    # init locals
+    matrix = np.array(matrix, dtype=np.float64)
+    arrays = dict(arrays)
+
+    # transform vertices
+    arrays['vertices'] = arrays['vertices'] @ matrix[:3, :3].T + matrix[:3, 3]
+
+    # reverse polygons winding (keeping first vertex)
+    if np.linalg.det(matrix[:3, :3]) < 0:
+        starts = np.repeat(arrays['loop_starts'], arrays['loop_totals'])
+        totals = np.repeat(arrays['loop_totals'], arrays['loop_totals'])
+        loop_ids = np.arange(len(arrays['loop_vertices'])) - starts
+        arrays['loop_vertices'] = arrays['loop_vertices'][starts + (totals - loop_ids) % totals]
+
+    return arrays
+
+
+def get_close_pairs(points, dist):
+    """ return (i, j) ids of points closer than dist (or equal), i < j, sorted by i then j
+
+    Points are hashed into a grid of dist sized cells, candidates are searched in neighbour cells
+    (vectorised, near linear time for small dist), then filtered on actual distance. For dist <= 0,
+    identical points are each paired with the first of them only (same groups, linear size).
+    """
+
+    # init locals
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+
+    # exact matches: points paired with first identical point
+    if dist <= 0:
+        unique, first, inverse = np.unique(points, axis=0, return_index=True, return_inverse=True)
+        j = np.flatnonzero(first[inverse.ravel()] != np.arange(len(points)))
+        pairs = np.stack((first[inverse.ravel()[j]], j), axis=1)
+        return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+    cells = np.floor(points / dist).astype(np.int64)
+    primes = np.array([73856093, 19349663, 83492791], dtype=np.int64)
+
+    # cell hash keys (collisions only add candidates), points sorted by key
+    keys = (cells * primes).sum(axis=1)
+    order = np.argsort(keys, kind='stable')
+    keys_sorted = keys[order]
+
+    # loop over neighbour cells (each pair of cells visited once)
+    pairs = []
+    for offset in [(0, 0, 0)] + [(x, y, z) for x in (-1, 0, 1) for y in (-1, 0, 1) for z in (-1, 0, 1) if (x, y, z) > (0, 0, 0)]:
+
+        # points of neighbour cell
+        # (searched in sorted order, much faster on large arrays)
+        neighbour_keys = ((cells + offset) * primes).sum(axis=1)
+        neighbour_order = np.argsort(neighbour_keys)
+        starts = np.empty(len(points), dtype=np.int64)
+        counts = np.empty(len(points), dtype=np.int64)
+        starts[neighbour_order] = np.searchsorted(keys_sorted, neighbour_keys[neighbour_order], 'left')
+        counts[neighbour_order] = np.searchsorted(keys_sorted, neighbour_keys[neighbour_order], 'right')
+        counts -= starts
+
+        # candidate pairs
+        i = np.repeat(np.arange(len(points)), counts)
+        j = order[np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())]
+        pairs.append(np.stack((np.minimum(i, j), np.maximum(i, j)), axis=1)[i != j])
+
+    # filter on distance, remove duplicate pairs
+    pairs = np.concatenate(pairs)
+    pairs = pairs[((points[pairs[:, 0]] - points[pairs[:, 1]]) ** 2).sum(axis=1) <= dist ** 2]
+
+    # (pairs encoded as single integers, faster than unique rows)
+    keys = np.unique(pairs[:, 0] * len(points) + pairs[:, 1])
+
+    return np.stack((keys // len(points), keys % len(points)), axis=1)
+
+
+def merge_parts(parts, dist=0.0):
+    """ merge parts into a single part, merging vertices closer than dist (if > 0) """
+
+    # init locals
+    vertex_offsets = np.cumsum([0] + [len(part['vertices']) for part in parts])
+    loop_offsets = np.cumsum([0] + [len(part['loop_vertices']) for part in parts])
+
+    # concatenate
+    merged = {
+        'vertices': np.concatenate([part['vertices'] for part in parts]),
+        'loop_starts': np.concatenate([part['loop_starts'] + loop_offsets[i_part] for i_part, part in enumerate(parts)]),
+        'loop_totals': np.concatenate([part['loop_totals'] for part in parts]),
+        'loop_vertices': np.concatenate([part['loop_vertices'] + vertex_offsets[i_part] for i_part, part in enumerate(parts)]),
+        'names': [name for part in parts for name in part['names']],
+        'materials': [name for part in parts for name in part['materials']],
+        'diffraction': np.concatenate([part['diffraction'] for part in parts]),
+    }
+
+    # remove duplicate vertices
+    if dist > 0: merged = remove_doubles(merged, dist)
+
+    return merged
+
+
+def remove_doubles(part, dist):
+    """ merge vertices of part closer than dist, remove collapsed loops and degenerate faces """
+
+    # init locals
+    vertices = part['vertices']
+    remap = np.arange(len(vertices))
+
+    # map each vertex to the first vertex it is merged with
+    for i_vertex, j_vertex in get_close_pairs(vertices, dist).tolist():
+        if remap[i_vertex] == i_vertex and remap[j_vertex] == j_vertex: remap[j_vertex] = i_vertex
+
+    # compact vertices
+    used, inverse = np.unique(remap, return_inverse=True)
+    loop_vertices = inverse[part['loop_vertices']]
+
+    # remove loops collapsed onto next loop of their polygon
+    num_polygons = len(part['loop_starts'])
+    loop_next = np.arange(len(loop_vertices)) + 1
+    loop_next[part['loop_starts'] + part['loop_totals'] - 1] = part['loop_starts']
+    loop_polygons = np.repeat(np.arange(num_polygons), part['loop_totals'])
+    keep = loop_vertices != loop_vertices[loop_next]
+
+    # remove degenerate polygons
+    loop_totals = np.bincount(loop_polygons[keep], minlength=num_polygons)
+    valid = loop_totals >= 3
+    keep &= valid[loop_polygons]
+    loop_totals = loop_totals[valid]
+
+    # shape output
+    part = dict(part)
+    part['vertices'] = vertices[used]
+    part['loop_vertices'] = loop_vertices[keep]
+    part['loop_totals'] = loop_totals
+    part['loop_starts'] = np.concatenate(([0], np.cumsum(loop_totals)[:-1])).astype(np.int64) if len(loop_totals) > 0 else np.zeros(0, dtype=np.int64)
+    part['names'] = [name for name, v in zip(part['names'], valid) if v]
+    part['materials'] = [name for name, v in zip(part['materials'], valid) if v]
+    part['diffraction'] = part['diffraction'][valid]
+
+    return part
+
+
+def get_geometry_offsets(parts, vertex_offset=0, plane_offset=0):
+    """ return first corner and plane ids (minus one) of each part """
+
+    vertex_offsets = np.cumsum([vertex_offset] + [len(part['vertices']) for part in parts])
+    plane_offsets = np.cumsum([plane_offset] + [len(part['loop_starts']) for part in parts])
+
+    return [vertex_offsets.tolist(), plane_offsets.tolist()]
+
+
+def format_corners(part, vertex_offset):
+    """ return catt corners lines of part """
+
+    first = vertex_offset + 1
+
+    return ''.join(["{0} {1:.2f} {2:.2f} {3:.2f} \n".format(index, x, y, z) for index, (x, y, z) in enumerate(part['vertices'].tolist(), first)])
+
+
+def format_planes(part, vertex_offset, plane_offset):
+    """ return catt planes lines of part """
+
+    # faces vertices ids
+    faces_vertices = np.split(part['loop_vertices'] + vertex_offset + 1, part['loop_starts'][1:]) if len(part['loop_starts']) > 0 else []
+    first = plane_offset + 1
+    lines = []
+
+    for index, name, vertices, material_name, diffraction in zip(range(first, first + len(faces_vertices)), part['names'], faces_vertices, part['materials'], part['diffraction'].tolist()):
+        lines.append("[ {0} {1} / {2} / {3}{4} ]\n".format(index, name, ' '.join(map(str, vertices.tolist())), material_name, '*' if diffraction else ''))
+
+    return ''.join(lines)
+
+
+def format_geometry(parts, vertex_offset=0, plane_offset=0):
+    """ return catt corners and planes sections (list of strings) of parts, ids starting after offsets """
+
+    # init locals
+    vertex_offsets, plane_offsets = get_geometry_offsets(parts, vertex_offset, plane_offset)
+    texts = []
+
+    # vertices
+    texts.append('CORNERS \n\n')
+    for i_part, part in enumerate(parts): texts.append(format_corners(part, vertex_offsets[i_part]))
+    texts.append('\n\n')
+
+    # faces
+    texts.append('PLANES\n\n')
+    for i_part, part in enumerate(parts): texts.append(format_planes(part, vertex_offsets[i_part], plane_offsets[i_part]))
+
+    return texts
+
+
+def write_geometry_file(file_path, header, parts, vertex_offset=0, plane_offset=0):
+    """ write catt geometry file (header, corners, planes) of parts, ids starting after offsets """
+
+    with ExportFile(file_path) as file:
+
+        file.write(header)
+        for text in format_geometry(parts, vertex_offset, plane_offset): file.write(text)
+
+    return [file_path, file.changed]
@@ -0,0 +1,182 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Objects hierarchy of parsed .GEO files (no bpy dependency): collections and objects rebuilt from
+# exported plane names (collection-object[-faceid]), parts identical up to a rigid transform found
+# to be created as linked duplicates
+
+import numpy as np
+
+
+# largest distance (in m) between corners of parts considered identical (exported corners rounded to cm)
+INSTANCE_TOLERANCE = 0.01
+
+
+def split_plane_names(names):
+    """ return dict of plane name to (collection name, object name, face id or None)
+
+    Names are split as written by the exporter: a '-<int>' suffix is a face id if the suffixes of
+    all names sharing the same prefix span 0..n-1, the prefix is then split on its first '-' into
+    collection and object names (no collection if no '-'). '*' suffixes (automatic edge
+    diffraction) are kept on object names.
+    """
+
+    # face ids suffixes per prefix
+    suffixes = dict()
+    for name in names:
+        prefix, separator, suffix = name.rstrip('*').rpartition('-')
+        if len(separator) > 0 and suffix.isdigit(): suffixes.setdefault(prefix, set()).add(int(suffix))
+    face_id_prefixes = set(prefix for prefix, ids in suffixes.items() if ids == set(range(len(ids))))
+
+    # loop over names
+    split = dict()
+    for name in names:
+
+        # edge diffraction flag
+        base = name.rstrip('*')
+        star = name[len(base):]
+
+        # face id
+        face_id = None
+        prefix, separator, suffix = base.rpartition('-')
+        if prefix in face_id_prefixes and suffix.isdigit(): base, face_id = prefix, int(suffix)
+
+        # collection
+        collection_name, separator, object_name = base.partition('-')
+        if len(separator) == 0 or len(object_name) == 0: collection_name, object_name = '', base
+
+        split[name] = (collection_name, object_name + star, face_id)
+
+    return split
+
+
+def get_object_parts(vertices, faces, rebuild_hierarchy=True):
+    """ return list of object parts of parsed .GEO file (see core.geo.parse_geo_file), in file order
+
+    Parts are dicts of collection and object names, plane ids (in polygon order), vertices (local
+    numbering in order of first use), polygons (lists of local vertex ids) and material names.
+    Without hierarchy, one part per plane name in a single collection (named ''). With hierarchy,
+    planes are grouped per collection and object, and a repeated face id of an object starts a new
+    part (collection instances exported with face ids).
+    """
+
+    # object of planes
+    names = dict.fromkeys(face['obj_name'] for face in faces.values())
+    split = split_plane_names(names) if rebuild_hierarchy else {name: ('', name, None) for name in names}
+
+    # loop over planes
+    parts = []
+    current = dict()
+    for plane_id, face in faces.items():
+
+        # get part (new part upon repeated face id)
+        collection_name, object_name, face_id = split[face['obj_name']]
+        key = (collection_name, object_name)
+        part = current.get(key)
+        if part is None or (face_id is not None and face_id in part['face_ids']):
+            part = {'collection': collection_name, 'name': object_name, 'plane_ids': [], 'face_ids': set(), 'vertex_ids': dict(), 'polygons': [], 'materials': []}
+            current[key] = part
+            parts.append(part)
+
+        # add plane (vertices renumbered in order of first use)
+        vertex_ids = part['vertex_ids']
+        part['polygons'].append([vertex_ids.setdefault(vertex_id, len(vertex_ids)) for vertex_id in face['vertices']])
+        part['plane_ids'].append(plane_id)
+        part['materials'].append(face['material'])
+        if face_id is not None: part['face_ids'].add(face_id)
+
+    # vertices coordinates
+    for part in parts:
+        part['vertices'] = np.array([vertices[vertex_id]['xyz'] for vertex_id in part.pop('vertex_ids')], dtype=np.float64).reshape(-1, 3)
+        del part['face_ids']
+
+    return parts
+
+
+def get_rigid_transforms(reference, candidates):
+    """ return rotations (m, 3, 3), translations (m, 3) best mapping reference (n, 3) vertices onto
+    each candidate (m, n, 3) in least squares (Kabsch algorithm, reflections excluded), and largest
+    distance (m,) between mapped and candidate vertices """
+
+    # centre
+    reference_centroid = reference.mean(axis=0)
+    candidates_centroids = candidates.mean(axis=1)
+    covariances = np.einsum('ni,mnj->mij', reference - reference_centroid, candidates - candidates_centroids[:, None, :])
+
+    # rotations (sign of last singular vector flipped for reflections)
+    u, s, vt = np.linalg.svd(covariances)
+    signs = np.sign(np.linalg.det(np.matmul(np.swapaxes(vt, 1, 2), np.swapaxes(u, 1, 2))))
+    signs[signs == 0] = 1
+    vt[:, 2, :] *= signs[:, None]
+    rotations = np.matmul(np.swapaxes(vt, 1, 2), np.swapaxes(u, 1, 2))
+    translations = candidates_centroids - np.einsum('mij,j->mi', rotations, reference_centroid)
+
+    # deviation
+    mapped = np.einsum('mij,nj->mni', rotations, reference) + translations[:, None, :]
+    deviations = np.linalg.norm(mapped - candidates, axis=2).max(axis=1)
+
+    return rotations, translations, deviations
+
+
+def find_instances(parts, tolerance=INSTANCE_TOLERANCE):
+    """ return list (one entry per part) of (index of reference part, 4x4 matrix mapping reference
+    vertices onto part vertices), parts with identical topology and materials compared up to a rigid
+    transform. Reference parts map onto themselves with identity """
+
+    # init locals
+    instances = [(i_part, np.identity(4)) for i_part in range(len(parts))]
+
+    # group parts of identical topology and materials
+    groups = dict()
+    for i_part, part in enumerate(parts):
+        if len(part['vertices']) < 3: continue
+        signature = (len(part['vertices']), tuple(map(tuple, part['polygons'])), tuple(part['materials']))
+        groups.setdefault(signature, []).append(i_part)
+
+    # loop over groups
+    for group in groups.values():
+        if len(group) < 2: continue
+
+        # rigid invariant: sorted distances of vertices to centroid (differing by at most twice the
+        # tolerance between parts within tolerance of a rigid transform), parts sorted by largest one
+        vertices = np.stack([parts[i_part]['vertices'] for i_part in group])
+        distances = np.sort(np.linalg.norm(vertices - vertices.mean(axis=1, keepdims=True), axis=2), axis=1)
+        order = np.argsort(distances[:, -1], kind='stable')
+        largest = distances[order, -1]
+        unmatched = np.ones(len(group), dtype=bool)
+
+        # compare each unmatched part (in file order) to later unmatched parts of similar invariant
+        for i_reference in range(len(group)):
+            if not unmatched[i_reference]: continue
+            unmatched[i_reference] = False
+
+            # candidates: largest distance within window, then all distances
+            window = order[np.searchsorted(largest, distances[i_reference, -1] - 2 * tolerance, side='left'):np.searchsorted(largest, distances[i_reference, -1] + 2 * tolerance, side='right')]
+            window = window[unmatched[window]]
+            candidates = window[np.abs(distances[window] - distances[i_reference]).max(axis=1) <= 2 * tolerance]
+            if len(candidates) == 0: continue
+
+            # rigid transforms onto candidates
+            rotations, translations, deviations = get_rigid_transforms(vertices[i_reference], vertices[candidates])
+            for i_candidate in np.flatnonzero(deviations <= tolerance).tolist():
+                matrix = np.identity(4)
+                matrix[:3, :3], matrix[:3, 3] = rotations[i_candidate], translations[i_candidate]
+                instances[group[candidates[i_candidate]]] = (group[i_reference], matrix)
+                unmatched[candidates[i_candidate]] = False
+
+    return instances
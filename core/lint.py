@@ -0,0 +1,313 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Streaming checks of CATT .GEO files (no bpy dependency), e.g. in continuous integration:
+#   python -m io_export_catt.core.lint master.geo --json issues.json
+
+import argparse
+import array
+import json
+import os
+
+
+# catt limits
+MAX_NAME_LENGTH = 15
+MAX_LINE_LENGTH = 255
+
+# issue severities
+ERROR = 'error'
+WARNING = 'warning'
+
+
+class IdTable:
+    """ compact table of defined and used ids (flags in a bytearray, definition file index and line
+    in arrays), ids far beyond the number of defined ids (sparse numbering) kept in dicts. The dense
+    range grows with the number of defined ids: ids stored as sparse stay sparse """
+
+    DEFINED = 1
+    USED = 2
+
+    def __init__(self):
+
+        self.flags = bytearray()
+        self.lines = array.array('l')
+        self.files = array.array('H')
+        self.sparse_flags = dict()
+        self.sparse_lines = dict()
+        self.num_defined = 0
+
+    def is_dense(self, index):
+
+        return 0 <= index < max(1 << 20, 4 * self.num_defined) and index not in self.sparse_flags
+
+    def get_flags(self, index):
+
+        if not self.is_dense(index): return self.sparse_flags.get(index, 0)
+
+        return self.flags[index] if index < len(self.flags) else 0
+
+    def set_flag(self, index, flag, line_id=None, file_index=0):
+
+        # sparse ids
+        if not self.is_dense(index):
+            self.sparse_flags[index] = self.sparse_flags.get(index, 0) | flag
+            if line_id is not None: self.sparse_lines[index] = (file_index, line_id)
+            return
+
+        # grow dense table
+        if index >= len(self.flags):
+            num_new = max(index + 1, 2 * len(self.flags)) - len(self.flags)
+            self.flags.extend(bytes(num_new))
+            self.lines.extend(array.array('l', bytes(num_new * self.lines.itemsize)))
+            self.files.extend(array.array('H', bytes(num_new * self.files.itemsize)))
+
+        self.flags[index] |= flag
+        if line_id is not None: self.lines[index], self.files[index] = line_id, file_index
+
+    def define(self, index, line_id, file_index=0):
+        """ flag id as defined, return (file index, line) of previous definition (None if first definition) """
+
+        previous = self.get_location(index) if self.get_flags(index) & self.DEFINED else None
+        self.set_flag(index, self.DEFINED, line_id if previous is None else None, file_index)
+        self.num_defined += previous is None
+
+        return previous
+
+    def get_location(self, index):
+        """ return (file index, line) of id definition """
+
+        if not self.is_dense(index): return self.sparse_lines.get(index)
+
+        return (self.files[index], self.lines[index])
+
+    def iter_unused(self):
+        """ yield (id, file index, line) of defined but unused ids """
+
+        for index, flag in enumerate(self.flags):
+            if flag == self.DEFINED: yield (index, self.files[index], self.lines[index])
+        for index, flag in sorted(self.sparse_flags.items()):
+            if flag == self.DEFINED: yield (index, *self.sparse_lines[index])
+
+
+def make_issue(file_path, line_id, severity, code, message):
+
+    return {'file': file_path, 'line': line_id, 'severity': severity, 'code': code, 'message': message}
+
+
+def iter_geo_issues(file_path, max_line_length=MAX_LINE_LENGTH, max_name_length=MAX_NAME_LENGTH):
+    """ yield issues (dicts of file, line, severity, code, message) of .GEO file, INCLUDEd files
+    checked in place. Lines are streamed: memory grows with the number of corners (a few bytes per
+    corner), not with file size. Checks:
+        undefined_corner, undefined_material, duplicate_corner, duplicate_plane, duplicate_material,
+        name_too_long, line_too_long, malformed_line, degenerate_plane, missing_include, unused_corner
+    """
+
+    # init locals
+    state = {'corners': IdTable(), 'planes': IdTable(), 'materials': dict(), 'undefined_corners': [], 'undefined_materials': dict(), 'files': []}
+
+    # stream file (and includes)
+    yield from iter_file_issues(os.path.abspath(file_path), state, max_line_length, max_name_length)
+
+    # references to corners never defined (possibly defined after use)
+    corners = state['corners']
+    for plane_file, line_id, plane_id, corner_id in state['undefined_corners']:
+        if not corners.get_flags(corner_id) & corners.DEFINED:
+            yield make_issue(plane_file, line_id, ERROR, 'undefined_corner', 'plane {0} references undefined corner {1}'.format(plane_id, corner_id))
+
+    # references to materials never defined
+    for material_name, (plane_file, line_id, plane_id) in state['undefined_materials'].items():
+        if material_name not in state['materials']:
+            yield make_issue(plane_file, line_id, ERROR, 'undefined_material', 'plane {0} uses undefined material {1} (first use)'.format(plane_id, material_name))
+
+    # corners never used
+    for corner_id, file_index, line_id in corners.iter_unused():
+        yield make_issue(state['files'][file_index], line_id, WARNING, 'unused_corner', 'corner {0} is not used by any plane'.format(corner_id))
+
+
+def iter_file_issues(file_path, state, max_line_length, max_name_length):
+    """ yield issues of a single file (see iter_geo_issues), updating state shared with included files """
+
+    # discard include cycles
+    if file_path in state['files']: return
+    state['files'].append(file_path)
+    file_index = len(state['files']) - 1
+
+    # init locals
+    corners, planes, materials = state['corners'], state['planes'], state['materials']
+    plane_text, plane_line = None, None
+
+    # loop over lines
+    with open(file_path, 'r', errors='replace') as file:
+        for line_id, line in enumerate(file, 1):
+
+            # line length (newline excluded)
+            length = len(line.rstrip('\r\n'))
+            if length > max_line_length:
+                yield make_issue(file_path, line_id, ERROR, 'line_too_long', 'line is {0} characters long (max is {1})'.format(length, max_line_length))
+
+            # discard comments
+            text = line.split(';', 1)[0]
+
+            # plane broken across lines: gather until closing bracket
+            if plane_text is not None:
+                plane_text += ' ' + text
+                if ']' not in text: continue
+                yield make_issue(file_path, plane_line, WARNING, 'malformed_line', 'plane definition spans lines {0} to {1}'.format(plane_line, line_id))
+                yield from check_plane(plane_text, file_path, file_index, plane_line, state)
+                plane_text = None
+                continue
+
+            # discard empty lines
+            tokens = text.split()
+            if len(tokens) == 0: continue
+            keyword = tokens[0].upper()
+
+            # line: material definition
+            if keyword == 'ABS':
+
+                if len(tokens) < 3 or '=' not in text:
+                    yield make_issue(file_path, line_id, ERROR, 'malformed_line', 'malformed material definition')
+                    continue
+
+                name = text.split('=', 1)[0].split(None, 1)[1].strip()
+                if len(name) > max_name_length:
+                    yield make_issue(file_path, line_id, ERROR, 'name_too_long', 'material name {0} is {1} characters long (max is {2})'.format(name, len(name), max_name_length))
+                if name in materials:
+                    yield make_issue(file_path, line_id, ERROR, 'duplicate_material', 'material {0} already defined ({1})'.format(name, format_location(state, materials[name])))
+                else: materials[name] = (file_index, line_id)
+
+            # line: included file (checked in place)
+            elif keyword == 'INCLUDE':
+
+                include_path = os.path.join(os.path.dirname(file_path), text.split(None, 1)[1].strip()) if len(tokens) > 1 else ''
+                if not os.path.isfile(include_path):
+                    yield make_issue(file_path, line_id, ERROR, 'missing_include', 'included file not found: {0}'.format(include_path))
+                    continue
+                yield from iter_file_issues(os.path.abspath(include_path), state, max_line_length, max_name_length)
+
+            # line: corner definition
+            elif tokens[0].isdigit():
+
+                # check format
+                try:
+                    corner_id = int(tokens[0])
+                    [float(value) for value in tokens[1:4]]
+                    if len(tokens) < 4: raise ValueError
+                except ValueError:
+                    yield make_issue(file_path, line_id, ERROR, 'malformed_line', 'malformed corner definition')
+                    continue
+
+                # check duplicates
+                previous = corners.define(corner_id, line_id, file_index)
+                if previous is not None:
+                    yield make_issue(file_path, line_id, ERROR, 'duplicate_corner', 'corner {0} already defined ({1})'.format(corner_id, format_location(state, previous)))
+
+            # line: plane definition
+            elif tokens[0][0] == '[':
+
+                if ']' not in text:
+                    plane_text, plane_line = text, line_id
+                    continue
+                yield from check_plane(text, file_path, file_index, line_id, state)
+
+    # plane never closed
+    if plane_text is not None:
+        yield make_issue(file_path, plane_line, ERROR, 'malformed_line', 'plane definition not closed')
+
+
+def format_location(state, location):
+
+    return '{0} line {1}'.format(os.path.basename(state['files'][location[0]]), location[1])
+
+
+def check_plane(text, file_path, file_index, line_id, state):
+    """ yield issues of plane definition text ("[ id name / corner ids / material ]") """
+
+    # init locals
+    corners, planes = state['corners'], state['planes']
+    tokens = text.replace('[', ' ').replace(']', ' ').split()
+
+    # parse
+    try:
+        index_slash_1 = tokens.index('/')
+        index_slash_2 = tokens.index('/', index_slash_1 + 1)
+        plane_id = int(tokens[0])
+        corner_ids = [int(token) for token in tokens[index_slash_1 + 1:index_slash_2]]
+        material_name = tokens[index_slash_2 + 1].rstrip('*')
+    except (ValueError, IndexError):
+        yield make_issue(file_path, line_id, ERROR, 'malformed_line', 'malformed plane definition')
+        return
+
+    # check duplicates
+    previous = planes.define(plane_id, line_id, file_index)
+    if previous is not None:
+        yield make_issue(file_path, line_id, ERROR, 'duplicate_plane', 'plane {0} already defined ({1})'.format(plane_id, format_location(state, previous)))
+
+    # check corners
+    if len(set(corner_ids)) < 3:
+        yield make_issue(file_path, line_id, ERROR, 'degenerate_plane', 'plane {0} has less than 3 distinct corners'.format(plane_id))
+    for corner_id in corner_ids:
+        if not corners.get_flags(corner_id) & corners.DEFINED: state['undefined_corners'].append((file_path, line_id, plane_id, corner_id))
+        corners.set_flag(corner_id, corners.USED)
+
+    # check material (first use of undefined materials kept)
+    if material_name not in state['materials']:
+        state['undefined_materials'].setdefault(material_name, (file_path, line_id, plane_id))
+
+
+def lint_geo_file(file_path, max_line_length=MAX_LINE_LENGTH, max_name_length=MAX_NAME_LENGTH):
+    """ return list of issues of .GEO file (see iter_geo_issues) """
+
+    return list(iter_geo_issues(file_path, max_line_length, max_name_length))
+
+
+def format_issue(issue):
+
+    return '{0}:{1}: {2}: {3} [{4}]'.format(issue['file'], issue['line'], issue['severity'], issue['message'], issue['code'])
+
+
+def main(argv=None):
+    """ command line entry point, exits with status 1 if errors found (or warnings, with --strict) """
+
+    # get arguments
+    parser = argparse.ArgumentParser(description='Check CATT .GEO files (and the files they INCLUDE) for errors CATT would fail on')
+    parser.add_argument('files', nargs='+', help='.GEO files')
+    parser.add_argument('--max-line-length', type=int, default=MAX_LINE_LENGTH, help='longest line accepted')
+    parser.add_argument('--max-name-length', type=int, default=MAX_NAME_LENGTH, help='longest material name accepted')
+    parser.add_argument('--strict', action='store_true', help='fail on warnings too')
+    parser.add_argument('--json', help='write issues to this json file')
+    args = parser.parse_args(argv)
+
+    # loop over files, print issues as found
+    issues = []
+    for file_path in args.files:
+        for issue in iter_geo_issues(file_path, args.max_line_length, args.max_name_length):
+            print(format_issue(issue))
+            issues.append(issue)
+
+    # summary
+    num_errors = len([issue for issue in issues if issue['severity'] == ERROR])
+    print('{0} error(s), {1} warning(s)'.format(num_errors, len(issues) - num_errors))
+    if args.json is not None:
+        with open(args.json, 'w') as file: json.dump(issues, file, indent=2)
+
+    raise SystemExit(1 if num_errors > 0 or (args.strict and len(issues) > 0) else 0)
+
+
+if __name__ == '__main__':
+    main()
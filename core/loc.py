@@ -0,0 +1,90 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Writing CATT .LOC (sources, receivers) files (no bpy dependency)
+
+import numpy as np
+
+from .geo import get_close_pairs
+
+
+def remove_duplicates(points, dist_thresh):
+    """ return points farther than dist_thresh from every previous point kept, and their ids """
+
+    # init locals
+    pairs = get_close_pairs(points, dist_thresh)
+    keep = np.ones(len(points), dtype=bool)
+
+    # close pairs (i < j) grouped by j
+    pairs = pairs[np.argsort(pairs[:, 1], kind='stable')]
+    starts = np.searchsorted(pairs[:, 1], np.arange(len(points)), 'left')
+    ends = np.searchsorted(pairs[:, 1], np.arange(len(points)), 'right')
+
+    # discard points close to a point kept before them
+    for id in np.flatnonzero(ends > starts).tolist():
+        if keep[pairs[starts[id]:ends[id], 0]].any(): keep[id] = False
+
+    # construct filtered list
+    ids_filtered = np.flatnonzero(keep).tolist()
+    points_filtered = [ points[id] for id in ids_filtered ]
+
+    # output
+    return [points_filtered, ids_filtered]
+
+
+def get_catt_source_names():
+
+    # init
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    numbers = '0123456789'
+    names = []
+
+    # generate prefixes
+    for iLetter in range(0, len(letters)):
+        for iNumber in range(0, len(numbers)):
+            names.append(letters[iLetter] + numbers[iNumber])
+
+    return names
+
+
+def format_position(position, round_factor=2):
+    """ return catt string of position """
+
+    return ' '.join([str(round(float(x), round_factor)) for x in position[:3]])
+
+
+def format_receivers(positions, first_id=1, round_factor=2):
+    """ return catt receivers file content of positions, receiver ids starting from first_id """
+
+    lines = ["RECEIVERS \r\n"]
+    for obj_id, position in enumerate(positions, first_id):
+        lines.append(f'{obj_id:02}' + " " + format_position(position, round_factor) + " \r\n")
+
+    return ''.join(lines)
+
+
+def format_sources(names, positions, round_factor=2):
+    """ return catt sources file content of positions """
+
+    lines = []
+    for name, position in zip(names, positions):
+        lines.append("SOURCE " + name + "\r\n")
+        lines.append("  POS = " + format_position(position, round_factor) + " \r\n")
+        lines.append("END \r\n \r\n")
+
+    return ''.join(lines)
@@ -0,0 +1,306 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Absorption coefficient library (no bpy dependency)
+
+import csv
+import difflib
+import json
+import os
+import numpy as np
+
+
+class MaterialLibrary:
+    """ indexed in-memory table of material coefficients, searchable by name
+
+    Entries are stored column wise: names, absorption and diffraction coefficients
+    (N x bands arrays, padded with last band value, NaN if undefined), diffraction
+    estimates (NaN if undefined) and colours (N x 3, 0-255, -1 if undefined).
+    """
+
+    def __init__(self, entries):
+
+        # init locals
+        num_entries = len(entries)
+        num_bands = max([len(e.get('abs', [])) for e in entries] + [len(e.get('dif', [])) for e in entries] + [1])
+
+        # columns
+        self.names = [str(e['name']) for e in entries]
+        self.keys = [name.lower() for name in self.names]
+        self.absorption = np.full((num_entries, num_bands), np.nan)
+        self.diffraction = np.full((num_entries, num_bands), np.nan)
+        self.estimate = np.full(num_entries, np.nan)
+        self.color = np.full((num_entries, 3), -1, dtype=np.int64)
+
+        # fill columns
+        for i_entry, entry in enumerate(entries):
+
+            if len(entry.get('abs', [])) > 0: self.absorption[i_entry] = pad_bands(entry['abs'], num_bands)
+            if len(entry.get('dif', [])) > 0: self.diffraction[i_entry] = pad_bands(entry['dif'], num_bands)
+            if entry.get('estimate') is not None: self.estimate[i_entry] = float(entry['estimate'])
+            if entry.get('color') is not None: self.color[i_entry] = [int(c) for c in entry['color'][:3]]
+
+        # exact (case insensitive) name index, first entry wins on duplicates
+        self.index = dict()
+        for i_entry, key in enumerate(self.keys):
+            self.index.setdefault(key, i_entry)
+
+        # trigram index for fuzzy/substring search
+        trigrams = dict()
+        for i_entry, key in enumerate(self.keys):
+            for trigram in get_trigrams(key):
+                trigrams.setdefault(trigram, []).append(i_entry)
+        self.trigrams = {k: np.array(v, dtype=np.int64) for k, v in trigrams.items()}
+
+        # memoized search results (panel redraws repeat the same query)
+        self.search_cache = dict()
+
+    def __len__(self):
+
+        return len(self.names)
+
+    @classmethod
+    def from_dict(cls, mat_dict):
+        """ create library from dict with material names as keys """
+
+        return cls([dict(entry, name=name) for name, entry in mat_dict.items()])
+
+    @classmethod
+    def from_file(cls, filepath):
+        """ create library from .json or .csv file """
+
+        extension = os.path.splitext(filepath)[1].lower()
+        if extension == '.json': return cls(read_json(filepath))
+        if extension == '.csv': return cls(read_csv(filepath))
+
+        raise ValueError('unsupported material library file format: {0}'.format(extension))
+
+    def get(self, name):
+        """ return entry id of material name (case insensitive), None if not found """
+
+        return self.index.get(name.lower())
+
+    def search(self, query, limit=10):
+        """ return ids of entries best matching query: exact, prefix, substring then fuzzy matches """
+
+        # init locals
+        query = query.strip().lower()
+        if len(query) == 0: return []
+
+        # use cache
+        cache_key = (query, limit)
+        if cache_key in self.search_cache: return self.search_cache[cache_key]
+
+        # candidates: entries sharing most trigrams with query (all entries for short queries)
+        trigrams = [self.trigrams[t] for t in get_trigrams(query) if t in self.trigrams]
+        if len(query) < 3 or len(self.names) <= 256:
+            candidates = range(len(self.names))
+        elif len(trigrams) == 0:
+            candidates = []
+        else:
+            counts = np.bincount(np.concatenate(trigrams), minlength=len(self.names))
+            candidates = np.argsort(-counts, kind='stable')[:max(256, limit)]
+            candidates = candidates[counts[candidates] > 0]
+
+        # rank candidates
+        scored = []
+        for i_entry in candidates:
+
+            key = self.keys[i_entry]
+            if key == query: score = 3.0
+            elif key.startswith(query): score = 2.0 + len(query) / len(key)
+            elif query in key: score = 1.0 + len(query) / len(key)
+            elif len(query) < 3: continue
+            else: score = difflib.SequenceMatcher(None, query, key).ratio()
+            scored.append((-score, i_entry))
+
+        # shape output
+        scored.sort()
+        results = [int(i_entry) for score, i_entry in scored[:limit] if -score >= 0.5]
+
+        # update cache
+        if len(self.search_cache) > 256: self.search_cache.clear()
+        self.search_cache[cache_key] = results
+
+        return results
+
+    def match(self, name, fuzzy=True, cutoff=0.8):
+        """ return entry id best matching a (blender) material name, None if no match """
+
+        # exact match (also ignoring blender .001 suffixes)
+        for key in (name, name.rsplit('.', 1)[0]):
+            if key.lower() in self.index: return self.index[key.lower()]
+
+        # fuzzy match
+        if not fuzzy: return None
+        results = self.search(name, limit=1)
+        if len(results) == 0: return None
+        if difflib.SequenceMatcher(None, name.lower(), self.keys[results[0]]).ratio() < cutoff: return None
+
+        return results[0]
+
+    def get_coefs(self, i_entry, num_bands):
+        """ return entry absorption, diffraction (None if undefined) and estimate (None if undefined) """
+
+        absorption = self.absorption[i_entry]
+        diffraction = self.diffraction[i_entry]
+        estimate = self.estimate[i_entry]
+
+        absorption = None if np.isnan(absorption[0]) else pad_bands(absorption, num_bands).tolist()
+        diffraction = None if np.isnan(diffraction[0]) else pad_bands(diffraction, num_bands).tolist()
+        estimate = None if np.isnan(estimate) else float(estimate)
+
+        return [absorption, diffraction, estimate]
+
+
+def pad_bands(values, num_bands):
+    """ resize per band values to num_bands (pad with last value) """
+
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) >= num_bands: return values[:num_bands]
+
+    return np.concatenate((values, np.full(num_bands - len(values), values[-1])))
+
+
+def get_trigrams(key):
+    """ return set of (padded) trigrams of string """
+
+    key = ' {0} '.format(key)
+
+    return set([key[i:i+3] for i in range(len(key) - 2)])
+
+
+def read_json(filepath):
+    """ read entries from json file: list of entries (with "name") or dict with names as keys """
+
+    with open(filepath, 'r') as file:
+        data = json.load(file)
+
+    if isinstance(data, dict): data = [dict(entry, name=name) for name, entry in data.items()]
+    if not isinstance(data, list) or not all(isinstance(entry, dict) and 'name' in entry for entry in data):
+        raise ValueError('entries must be objects with a "name"')
+
+    return data
+
+
+def read_csv(filepath, extra_columns=()):
+    """ read entries from csv file with columns: name, abs_* (in band order), dif_*, estimate, r, g, b
+    (and extra_columns, stored as strings), ValueError raised if name or extra columns are missing """
+
+    # init locals
+    entries = []
+
+    with open(filepath, 'r', newline='') as file:
+
+        reader = csv.reader(file)
+        header = [h.strip().lower() for h in next(reader, [])]
+
+        # check required columns
+        missing = [c for c in ('name',) + tuple(extra_columns) if c not in header]
+        if len(missing) > 0: raise ValueError('missing column(s): {0}'.format(', '.join(missing)))
+
+        # columns ids
+        i_name = header.index('name')
+        i_abs = [i for i, h in enumerate(header) if h.startswith('abs')]
+        i_dif = [i for i, h in enumerate(header) if h.startswith('dif')]
+        i_estimate = header.index('estimate') if 'estimate' in header else None
+        i_color = [header.index(c) for c in ('r', 'g', 'b')] if all(c in header for c in ('r', 'g', 'b')) else None
+        i_extra = [(c, header.index(c)) for c in extra_columns]
+
+        # loop over rows
+        for row in reader:
+
+            # discard empty rows
+            if len(row) <= i_name or len(row[i_name].strip()) == 0: continue
+
+            entry = {'name': row[i_name].strip()}
+            entry['abs'] = [float(row[i]) for i in i_abs if i < len(row) and row[i].strip()]
+            entry['dif'] = [float(row[i]) for i in i_dif if i < len(row) and row[i].strip()]
+            if i_estimate is not None and i_estimate < len(row) and row[i_estimate].strip(): entry['estimate'] = float(row[i_estimate])
+            if i_color is not None and all(i < len(row) and row[i].strip() for i in i_color): entry['color'] = [int(float(row[i])) for i in i_color]
+
+            for c, i in i_extra: entry[c] = row[i].strip() if i < len(row) else ''
+
+            entries.append(entry)
+
+    return entries
+
+
+def read_sweep_table(filepath, num_bands):
+    """ read material variants from csv file with columns: variant, name (material), abs_*, dif_*, estimate
+
+    Returns list of (variant name, overrides) in file order, where overrides is a dict of material
+    name -> dict of overridden catt material properties. ValueError raised if a variant name is empty.
+    """
+
+    # init locals
+    variants = dict()
+
+    # loop over rows
+    for entry in read_csv(filepath, extra_columns=('variant',)):
+
+        if len(entry['variant']) == 0: raise ValueError('empty variant name for material {0}'.format(entry['name']))
+        overrides = variants.setdefault(entry['variant'], dict()).setdefault(entry['name'], dict())
+        overrides.update(get_entry_overrides(entry, num_bands))
+
+    return list(variants.items())
+
+
+def get_entry_overrides(entry, num_bands):
+    """ convert library entry to catt material properties """
+
+    # init locals
+    overrides = dict()
+
+    if len(entry.get('abs', [])) > 0:
+        overrides['abs'] = pad_bands(entry['abs'], num_bands).tolist()
+
+    if len(entry.get('dif', [])) > 0:
+        overrides['dif'] = pad_bands(entry['dif'], num_bands).tolist()
+        overrides['use_diffraction'] = 1
+        overrides['is_diff_estimate'] = 0
+
+    if entry.get('estimate') is not None:
+        overrides['diff_estimate'] = float(entry['estimate'])
+        overrides['use_diffraction'] = 1
+        overrides['is_diff_estimate'] = 1
+
+    return overrides
+
+
+# loaded libraries (or loading error messages), keyed by file path and modification time
+library_cache = dict()
+
+
+def get_library(filepath):
+    """ return [library, error message] of file (cached until file is modified): library None if file
+    doesn't exist or can't be read (error message then set for the latter) """
+
+    if not os.path.isfile(filepath): return [None, None]
+
+    key = (filepath, os.path.getmtime(filepath))
+    if key not in library_cache:
+        library_cache.clear()
+        try:
+            library_cache[key] = MaterialLibrary.from_file(filepath)
+        except (ValueError, KeyError, TypeError, json.JSONDecodeError, csv.Error, OSError) as exception:
+            library_cache[key] = 'Material library could not be read ({0})'.format(exception)
+
+    if isinstance(library_cache[key], str): return [None, library_cache[key]]
+
+    return [library_cache[key], None]
@@ -0,0 +1,460 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Expansion of CATT procedural .GEO syntax into explicit corners and planes (no bpy dependency):
+#   python -m io_export_catt.core.procedural room.geo --output-dir explicit
+#
+# Supported syntax (one statement per line, ';' starts a comment):
+#   INCLUDE file.geo            expand file in place (path relative to the including file)
+#   GLOBAL name = expression    variable visible in all files expanded afterwards
+#   LOCAL name = expression     variable visible in the current file (and the files it includes)
+#   TRANSLATE x y z             transform corners defined afterwards in the current file (and the
+#   ROTATE x y z                files it includes): translation, rotation (degrees, around x then y
+#   SCALE s | sx sy sz          then z axes), scale, composed in order of appearance; RESET restores
+#   RESET                       the transform the file started with
+# Corner ids and coordinates, and plane ids and corners may be expressions (arithmetic, ^ or **
+# powers, pi, and sin cos tan asin acos atan atan2 in degrees, sqrt exp log abs min max floor ceil
+# round int), without spaces unless enclosed in parentheses. Corner and plane ids are renumbered
+# sequentially: planes reference corners of their own file (or of the files including it).
+
+import argparse
+import ast
+import hashlib
+import math
+import os
+import re
+import numpy as np
+
+
+class ProceduralError(ValueError):
+    """ error in procedural syntax, with file and line """
+
+    def __init__(self, file_path, line_id, message):
+        super().__init__('{0}:{1}: {2}'.format(file_path, line_id, message))
+
+
+# functions and constants usable in expressions
+FUNCTIONS = {
+    'sin': lambda x: math.sin(math.radians(x)), 'cos': lambda x: math.cos(math.radians(x)), 'tan': lambda x: math.tan(math.radians(x)),
+    'asin': lambda x: math.degrees(math.asin(x)), 'acos': lambda x: math.degrees(math.acos(x)), 'atan': lambda x: math.degrees(math.atan(x)),
+    'atan2': lambda y, x: math.degrees(math.atan2(y, x)), 'sqrt': math.sqrt, 'exp': math.exp, 'log': math.log, 'abs': abs,
+    'min': min, 'max': max, 'floor': math.floor, 'ceil': math.ceil, 'round': round, 'int': int,
+}
+CONSTANTS = {'pi': math.pi}
+
+# ast nodes allowed in expressions
+ALLOWED_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Load, ast.Call,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.FloorDiv, ast.USub, ast.UAdd)
+
+# statements keywords
+TRANSFORM_KEYWORDS = ('TRANSLATE', 'ROTATE', 'SCALE', 'RESET')
+
+# lines starting with procedural statements (explicit files are parsed without expansion)
+PROCEDURAL_LINE = re.compile(rb'^\s*(INCLUDE|GLOBAL|LOCAL|TRANSLATE|ROTATE|SCALE|RESET)\b', re.IGNORECASE)
+
+# total number of statements of memoised programs and leaf evaluations kept by an expander
+# (oldest entries discarded first)
+MAX_CACHED_STATEMENTS = 500000
+
+IDENTITY = np.identity(4)
+
+
+def is_procedural_file(file_path):
+    """ return True if file contains procedural statements (INCLUDE, GLOBAL, LOCAL, transforms) """
+
+    with open(file_path, 'rb') as file:
+        return any(PROCEDURAL_LINE.match(line) for line in file)
+
+
+def format_number(value):
+    """ return coordinate string of computed value (micrometer precision, no trailing zeros) """
+
+    text = '{0:.6f}'.format(value).rstrip('0').rstrip('.')
+
+    return '0' if text == '-0' else text
+
+
+def compile_expression(text):
+    """ return [code, names of variables] of arithmetic expression (ValueError if not allowed),
+    or float for plain numbers (most lines of explicit files) """
+
+    # plain number
+    try: return float(text)
+    except ValueError: pass
+
+    # parse
+    try: tree = ast.parse(text.replace('^', '**'), mode='eval')
+    except SyntaxError: raise ValueError('invalid expression: {0}'.format(text))
+
+    # check nodes (no attributes, subscripts, etc.), calls of known functions only
+    names = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES): raise ValueError('unsupported syntax in expression: {0}'.format(text))
+        if isinstance(node, ast.Call) and not (isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS and len(node.keywords) == 0):
+            raise ValueError('unknown function in expression: {0}'.format(text))
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)): raise ValueError('invalid constant in expression: {0}'.format(text))
+        if isinstance(node, ast.Name) and node.id not in FUNCTIONS: names.add(node.id)
+
+    return [compile(tree, '<expression>', 'eval'), names - set(CONSTANTS)]
+
+
+def evaluate(expression, env):
+    """ evaluate compiled expression ([code, names] or float) with variables of env """
+
+    if isinstance(expression, float): return expression
+
+    code, names = expression
+    missing = [name for name in names if name not in env]
+    if len(missing) > 0: raise ValueError('undefined variable(s): {0}'.format(', '.join(sorted(missing))))
+
+    return eval(code, {'__builtins__': {}, **FUNCTIONS, **CONSTANTS}, env)
+
+
+def split_tokens(text):
+    """ split text on white spaces outside parentheses """
+
+    tokens = []
+    depth = 0
+    start = None
+    for i, char in enumerate(text):
+        if char.isspace() and depth == 0:
+            if start is not None: tokens.append(text[start:i])
+            start = None
+            continue
+        if start is None: start = i
+        depth += (char == '(') - (char == ')')
+    if start is not None: tokens.append(text[start:])
+
+    return tokens
+
+
+def compile_program(text, file_path):
+    """ return program (list of statements, and names of variables it reads) of .GEO file text
+
+    Statements are tuples (kind, line id, data): 'text' lines passed as is (materials, keywords),
+    'include', 'variable', 'transform', 'corner' and 'plane' with compiled expressions.
+    """
+
+    # init locals
+    statements = []
+    names = set()
+    section = None
+
+    def compile_tokens(tokens, line_id):
+        try: expressions = [compile_expression(token) for token in tokens]
+        except ValueError as exception: raise ProceduralError(file_path, line_id, exception)
+        for expression in expressions:
+            if not isinstance(expression, float): names.update(expression[1])
+        return expressions
+
+    # loop over lines
+    for line_id, line in enumerate(text.splitlines(), 1):
+
+        # discard comments and empty lines
+        content = line.split(';', 1)[0].strip()
+        if len(content) == 0: continue
+        tokens = split_tokens(content)
+        keyword = tokens[0].upper()
+
+        # include
+        if keyword == 'INCLUDE':
+            if len(tokens) < 2: raise ProceduralError(file_path, line_id, 'missing included file name')
+            statements.append(('include', line_id, content.split(None, 1)[1].strip().strip('"')))
+
+        # variable definition
+        elif keyword in ('GLOBAL', 'LOCAL'):
+            if '=' not in content: raise ProceduralError(file_path, line_id, 'expected {0} name = expression'.format(keyword))
+            name, expression = content.split(None, 1)[1].split('=', 1)
+            if not name.strip().isidentifier(): raise ProceduralError(file_path, line_id, 'invalid variable name: {0}'.format(name.strip()))
+            statements.append(('variable', line_id, (keyword, name.strip(), compile_tokens([expression.strip()], line_id)[0])))
+
+        # transform
+        elif keyword in TRANSFORM_KEYWORDS:
+            statements.append(('transform', line_id, (keyword, compile_tokens(tokens[1:], line_id))))
+
+        # section keywords, materials (passed as is)
+        elif keyword in ('CORNERS', 'PLANES') or keyword == 'ABS':
+            section = keyword if keyword != 'ABS' else section
+            statements.append(('text', line_id, content))
+
+        # plane definition
+        elif content[0] == '[':
+            if ']' not in content:
+                statements.append(('text', line_id, line)) # broken line, reported by parser
+                continue
+            plane_tokens = split_tokens(content.replace('[', ' ').replace(']', ' '))
+            try:
+                index_slash_1 = plane_tokens.index('/')
+                index_slash_2 = plane_tokens.index('/', index_slash_1 + 1)
+            except ValueError:
+                raise ProceduralError(file_path, line_id, 'malformed plane definition')
+            name = ' '.join(plane_tokens[1:index_slash_1])
+            statements.append(('plane', line_id, (compile_tokens(plane_tokens[:1], line_id)[0], name, compile_tokens(plane_tokens[index_slash_1 + 1:index_slash_2], line_id), ' '.join(plane_tokens[index_slash_2 + 1:]))))
+
+        # corner definition (in corners section, or starting with a digit)
+        elif section == 'CORNERS' or content[0].isdigit():
+            if len(tokens) < 4: raise ProceduralError(file_path, line_id, 'malformed corner definition')
+            expressions = compile_tokens(tokens[:4], line_id)
+            literal = ' '.join(tokens[1:4]) if all(isinstance(expression, float) for expression in expressions[1:]) else None
+            statements.append(('corner', line_id, (expressions, literal)))
+
+        # other lines passed as is
+        else:
+            statements.append(('text', line_id, content))
+
+    return {'statements': statements, 'names': names, 'is_leaf': not any(kind == 'include' or (kind == 'variable' and data[0] == 'GLOBAL') for kind, line_id, data in statements)}
+
+
+def get_transform(keyword, values):
+    """ return 4x4 matrix of transform statement """
+
+    matrix = np.identity(4)
+
+    if keyword == 'TRANSLATE':
+        matrix[:3, 3] = values[:3]
+
+    elif keyword == 'SCALE':
+        matrix[:3, :3] = np.diag(values[:3] if len(values) >= 3 else values[:1] * 3)
+
+    elif keyword == 'ROTATE':
+        for axis, angle in enumerate(values[:3]):
+            c, s = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+            i, j = [(1, 2), (2, 0), (0, 1)][axis]
+            rotation = np.identity(4)
+            rotation[i, i], rotation[i, j], rotation[j, i], rotation[j, j] = c, -s, s, c
+            matrix = rotation @ matrix
+
+    return matrix
+
+
+class Expander:
+    """ expand procedural .GEO files into explicit lines (see module comment)
+
+    Compiled programs of included files are memoised by file content hash: a file included many
+    times (or by many projects expanded with the same expander) is parsed once. Included files
+    without includes nor GLOBAL definitions also have their evaluated corners memoised per input
+    variables values, so that repeated blocks (e.g. seats) are only transformed and renumbered.
+    Memoised entries are bounded in total number of statements (MAX_CACHED_STATEMENTS), the
+    expanded (top level) file is never memoised.
+    """
+
+    def __init__(self):
+
+        self.cache = dict()
+        self.cache_size = 0
+        self.stats = {'files': 0, 'parsed': 0, 'evaluated': 0}
+
+    def memoise(self, key, value, size):
+        """ keep value in cache, discarding oldest entries beyond MAX_CACHED_STATEMENTS """
+
+        if size > MAX_CACHED_STATEMENTS: return
+        while self.cache_size + size > MAX_CACHED_STATEMENTS:
+            self.cache_size -= self.cache.pop(next(iter(self.cache)))[1]
+        self.cache[key] = (value, size)
+        self.cache_size += size
+
+    def get_program(self, file_path, is_memoised=True):
+        """ return compiled program of file (memoised by content hash) """
+
+        with open(file_path, 'rb') as file: content = file.read()
+        key = ('program', hashlib.sha1(content).hexdigest())
+        self.stats['files'] += 1
+
+        if key in self.cache: return self.cache[key][0]
+
+        program = compile_program(content.decode('utf-8', errors='replace'), file_path)
+        program['key'] = key
+        self.stats['parsed'] += 1
+        if is_memoised: self.memoise(key, program, len(program['statements']))
+
+        return program
+
+    def expand(self, file_path):
+        """ yield explicit lines (without newline) of file """
+
+        # init locals
+        state = {'globals': dict(), 'corner_id': 0, 'plane_id': 0, 'stack': []}
+
+        yield from self.expand_file(os.path.abspath(file_path), state, dict(), IDENTITY, [], True)
+
+    def expand_file(self, file_path, state, scope, matrix, corner_maps, is_top=False):
+        """ yield explicit lines of file, expanded with inherited local variables (scope), transform
+        and corner id maps of including files """
+
+        # discard include cycles
+        if file_path in state['stack']: raise ProceduralError(file_path, 0, 'recursive INCLUDE')
+        state['stack'].append(file_path)
+
+        # init locals
+        program = self.get_program(file_path, not is_top)
+        scope = dict(scope)
+        matrix_start = matrix
+        is_identity = np.array_equal(matrix, IDENTITY)
+        corner_map = dict()
+        corner_maps = corner_maps + [corner_map]
+
+        # memoised leaf file evaluation
+        env = {**state['globals'], **scope}
+        if program['is_leaf'] and not is_top:
+            cache_key = ('evaluated', program['key'], tuple(sorted((name, env[name]) for name in program['names'] if name in env)))
+            if cache_key in self.cache: evaluated = self.cache[cache_key][0]
+            else:
+                evaluated = self.evaluate_leaf(program, file_path, env)
+                self.memoise(cache_key, evaluated, len(evaluated))
+                self.stats['evaluated'] += 1
+            yield from self.instantiate_leaf(evaluated, state, matrix, corner_maps)
+            state['stack'].pop()
+            return
+
+        # loop over statements
+        for kind, line_id, data in program['statements']:
+            try:
+
+                if kind == 'text': yield data
+
+                elif kind == 'include':
+                    include_path = os.path.abspath(os.path.join(os.path.dirname(file_path), data))
+                    if not os.path.isfile(include_path): raise ValueError('included file not found: {0}'.format(include_path))
+                    yield from self.expand_file(include_path, state, scope, matrix, corner_maps)
+
+                elif kind == 'variable':
+                    keyword, name, expression = data
+                    value = evaluate(expression, {**state['globals'], **scope})
+                    if keyword == 'GLOBAL': state['globals'][name] = value
+                    else: scope[name] = value
+
+                elif kind == 'transform':
+                    keyword, expressions = data
+                    env = {**state['globals'], **scope}
+                    matrix = matrix_start if keyword == 'RESET' else matrix @ get_transform(keyword, [evaluate(expression, env) for expression in expressions])
+                    is_identity = np.array_equal(matrix, IDENTITY)
+
+                elif kind == 'corner':
+                    env = {**state['globals'], **scope}
+                    corner_id, x, y, z = [evaluate(expression, env) for expression in data[0]]
+                    yield self.format_corner(state, corner_map, corner_id, matrix @ np.array([x, y, z, 1.0]), data[1] if is_identity else None)
+
+                elif kind == 'plane':
+                    env = {**state['globals'], **scope}
+                    yield self.format_plane(state, corner_maps, data[1], [evaluate(expression, env) for expression in data[2]], data[3])
+
+            except (ValueError, ArithmeticError, TypeError) as exception:
+                if isinstance(exception, ProceduralError): raise
+                raise ProceduralError(file_path, line_id, exception)
+
+        state['stack'].pop()
+
+    def evaluate_leaf(self, program, file_path, env):
+        """ return statements of leaf file with evaluated values (corners positions, and literal
+        coordinates if untransformed within the file), transforms applied relative to file start """
+
+        # init locals
+        scope = dict(env)
+        matrix = np.identity(4)
+        evaluated = []
+
+        # loop over statements
+        for kind, line_id, data in program['statements']:
+            try:
+
+                if kind == 'text': evaluated.append((kind, data))
+
+                elif kind == 'variable':
+                    scope[data[1]] = evaluate(data[2], scope)
+
+                elif kind == 'transform':
+                    keyword, expressions = data
+                    matrix = np.identity(4) if keyword == 'RESET' else matrix @ get_transform(keyword, [evaluate(expression, scope) for expression in expressions])
+
+                elif kind == 'corner':
+                    corner_id, x, y, z = [evaluate(expression, scope) for expression in data[0]]
+                    evaluated.append((kind, (corner_id, matrix @ np.array([x, y, z, 1.0]), data[1] if np.array_equal(matrix, IDENTITY) else None)))
+
+                elif kind == 'plane':
+                    evaluated.append((kind, (data[1], [evaluate(expression, scope) for expression in data[2]], data[3])))
+
+            except (ValueError, ArithmeticError, TypeError) as exception:
+                raise ProceduralError(file_path, line_id, exception)
+
+        return evaluated
+
+    def instantiate_leaf(self, evaluated, state, matrix, corner_maps):
+        """ yield explicit lines of evaluated leaf file, with transform and ids of this instance """
+
+        is_identity = np.array_equal(matrix, IDENTITY)
+        for kind, data in evaluated:
+            if kind == 'text': yield data
+            elif kind == 'corner': yield self.format_corner(state, corner_maps[-1], data[0], matrix @ data[1], data[2] if is_identity else None)
+            else: yield self.format_plane(state, corner_maps, *data)
+
+    def format_corner(self, state, corner_map, corner_id, position, literal=None):
+        """ return explicit corner line (renumbered), with literal coordinates passed as written if
+        given (untransformed numbers) """
+
+        state['corner_id'] += 1
+        corner_map[int(corner_id)] = state['corner_id']
+
+        return '{0} {1}'.format(state['corner_id'], literal if literal is not None else ' '.join(map(format_number, position[:3].tolist())))
+
+    def format_plane(self, state, corner_maps, name, corner_ids, material):
+        """ return explicit plane line (renumbered, corners looked up in file then including files) """
+
+        # look up corners
+        ids = []
+        for corner_id in corner_ids:
+            global_id = next((corner_map[int(corner_id)] for corner_map in reversed(corner_maps) if int(corner_id) in corner_map), None)
+            if global_id is None: raise ValueError('undefined corner: {0}'.format(corner_id))
+            ids.append(global_id)
+
+        state['plane_id'] += 1
+
+        return '[ {0} {1} / {2} / {3} ]'.format(state['plane_id'], name, ' '.join(map(str, ids)), material)
+
+
+# expander shared by successive imports (included files parsed once per session)
+default_expander = Expander()
+
+
+def expand_geo_file(file_path, expander=None):
+    """ yield explicit lines of .GEO file (see module comment) """
+
+    yield from (expander or default_expander).expand(file_path)
+
+
+def main(argv=None):
+    """ command line entry point: write explicit version of .GEO files (included files shared
+    between them parsed once) """
+
+    # get arguments
+    parser = argparse.ArgumentParser(description='Expand CATT procedural .GEO syntax (INCLUDE, GLOBAL/LOCAL variables, expressions, transforms) into explicit corners and planes')
+    parser.add_argument('files', nargs='+', help='.GEO files')
+    parser.add_argument('--output-dir', default='.', help='folder where explicit files are written (same names, with _explicit suffix)')
+    args = parser.parse_args(argv)
+
+    # loop over files
+    expander = Expander()
+    for file_path in args.files:
+        name, extension = os.path.splitext(os.path.basename(file_path))
+        with open(os.path.join(args.output_dir, name + '_explicit' + extension), 'w') as file:
+            for line in expander.expand(file_path): file.write(line + '\n')
+
+    print('{files} file(s) expanded, {parsed} parsed, {evaluated} evaluated'.format(**expander.stats))
+
+
+if __name__ == '__main__':
+    main()
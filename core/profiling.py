@@ -0,0 +1,179 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Stage timing, memory tracking and rate limited logging (no bpy dependency)
+
+import contextlib
+import json
+import time
+import tracemalloc
+
+
+class Profiler:
+    """ nestable stage timers, with optional peak memory tracking (tracemalloc, slower)
+
+    Used as a context manager, the profiler becomes the active one: stage() calls made anywhere
+    while it runs (e.g. deep in export functions) are recorded as nested stages. Stage nodes hold
+    name, time (s), peak_memory (bytes, None if not tracked), optional info and sub stages.
+    """
+
+    def __init__(self, name, track_memory=False):
+
+        self.root = {'name': name, 'time': 0.0, 'peak_memory': None, 'info': dict(), 'stages': []}
+        self.track_memory = track_memory
+        self.stack = []
+        self.previous = None
+        self.started_tracing = False
+
+    def __enter__(self):
+
+        global active_profiler
+
+        # start memory tracking
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+
+        # become active profiler
+        self.previous = active_profiler
+        active_profiler = self
+        self.enter_node(self.root)
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        global active_profiler
+
+        self.exit_node(self.root)
+        if exc_type is not None: self.root['info']['error'] = repr(exc_value)
+
+        # restore previous profiler, stop memory tracking
+        active_profiler = self.previous
+        if self.started_tracing: tracemalloc.stop()
+
+        return False
+
+    def enter_node(self, node):
+
+        # save parent peak memory before resetting peak for this node
+        if self.track_memory:
+            if len(self.stack) > 0: self.stack[-1]['_peak'] = max(self.stack[-1].get('_peak', 0), tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+
+        self.stack.append(node)
+        node['_start'] = time.perf_counter()
+
+    def exit_node(self, node):
+
+        node['time'] = time.perf_counter() - node.pop('_start')
+        self.stack.pop()
+
+        # node peak memory, propagated to parent
+        if self.track_memory:
+            node['peak_memory'] = max(node.pop('_peak', 0), tracemalloc.get_traced_memory()[1])
+            if len(self.stack) > 0: self.stack[-1]['_peak'] = max(self.stack[-1].get('_peak', 0), node['peak_memory'])
+
+    @contextlib.contextmanager
+    def stage(self, name, **info):
+        """ time (and track memory of) enclosed code as a sub stage of the current stage """
+
+        node = {'name': name, 'time': 0.0, 'peak_memory': None, 'info': info, 'stages': []}
+        self.stack[-1]['stages'].append(node)
+        self.enter_node(node)
+        try:
+            yield node
+        finally:
+            self.exit_node(node)
+
+    def annotate(self, **info):
+        """ add info (e.g. exported file path) to the profile """
+
+        self.root['info'].update(info)
+
+    def get_stages(self):
+        """ return flat list of (path, time, peak memory) of all stages, depth first """
+
+        stages = []
+        nodes = [(self.root['name'], self.root)]
+        while len(nodes) > 0:
+            path, node = nodes.pop()
+            stages.append((path, node['time'], node['peak_memory']))
+            nodes.extend(reversed([('{0}/{1}'.format(path, child['name']), child) for child in node['stages']]))
+
+        return stages
+
+    def write(self, file_path):
+        """ write profile to json file """
+
+        with open(file_path, 'w') as file:
+            json.dump(self.root, file, indent=2, default=str)
+
+        return file_path
+
+
+# profiler stages are recorded in (None if not profiling)
+active_profiler = None
+
+
+def stage(name, **info):
+    """ return context manager recording a stage of the active profiler (no-op if none) """
+
+    if active_profiler is None: return contextlib.nullcontext()
+
+    return active_profiler.stage(name, **info)
+
+
+def annotate(**info):
+    """ add info to the active profiler (no-op if none) """
+
+    if active_profiler is not None: active_profiler.annotate(**info)
+
+
+class RateLimitedLog:
+    """ print messages at most once per interval (s) per key, reporting how many were suppressed """
+
+    def __init__(self, interval=1.0):
+
+        self.interval = interval
+        self.last_times = dict()
+        self.suppressed = dict()
+
+    def __call__(self, key, *args):
+
+        # suppress message if key logged recently
+        now = time.perf_counter()
+        if now - self.last_times.get(key, -self.interval) < self.interval:
+            self.suppressed[key] = self.suppressed.get(key, 0) + 1
+            return
+
+        # log
+        num_suppressed = self.suppressed.pop(key, 0)
+        if num_suppressed > 0: print(*args, '({0} similar messages suppressed)'.format(num_suppressed))
+        else: print(*args)
+        self.last_times[key] = now
+
+    def flush(self):
+        """ report suppressed message counts """
+
+        for key, num_suppressed in self.suppressed.items(): print('{0}: {1} messages suppressed'.format(key, num_suppressed))
+        self.suppressed.clear()
+
+
+# add-on wide rate limited log
+log = RateLimitedLog()
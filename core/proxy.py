@@ -0,0 +1,169 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Columnar storage of parsed .GEO files (no bpy dependency): object parts (see core.hierarchy)
+# flattened into numpy arrays, saved to a sidecar .npz file next to the .GEO file and reused while
+# the .GEO file is unchanged, so that proxy imports parse each file once
+
+import json
+import os
+import tempfile
+import zipfile
+import numpy as np
+
+from .geo import parse_geo_file
+from .hierarchy import get_object_parts, find_instances
+
+
+# version of the columns layout (increment upon layout change, older sidecar files are discarded)
+COLUMNS_VERSION = 1
+
+# extension added to .GEO file names
+SIDECAR_EXTENSION = '.catt.npz'
+
+
+def parts_to_columns(parts, instances, materials):
+    """ return dict of numpy arrays of object parts (see core.hierarchy.get_object_parts), linked
+    duplicates (see core.hierarchy.find_instances, None entries for no duplicates) and parsed materials
+
+    Per part arrays are indexed by part, per vertex and per polygon arrays are concatenated in parts
+    order (offsets arrays of parts + 1 entries), polygon vertices (loop_vertices) are local to parts.
+    """
+
+    # material names
+    material_names = list(dict.fromkeys(material for part in parts for material in part['materials']))
+    material_index = {name: i_material for i_material, name in enumerate(material_names)}
+
+    # per polygon and per loop arrays
+    polygons = [polygon for part in parts for polygon in part['polygons']]
+    loop_totals = np.array([len(polygon) for polygon in polygons], dtype=np.int32)
+
+    # linked duplicates
+    references = np.array([reference for reference, matrix in instances], dtype=np.int32)
+    matrices = np.array([np.identity(4) if matrix is None else matrix for reference, matrix in instances], dtype=np.float64).reshape(-1, 4, 4)
+
+    return {
+        'names': np.array([part['name'] for part in parts], dtype=np.str_),
+        'collections': np.array([part['collection'] for part in parts], dtype=np.str_),
+        'vertex_offsets': np.cumsum([0] + [len(part['vertices']) for part in parts], dtype=np.int64),
+        'polygon_offsets': np.cumsum([0] + [len(part['polygons']) for part in parts], dtype=np.int64),
+        'vertices': np.concatenate([part['vertices'] for part in parts]) if len(parts) > 0 else np.zeros((0, 3)),
+        'loop_totals': loop_totals,
+        'loop_vertices': np.fromiter((vertex for polygon in polygons for vertex in polygon), dtype=np.int32, count=int(loop_totals.sum())),
+        'plane_ids': np.array([plane_id for part in parts for plane_id in part['plane_ids']], dtype=np.int64),
+        'material_indices': np.array([material_index[material] for part in parts for material in part['materials']], dtype=np.int32),
+        'material_names': np.array(material_names, dtype=np.str_),
+        'materials': np.array(json.dumps(materials)),
+        'references': references,
+        'matrices': matrices,
+    }
+
+
+def get_bounding_boxes(columns):
+    """ return min and max corners (num parts, 3) of parts """
+
+    vertices, offsets = columns['vertices'], columns['vertex_offsets']
+    if len(offsets) < 2: return np.zeros((0, 3)), np.zeros((0, 3))
+
+    return np.minimum.reduceat(vertices, offsets[:-1], axis=0), np.maximum.reduceat(vertices, offsets[:-1], axis=0)
+
+
+def get_part(columns, i_part):
+    """ return object part (see core.hierarchy.get_object_parts) of columns (as loaded or read) """
+
+    # ranges of part
+    vertex_start, vertex_end = columns['vertex_offsets'][i_part:i_part + 2].tolist()
+    polygon_start, polygon_end = columns['polygon_offsets'][i_part:i_part + 2].tolist()
+    loop_vertices = columns['loop_vertices'][columns['loop_offsets'][polygon_start]:columns['loop_offsets'][polygon_end]]
+
+    return {
+        'collection': str(columns['collections'][i_part]),
+        'name': str(columns['names'][i_part]),
+        'plane_ids': columns['plane_ids'][polygon_start:polygon_end].tolist(),
+        'vertices': columns['vertices'][vertex_start:vertex_end],
+        'polygons': [polygon.tolist() for polygon in np.split(loop_vertices, np.cumsum(columns['loop_totals'][polygon_start:polygon_end])[:-1])],
+        'materials': columns['material_names'][columns['material_indices'][polygon_start:polygon_end]].tolist(),
+    }
+
+
+def get_sidecar_path(file_path):
+    """ return path of sidecar file of .GEO file (next to it, or in temp folder if not writable) """
+
+    if os.access(os.path.dirname(os.path.abspath(file_path)), os.W_OK): return file_path + SIDECAR_EXTENSION
+
+    return os.path.join(tempfile.gettempdir(), os.path.basename(file_path) + SIDECAR_EXTENSION)
+
+
+def get_stamp(file_path, options):
+    """ return string identifying .GEO file version (size, modification time) and parse options """
+
+    stat = os.stat(file_path)
+
+    return json.dumps({'version': COLUMNS_VERSION, 'file': os.path.abspath(file_path), 'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'options': options}, sort_keys=True)
+
+
+def save_columns(sidecar_path, columns, stamp):
+    """ write columns to sidecar .npz file (written to a temporary file first, then renamed) """
+
+    temp_path = sidecar_path + '.tmp.npz'
+    np.savez(temp_path, stamp=np.array(stamp), **columns)
+    os.replace(temp_path, sidecar_path)
+
+
+def load_columns(sidecar_path, stamp=None):
+    """ return columns of sidecar .npz file (with its 'stamp'), None if missing, unreadable or stale
+    (different stamp, not checked if None) """
+
+    try:
+        with np.load(sidecar_path) as data:
+            if stamp is not None and str(data['stamp']) != stamp: return None
+            columns = {key: data[key] for key in data.files}
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
+
+    # stamp as string, loop offsets (per polygon) computed once
+    columns['stamp'] = str(columns['stamp'])
+    columns['loop_offsets'] = np.concatenate(([0], np.cumsum(columns['loop_totals'], dtype=np.int64)))
+
+    return columns
+
+
+def read_geo_columns(file_path, is_debug, num_bands=8, expand=False, rebuild_hierarchy=True, use_instances=True):
+    """ return [columns, sidecar path, error_detected, is_cached] of .GEO file: columns (with their
+    'stamp') loaded from sidecar file if up to date, otherwise parsed (see core.geo.parse_geo_file)
+    and saved to it """
+
+    # up to date sidecar
+    sidecar_path = get_sidecar_path(file_path)
+    stamp = get_stamp(file_path, [num_bands, expand, rebuild_hierarchy, use_instances])
+    columns = load_columns(sidecar_path, stamp)
+    if columns is not None: return [columns, sidecar_path, False, True]
+
+    # parse, group planes into objects
+    vertices, faces, materials, error_detected = parse_geo_file(file_path, is_debug, num_bands, expand)
+    parts = get_object_parts(vertices, faces, rebuild_hierarchy)
+    instances = find_instances(parts) if use_instances else [(i_part, None) for i_part in range(len(parts))]
+
+    # save (saving failures only cost a parse upon next import)
+    columns = parts_to_columns(parts, instances, materials)
+    try: save_columns(sidecar_path, columns, stamp)
+    except OSError: pass
+    columns['stamp'] = stamp
+    columns['loop_offsets'] = np.concatenate(([0], np.cumsum(columns['loop_totals'], dtype=np.int64)))
+
+    return [columns, sidecar_path, error_detected, False]
@@ -0,0 +1,227 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Live export: re-export room, sources and receivers files shortly after the objects or
+# materials they depend on are edited (depsgraph handler, debounced by a timer). Room exports
+# only extract and format the objects edited since the previous export (see utils.section_cache)
+
+import time
+import bpy
+from bpy.app.handlers import persistent
+from . import cli
+from . import utils
+
+
+# pending exports (names of cli.EXPORT_NAMES), time of last relevant edit, last export status,
+# scene frame of last update, whether exports are running (their own updates are discarded),
+# cached room sections (see utils.section_cache) and room instancers (see get_room_instancers,
+# with the room collection name, rebuilt upon collection or instancer edits)
+state = {'pending': set(), 'last_change': 0.0, 'status': '', 'frame': None, 'exporting': False, 'sections': dict(), 'instancers': None}
+
+
+def get_room_instancers(room_collections):
+    """ return dict of collections and meshes instanced in the room (through collection instances
+    of room collections, recursively) to names of the room collection instances exporting them """
+
+    # init locals
+    instancers = dict()
+
+    # loop over room collection instances
+    for collection in room_collections:
+        for obj in collection.objects:
+            if obj.instance_type != 'COLLECTION' or obj.instance_collection is None: continue
+
+            # walk instanced collections (children and nested instances)
+            visited = set()
+            collections = [obj.instance_collection]
+            while len(collections) > 0:
+
+                instanced = collections.pop()
+                if instanced in visited: continue
+                visited.add(instanced)
+
+                instancers.setdefault(instanced, set()).add(obj.name)
+                for child in instanced.objects:
+                    if child.type == 'MESH': instancers.setdefault(child.data, set()).add(obj.name)
+                    if child.instance_type == 'COLLECTION' and child.instance_collection is not None: collections.append(child.instance_collection)
+                collections.extend(instanced.children)
+
+    return instancers
+
+
+def get_changed_exports(scene, depsgraph):
+    """ return [set of exports (room, sources, receivers) affected by depsgraph updates, set of names
+    of edited room objects (None if the whole room is affected, e.g. material or collection edits)] """
+
+    # init locals
+    catt_io = scene.catt_io
+    exports = set()
+    room_objects = set()
+
+    # collections watched by each export
+    room = bpy.data.collections.get(catt_io.room_collection)
+    room_collections = set() if room is None else {room, *room.children_recursive}
+
+    # collections and meshes instanced in the room (rebuilt upon collection or instancer edits)
+    if state['instancers'] is None or state['instancers'][0] != catt_io.room_collection or any(isinstance(update.id.original, bpy.types.Collection) or getattr(update.id.original, 'instance_type', 'NONE') == 'COLLECTION' for update in depsgraph.updates):
+        state['instancers'] = (catt_io.room_collection, get_room_instancers(room_collections))
+    room_instancers = state['instancers'][1]
+    watched = [
+        ('room', room_collections, None),
+        ('sources', {bpy.data.collections.get(catt_io.source_collection)} if catt_io.source_export_type == 'COLLECTION' else set(), catt_io.source_object if catt_io.source_export_type == 'ANIMATED' else None),
+        ('receivers', {bpy.data.collections.get(catt_io.receiver_collection)} if catt_io.receiver_export_type == 'COLLECTION' else set(), catt_io.receiver_object if catt_io.receiver_export_type == 'ANIMATED' else None),
+    ]
+
+    # loop over updated data blocks
+    for update in depsgraph.updates:
+
+        data_block = update.id.original
+
+        # catt material edited
+        if isinstance(data_block, bpy.types.Material):
+            if 'abs' in data_block:
+                exports.add('room')
+                room_objects = None
+
+        # objects linked or unlinked
+        elif isinstance(data_block, bpy.types.Collection):
+            exports.update(name for name, collections, object_name in watched if data_block in collections)
+            if data_block in room_collections: room_objects = None
+            elif data_block in room_instancers:
+                exports.add('room')
+                if room_objects is not None: room_objects.update(room_instancers[data_block])
+
+        # mesh of objects instanced in the room edited
+        elif isinstance(data_block, bpy.types.Mesh):
+            if data_block in room_instancers:
+                exports.add('room')
+                if room_objects is not None: room_objects.update(room_instancers[data_block])
+
+        # object moved or reshaped (selection changes and the like are discarded), room only
+        # affected by exported objects (not e.g. source or receiver empties of the room collection)
+        elif isinstance(data_block, bpy.types.Object) and (update.is_updated_geometry or update.is_updated_transform):
+            users_collection = set(data_block.users_collection)
+            exports.update(name for name, collections, object_name in watched if (not users_collection.isdisjoint(collections) or data_block.name == object_name) and (name != 'room' or utils.is_room_object(data_block)))
+            if room_objects is not None and 'room' in exports: room_objects.add(data_block.name)
+
+            # object instanced in the room (through collection instances)
+            instancers = set().union(*[room_instancers[collection] for collection in users_collection if collection in room_instancers])
+            if len(instancers) > 0:
+                exports.add('room')
+                if room_objects is not None: room_objects.update(instancers)
+
+    return [exports, room_objects]
+
+
+@persistent
+def depsgraph_update_post_handler(scene, depsgraph):
+    """ flag exports affected by edits, (re)start debounce timer """
+
+    # discard if live export disabled (cached sections no longer tracked), or updates caused by
+    # exports (e.g. animation sampling)
+    if not scene.catt_io.live_export: state['sections'].clear()
+    if not scene.catt_io.live_export or state['exporting']: return
+
+    # discard updates caused by frame changes (animation playback, scrubbing)
+    frame_changed = state['frame'] is not None and state['frame'] != scene.frame_current
+    state['frame'] = scene.frame_current
+    if frame_changed: return
+
+    # discard updates not affecting exported files
+    exports, room_objects = get_changed_exports(scene, depsgraph)
+    if len(exports) == 0: return
+
+    # discard cached sections of edited room objects
+    if room_objects is None: state['sections'].clear()
+    else:
+        for name in room_objects: state['sections'].get('objects', dict()).pop(name, None)
+
+    # save to locals, export once edits settle
+    state['pending'].update(exports)
+    state['last_change'] = time.perf_counter()
+    if not bpy.app.timers.is_registered(export_pending):
+        bpy.app.timers.register(export_pending, first_interval=scene.catt_io.live_export_delay)
+
+
+def export_pending():
+    """ timer callback: run pending exports once no edit happened for live_export_delay seconds """
+
+    # init locals
+    scene = bpy.context.scene
+    catt_io = scene.catt_io
+    if not catt_io.live_export or len(state['pending']) == 0:
+        state['pending'].clear()
+        return None
+
+    # wait for edits burst to end (timer called again in remaining delay)
+    remaining = catt_io.live_export_delay - (time.perf_counter() - state['last_change'])
+    if remaining > 0: return remaining
+
+    # not while editing meshes (edit mode data only synced on mode change)
+    if bpy.context.mode == 'EDIT_MESH': return catt_io.live_export_delay
+
+    # run exports (unchanged files are not rewritten)
+    exports = [name for name in cli.EXPORT_NAMES if name in state['pending']]
+    state['pending'].clear()
+    state['exporting'] = True
+    utils.section_cache = state['sections']
+    try:
+        report = cli.run_job(bpy.context, dict(), exports)
+    finally:
+        state['exporting'] = False
+        utils.section_cache = None
+        state['frame'] = scene.frame_current
+
+    # save status
+    errors = ['{0}: {1}'.format(export['name'], export['error']) for export in report['exports'] if export['error'] is not None]
+    state['status'] = '{0} at {1}'.format(', '.join(exports), time.strftime('%H:%M:%S')) if len(errors) == 0 else '; '.join(errors)
+    if catt_io.debug or len(errors) > 0: print('live export:', state['status'])
+
+    # redraw panels showing status
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D': area.tag_redraw()
+
+    return None
+
+
+@persistent
+def clear_sections_handler(*args):
+    """ discard cached room sections and instancers (data reloaded by undo, redo or file load) """
+
+    state['sections'].clear()
+    state['instancers'] = None
+
+
+def register():
+
+    bpy.app.handlers.depsgraph_update_post.append(depsgraph_update_post_handler)
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post, bpy.app.handlers.load_post):
+        handlers.append(clear_sections_handler)
+
+
+def unregister():
+
+    if depsgraph_update_post_handler in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(depsgraph_update_post_handler)
+
+    for handlers in (bpy.app.handlers.undo_post, bpy.app.handlers.redo_post, bpy.app.handlers.load_post):
+        if clear_sections_handler in handlers: handlers.remove(clear_sections_handler)
+
+    if bpy.app.timers.is_registered(export_pending):
+        bpy.app.timers.unregister(export_pending)
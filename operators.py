@@ -19,18 +19,77 @@
 # All Operator
 
 import os
+import shutil
+import tempfile
+import io
+import functools
+import concurrent.futures
+import pickle
+import json
+import csv
 import bpy
 import mathutils
 import math
 import bmesh
+import numpy as np
 from bpy.types import Operator
 from . import utils
+from . import core
+from .core import profiling
+from .core import material_library
+
+# scene key of the last run summary displayed in the main panel
+LAST_RUN_KEY = 'catt_last_run'
+
+
+def profiled(execute):
+    """ decorate operator execute method: time its stages (see core.profiling), store last run summary
+    in scene and, if profiling is enabled, write json profile next to the exported file """
+
+    @functools.wraps(execute)
+    def execute_profiled(self, context):
+
+        # init locals
+        catt_io = context.scene.catt_io
+
+        # run operator
+        with profiling.Profiler(self.bl_idname, track_memory=catt_io.profile) as profiler:
+            result = execute(self, context)
+        profiler.annotate(result=sorted(result))
+
+        # write profile
+        file_path = profiler.root['info'].get('file')
+        if catt_io.profile and file_path is not None:
+            profile_path = profiler.write(os.path.splitext(file_path)[0] + '.profile.json')
+            if catt_io.debug: print('profile saved to:', profile_path)
+
+        # save summary (stages up to two levels deep)
+        stages = [(path.split('/', 1)[1], duration) for path, duration, peak_memory in profiler.get_stages()[1:] if path.count('/') <= 2]
+        context.scene[LAST_RUN_KEY] = {
+            'operator': self.bl_label,
+            'result': ', '.join(sorted(result)),
+            'time': profiler.root['time'],
+            'peak_memory': -1 if profiler.root['peak_memory'] is None else profiler.root['peak_memory'],
+            'stage_names': [path for path, duration in stages],
+            'stage_times': [duration for path, duration in stages],
+        }
+
+        return result
+
+    return execute_profiled
+
 
 def get_material_template(context):
+    """ return catt material template for current frequency bands (built once per band configuration) """
+
+    return build_material_template(tuple(context.scene.catt_io.frequency_bands))
+
+
+@functools.lru_cache(maxsize=8)
+def build_material_template(frequency_bands):
 
     # init locals
     mat = {}
-    catt_io = context.scene.catt_io
 
     # is material converted to catt material (has all the required properties)
     mat["is_catt_material"] = {
@@ -59,24 +118,151 @@ def get_material_template(context):
         "default":0.1, "soft_min":0.0, "min": 0.0
     }
 
-    # loop over frequency bands
-    for i_freq, freq in enumerate(catt_io.frequency_bands):
+    # absorption and diffraction coefficients, one array item per frequency band
+    num_bands = len(frequency_bands)
+    bands_str = ' '.join([utils.freq_to_str(freq) for freq in frequency_bands])
 
-        # prepare rna ui (for soft lock, description, etc.)
-        mat['abs_{0}'.format(i_freq)] = {
-            "description": 'Absorption coef at {0}'.format(utils.freq_to_str(freq)),
-            "default":40.0, "soft_min":0.0, "soft_max":100.0,
-            "min": 0.0, "max": 100.0
-        }
-        mat['dif_{0}'.format(i_freq)] = {
-            "description": 'Diffraction coef at {0}'.format(utils.freq_to_str(freq)),
-            "default":50.0, "soft_min":0.0, "soft_max":100.0,
-            "min": 0.0, "max": 100.0
-        }
+    # prepare rna ui (for soft lock, description, etc.)
+    mat['abs'] = {
+        "description": 'Absorption coefs at {0}'.format(bands_str),
+        "default":[40.0]*num_bands, "soft_min":0.0, "soft_max":100.0,
+        "min": 0.0, "max": 100.0
+    }
+    mat['dif'] = {
+        "description": 'Diffraction coefs at {0}'.format(bands_str),
+        "default":[50.0]*num_bands, "soft_min":0.0, "soft_max":100.0,
+        "min": 0.0, "max": 100.0
+    }
 
     return mat
 
 
+def update_catt_material(mat, mat_template):
+    """ add missing properties to material, convert deprecated per band properties to arrays """
+
+    # init locals
+    rna_dict = {}
+
+    # loop over required fields
+    for key, value in mat_template.items():
+
+        # array properties
+        if isinstance(value["default"], list):
+
+            num_bands = len(value["default"])
+
+            # retro compatibility: gather deprecated per band properties ("abs_0", "abs_1", ..)
+            legacy_keys = ['{0}_{1}'.format(key, i_freq) for i_freq in range(num_bands)]
+            if key not in mat and legacy_keys[0] in mat:
+                mat[key] = [mat.get(k, mat[legacy_keys[0]]) for k in legacy_keys]
+                for k in legacy_keys:
+                    if k in mat: del mat[k]
+
+            # resize to match number of frequency bands (pad with last value)
+            if key in mat and len(mat[key]) != num_bands:
+                values = list(mat[key])
+                mat[key] = (values + values[-1:]*num_bands)[:num_bands]
+
+        # add if missing
+        if key not in mat:
+            mat[key] = value["default"]
+
+        rna_dict[key] = value
+
+    # apply rna
+    mat["_RNA_UI"] = rna_dict
+
+    # stamp schema version
+    mat[utils.CATT_MATERIAL_VERSION_KEY] = utils.CATT_MATERIAL_VERSION
+
+
+def update_deprecated_catt_materials(catt_io):
+    """Update properties of all outdated catt materials to latest version (e.g. upon file load)"""
+
+    # init locals
+    mat_template = None
+    num_bands = len(catt_io.frequency_bands)
+    num_updated = 0
+
+    # loop over materials in file
+    for mat in bpy.data.materials:
+
+        # discard if not a catt material
+        if "is_catt_material" not in mat: continue
+
+        # ignore materials without rna (e.g. default dot stroke)
+        if not "_RNA_UI" in mat: continue
+
+        # discard if up to date
+        if not utils.is_catt_material_outdated(mat, num_bands): continue
+
+        # add missing fields, convert deprecated ones
+        if mat_template is None: mat_template = build_material_template(tuple(catt_io.frequency_bands))
+        update_catt_material(mat, mat_template)
+        num_updated += 1
+
+    # log
+    if num_updated > 0: print('catt: updated {0} material(s) to latest version'.format(num_updated))
+
+    return num_updated
+
+
+def convert_to_catt_material(mat, mat_template):
+    """ add catt properties to material, use its bsdf colour as diffuse colour """
+
+    # add catt properties to material
+    update_catt_material(mat, mat_template)
+
+    # copy colour to non-node diffuse if was using bsdf node
+    mat.diffuse_color = utils.get_mat_color(mat)
+
+    # disable use nodes (easier to access diffuse colour that way)
+    mat.use_nodes = False
+
+
+def assign_library_to_materials(context, library, materials, fuzzy=True, entry_name=None):
+    """ assign library coefficients to materials (matched by name unless entry_name is set), return number of assigned materials """
+
+    # init locals
+    catt_io = context.scene.catt_io
+    num_bands = len(catt_io.frequency_bands)
+    mat_template = get_material_template(context)
+    num_assigned = 0
+
+    # loop over materials
+    for mat in materials:
+
+        # get library entry
+        i_entry = library.get(entry_name) if entry_name else library.match(mat.name, fuzzy)
+        if i_entry is None: continue
+
+        # convert to catt material if need be
+        if "is_catt_material" not in mat or utils.is_catt_material_outdated(mat, num_bands):
+            convert_to_catt_material(mat, mat_template)
+
+        # assign coefficients
+        [absorption, diffraction, estimate] = library.get_coefs(i_entry, num_bands)
+        if absorption is not None: mat['abs'] = absorption
+        if diffraction is not None:
+            mat['dif'] = diffraction
+            mat['use_diffraction'] = 1
+            mat['is_diff_estimate'] = 0
+        if estimate is not None:
+            mat['diff_estimate'] = estimate
+            mat['use_diffraction'] = 1
+            mat['is_diff_estimate'] = 1
+
+        # assign colour
+        color = library.color[i_entry]
+        if color[0] >= 0: mat.diffuse_color = [c / 255.0 for c in color] + [1.0]
+
+        # update locals
+        num_assigned += 1
+        if catt_io.debug: print('assigned library entry {0} to material {1}'.format(library.names[i_entry], mat.name))
+
+    return num_assigned
+
+
 class MESH_OT_catt_material_convert(Operator):
     """ operator used to convert material to catt material """
 
@@ -85,6 +271,7 @@ class MESH_OT_catt_material_convert(Operator):
     bl_label = "Convert to Catt Material"
 
 
+    @profiled
     def execute(self, context):
         """ method called from ui """
 
@@ -94,27 +281,58 @@ class MESH_OT_catt_material_convert(Operator):
         # get active material
         mat = context.object.active_material
 
-        # get material template
+        # add catt properties to material
         mat_template = get_material_template(context)
-        rna_dict = {}
+        convert_to_catt_material(mat, mat_template)
+
+        return {'FINISHED'}
+
 
-        for key, value in mat_template.items():
+class MESH_OT_catt_library_assign(Operator):
+    """Assign coefficients from the material library"""
 
-            # retro compatibility
-            if key not in mat:
-                mat[key] = value["default"]
+    # init locals
+    bl_idname = "catt.library_assign"
+    bl_label = "Catt Assign Library Material"
+
+    # library entry assigned to active material (all materials matched by name if empty)
+    entry: bpy.props.StringProperty(name='entry', default='')
 
-            rna_dict[key] = value
+    @profiled
+    def execute(self, context):
+        """ method called from ui """
 
-        # apply rna
-        mat["_RNA_UI"] = rna_dict
+        # init locals
+        catt_io = context.scene.catt_io
+
+        # load library
+        [library, error_msg] = material_library.get_library(bpy.path.abspath(catt_io.material_library_path))
+        if library is None:
+            self.report({'ERROR'}, error_msg or 'Material library file not found')
+            return {'CANCELLED'}
+
+        # assign entry to active material
+        if len(self.entry) > 0:
+
+            if context.object is None or context.object.active_material is None:
+                self.report({'ERROR'}, 'No active material')
+                return {'CANCELLED'}
 
-        # copy colour to non-node diffuse if was using bsdf node
-        mat.diffuse_color = utils.get_mat_color(mat)
+            materials = [context.object.active_material]
+            num_assigned = assign_library_to_materials(context, library, materials, entry_name=self.entry)
 
-        # disable use nodes (easier to access diffuse colour that way)
-        mat.use_nodes = False
+        # assign matching entries to all materials of room objects
+        else:
 
+            if catt_io.room_collection not in bpy.data.collections:
+                self.report({'ERROR'}, 'Room collection not defined')
+                return {'CANCELLED'}
+
+            objects = utils.get_instanced_mesh_objects(utils.get_room_objects(catt_io, context.view_layer))
+            materials = dict.fromkeys(slot.material for obj in objects for slot in obj.material_slots if slot.material is not None)
+            num_assigned = assign_library_to_materials(context, library, materials, fuzzy=catt_io.material_library_fuzzy)
+
+        self.report({'INFO'}, '{0} material(s) assigned from library'.format(num_assigned))
         return {'FINISHED'}
 
 
@@ -173,42 +391,79 @@ class MESH_OT_catt_import(Operator, ImportHelper):
     # some_boolean: BoolProperty( name='Do a thing', description='Do a thing with the file you\'ve selected', default=True)
 
 
+    @profiled
     def execute(self, context):
         """ method called from ui """
 
         # init local
         catt_io = context.scene.catt_io
 
-        # parse data from geo file
-        [vertices, faces, materials, is_error_detected] = utils.parse_geo_file(self.filepath, catt_io.debug)
-        if( is_error_detected ):
-            self.report({'ERROR'}, 'Look into the console for more info')
-
-        # create objects from parsed data
+        # init locals
+        num_bands = len(catt_io.frequency_bands)
         filename, extension = os.path.splitext( os.path.basename(self.filepath) )
         collection_name = filename
-        utils.create_objects_from_parsed_geo_file(vertices, faces, materials, collection_name)
+        reference_path = bpy.path.abspath(catt_io.diff_reference_path)
+        is_diff = len(catt_io.diff_reference_path) > 0 and os.path.isfile(reference_path)
+        profiling.annotate(file=self.filepath)
+
+        # proxy import: parsed data from (or saved to) sidecar file, bounding boxes realised on demand
+        if catt_io.import_proxies:
+
+            with profiling.stage('parse'):
+                try:
+                    [columns, sidecar_path, is_error_detected, is_cached] = utils.read_geo_columns(self.filepath, catt_io.debug, num_bands, catt_io.import_procedural, catt_io.import_hierarchy, catt_io.import_instances)
+                except (utils.ProceduralError, OSError) as exception:
+                    self.report({'ERROR'}, str(exception))
+                    return {'CANCELLED'}
+            profiling.annotate(sidecar=sidecar_path, cached=is_cached)
+            if( is_error_detected ):
+                self.report({'ERROR'}, 'Look into the console for more info')
+
+            with profiling.stage('create proxies', objects=len(columns['names'])):
+                utils.create_proxy_objects(columns, sidecar_path, collection_name)
+            materials = json.loads(str(columns['materials']))
+
+            if is_diff: self.report({'WARNING'}, 'Rooms are not compared upon proxy import')
+
+        else:
+
+            # parse data from geo file
+            with profiling.stage('parse'):
+                try:
+                    [vertices, faces, materials, is_error_detected] = utils.parse_geo_file(self.filepath, catt_io.debug, num_bands, catt_io.import_procedural)
+                except (utils.ProceduralError, OSError) as exception:
+                    self.report({'ERROR'}, str(exception))
+                    return {'CANCELLED'}
+            if( is_error_detected ):
+                self.report({'ERROR'}, 'Look into the console for more info')
+
+            # create objects from parsed data
+            # (no linked duplicates when comparing with reference file: diff colours are stored per mesh)
+            with profiling.stage('create objects', planes=len(faces)):
+                parts = utils.create_objects_from_parsed_geo_file(vertices, faces, materials, collection_name, catt_io.import_hierarchy, catt_io.import_instances and not is_diff)
+                profiling.annotate(objects=len(parts), meshes=len(set(part['object'].data for part in parts)))
+
+            # compare with reference file, colour differences
+            if is_diff:
+                with profiling.stage('diff'):
+                    geo_reference = utils.parse_geo_file(reference_path, catt_io.debug, num_bands, catt_io.import_procedural)
+                    diff = utils.import_geo_diff(geo_reference, [vertices, faces, materials], parts, collection_name, catt_io.diff_dist)
+                print(utils.format_diff(diff))
+                self.report({'INFO'}, utils.format_diff(diff, max_items=0))
 
         # convert materials to catt materials
+        mat_template = get_material_template(context)
         for material_name, material in materials.items():
 
             # init locals
             mat = bpy.data.materials[ material_name ]
-            mat_template = get_material_template(context)
-            rna_dict = {}
-
-            # loop over material properties, assign default
-            for key, value in mat_template.items():
-                if key not in mat: mat[key] = value["default"]
-                rna_dict[key] = value
 
-            # apply rna
-            mat["_RNA_UI"] = rna_dict
+            # assign default material properties
+            update_catt_material(mat, mat_template)
 
             # update values based on material abs/scat/etc.
-            for i_freq in range(len(material['absorption'])):
-                mat['abs_{0}'.format(i_freq)] = material['absorption'][i_freq]
-                mat['dif_{0}'.format(i_freq)] = material['diffraction'][i_freq]
+            mat['abs'] = material['absorption'][:num_bands]
+            mat['dif'] = material['diffraction'][:num_bands]
 
             mat['is_diff_estimate'] = material['is_diff_estimate']
             mat['diff_estimate'] = material['diff_estimate']
@@ -216,337 +471,672 @@ class MESH_OT_catt_import(Operator, ImportHelper):
         return {'FINISHED'}
 
 
-class MESH_OT_catt_export_room(Operator):
-    """Export objects of every collection included in the View Layer to .GEO file"""
+class MESH_OT_catt_realize_proxies(Operator):
+    """Replace bounding boxes of proxy imported objects by their full mesh: selected objects, or all objects of the active collection if none selected"""
 
     # init locals
-    bl_idname = "catt.export_room"
-    bl_label = "Catt Export Room"
+    bl_idname = "catt.realize_proxies"
+    bl_label = "Catt Realize Proxies"
 
+    @profiled
     def execute(self, context):
         """ method called from ui """
 
-        # init local
-        catt_io = context.scene.catt_io
-
-        # update deprecated materials if need be
-        self.update_deprecated_catt_materials(context)
+        # get proxies: selected, or of active collection (and its children)
+        objects = [obj for obj in context.selected_objects if utils.PROXY_KEY in obj]
+        if len(objects) == 0:
+            objects = [obj for obj in context.collection.all_objects if utils.PROXY_KEY in obj]
+        if len(objects) == 0:
+            self.report({'WARNING'}, 'No proxy objects selected nor in active collection')
+            return {'CANCELLED'}
 
-        # get list of objects to export (meshes visible in viewport)
-        # objects = [obj for obj in bpy.context.view_layer.objects if obj.visible_get() and obj.type == 'MESH']
+        # realise
+        with profiling.stage('realize', objects=len(objects)):
+            num_realized, missing = utils.realize_proxy_objects(objects)
+        if len(missing) > 0:
+            self.report({'ERROR'}, 'Proxy data file(s) not found or rewritten since import, re-import to realise: {0}'.format(', '.join(missing)))
+            return {'CANCELLED'}
 
-        # get list of objects in room collection
-        collection = bpy.data.collections[catt_io.room_collection]
-        objects = utils.get_all_objects_recursive(collection, bpy.context.view_layer)
+        self.report({'INFO'}, '{0} object(s) realised'.format(num_realized))
+        return {'FINISHED'}
 
-        # filter only mesh objects
-        objects = [obj for obj in objects if obj.type == 'MESH']
 
-        # discard if no objects
-        if len(objects) == 0:
-            self.report({'INFO'}, 'No visible objects to export')
-            return {'CANCELLED'}
+class MESH_OT_catt_export_room(Operator):
+    """Export objects of every collection included in the View Layer to .GEO file"""
 
-        # check for catt materials
-        for obj in objects:
+    # init locals
+    bl_idname = "catt.export_room"
+    bl_label = "Catt Export Room"
 
-            # no material or dummy material?
-            # obj.data.materials sometimes contains single NoneType element when object has no materials
-            if len(obj.data.materials) == 0 or (len(obj.data.materials) == 1 and obj.data.materials[0] is None):
-                self.report({'ERROR'}, 'object {0} has no materials'.format(obj.name))
-                return {'CANCELLED'}
+    @profiled
+    def execute(self, context):
+        """ method called from ui """
 
-            # loop over materials
-            for mat in obj.data.materials:
+        # init local
+        catt_io = context.scene.catt_io
 
-                # discard empty material slots (@todo: handle empty material slots during export)
-                if mat is None:
-                    self.report({'ERROR'}, 'object {0} has empty matrial slot(s), please remove them'.format(obj.name))
-                    return {'CANCELLED'}
+        # get list of objects to export
+        # (view layer collections indexed once, reused by split export)
+        with profiling.stage('gather objects'):
+            layer_index = utils.get_layer_collection_index(context.view_layer)
+            objects = self.get_export_objects(context, layer_index)
+            if objects is None: return {'CANCELLED'}
 
-                # not catt materials?
-                if 'is_catt_material' not in mat:
-                    self.report({'ERROR'}, 'object {0} material {1} is not a CATT material'.format(obj.name, mat.name))
-                    return {'CANCELLED'}
+        # build material table (identical definitions merged into a single catt material)
+        with profiling.stage('material table'):
+            material_table = utils.build_material_table(objects, frequency_bands=tuple(catt_io.frequency_bands))
 
-                # material with too long name
-                if len(mat.name) > 15:
-                    self.report({'ERROR'}, 'object {0} material {1} name is too long (max is 15 characters)'.format(obj.name, mat.name))
-                    return {'CANCELLED'}
+        # check for name collisions of distinct definitions after name sanitisation
+        if len(material_table['collisions']) > 0:
+            self.report({'ERROR'}, 'materials {0} have different definitions but the same CATT name, please rename them'.format(', '.join(material_table['collisions'][0])))
+            return {'CANCELLED'}
 
         # get export path
         export_path = bpy.path.abspath(catt_io.export_path)
         file_name = catt_io.room_file_name
         file_path = os.path.join(export_path, file_name)
+        profiling.annotate(file=file_path)
 
         # export objects
-        self.export_objects(file_path, objects)
+        if catt_io.split_collections:
+            error_msg = self.export_objects_split(file_path, objects, material_table, layer_index)
+            if error_msg is not None:
+                self.report({'ERROR'}, error_msg)
+                return {'CANCELLED'}
+        elif utils.section_cache is not None and not catt_io.merge_objects: self.export_objects_cached(file_path, objects, material_table, utils.section_cache)
+        elif catt_io.stream_export and not catt_io.merge_objects: self.export_objects_stream(file_path, objects, material_table)
+        else: self.export_objects(file_path, objects, material_table)
+
+        # check exported file
+        if catt_io.lint_export:
+            with profiling.stage('lint'):
+                issues = utils.lint_geo_file(file_path)
+            for issue in issues: print(utils.format_issue(issue))
+            if len(issues) > 0: self.report({'WARNING'}, '{0} issue(s) found in exported file, see console'.format(len(issues)))
 
         # exit
         self.report({'INFO'}, 'Room export complete')
         return {'FINISHED'}
 
 
-    def update_deprecated_catt_materials(self, context):
-        """Update properties of all catt materials to latest version"""
+    def get_export_objects(self, context, layer_index=None):
+        """ return list of room objects to export, None (after report) if they can't be exported """
 
-        # init locals
+        # init local
         catt_io = context.scene.catt_io
-        mat_template = get_material_template(context)
 
-        # loop over materials in scene
-        for mat in bpy.data.materials:
+        # get list of objects to export (meshes visible in viewport)
+        # objects = [obj for obj in bpy.context.view_layer.objects if obj.visible_get() and obj.type == 'MESH']
 
-            # discard if not a catt material
-            if "is_catt_material" not in mat: continue
+        # get list of mesh objects and collection instances in room collection
+        objects = utils.get_room_objects(catt_io, bpy.context.view_layer, include_instances=True, layer_index=layer_index)
 
-            # ignore materials without rna (e.g. default dot stroke)
-            if not "_RNA_UI" in mat: continue
+        # discard if no objects
+        if len(objects) == 0:
+            self.report({'INFO'}, 'No visible objects to export')
+            return None
 
-            # copy rna
-            rna_dict = mat["_RNA_UI"]
+        # check for catt materials
+        error_msg = utils.check_room_materials(objects, len(catt_io.frequency_bands))
+        if error_msg is not None:
+            self.report({'ERROR'}, error_msg)
+            return None
 
-            # loop over required fields
-            for key, value in mat_template.items():
+        # report collection instances whose objects can't be exported (not evaluated, e.g. hidden)
+        skipped = utils.get_unevaluated_instancers(bpy.context.evaluated_depsgraph_get(), objects)
+        if len(skipped) > 0:
+            self.report({'WARNING'}, 'hidden collection instance(s) not exported: {0}'.format(', '.join(obj.name for obj in skipped)))
 
-                # add if missing
-                if key not in mat:
-                    print("++ key not found, adding key", key, "to", mat.name)
-                    mat[key] = value["default"]
-                    rna_dict[key] = value
+        return objects
 
-                # # fix if corrupted (without updating value itself, assumes type doesn't change)
-                # elif rna_dict[key] != value:
-                #     print("deprecated key found, updating key", key, "of", mat.name)
-                #     print("\t", rna_dict[key], "->", value)
-                #     rna_dict[key] = value
 
-            # apply rna
-            mat["_RNA_UI"] = rna_dict
+    def export_objects(self, file_path, objects, material_table):
+        """ export list of objects to catt geo file """
 
-        # exit
-        return {'FINISHED'}
+        # pull mesh data out of blender
+        parts = self.get_export_parts(objects, material_table['names'])
 
+        # open file
+        with profiling.stage('write'), utils.ExportFile(file_path) as data:
 
-    def export_objects(self, file_path, objects):
-        """ export list of objects to catt geo file """
+            # init write
+            fw = data.write
+
+            self.write_header(fw)
+            self.write_materials(fw, material_table['definitions'])
+            self.write_geometry(fw, parts)
+
+        # return
+        if bpy.context.scene.catt_io.debug: print('file {0}: {1}'.format('saved to' if data.changed else 'unchanged', file_path))
+
+        return 0
+
+
+    def export_objects_cached(self, file_path, objects, material_table, cache):
+        """ export list of objects to catt geo file, reusing the sections of objects cached by the
+        previous export (see utils.section_cache) """
 
         # init locals
         catt_io = bpy.context.scene.catt_io
-        objects_copy = []
+        vertex_offset = 0
+        plane_offset = 0
+        corners = []
+        planes = []
+
+        # discard cache if export options or material names changed
+        key = (catt_io.triangulate_faces, catt_io.apply_modifiers, catt_io.export_face_ids, tuple(sorted(material_table['names'].items())))
+        if cache.get('key') != key:
+            cache.clear()
+            cache['key'] = key
+        entries = cache.setdefault('objects', dict())
+
+        # drop objects no longer exported
+        names = set(obj.name for obj in objects)
+        for name in [name for name in entries if name not in names]: del entries[name]
+
+        # pull mesh data of objects not cached out of blender
+        changed = [obj for obj in objects if obj.name not in entries]
+        if catt_io.debug: print('reusing {0}/{1} cached objects'.format(len(objects) - len(changed), len(objects)))
+        if len(changed) > 0:
+            for obj in changed: entries[obj.name] = {'parts': [], 'offsets': None}
+            for part in self.get_export_parts(changed, material_table['names']): entries[changed[part['owner']].name]['parts'].append(part)
+
+        # format sections of objects not cached or with shifted corner and plane ids
+        with profiling.stage('format', objects=len(objects)):
+            for obj in objects:
+
+                entry = entries[obj.name]
+                vertex_offsets, plane_offsets = utils.get_geometry_offsets(entry['parts'], vertex_offset, plane_offset)
+                if entry['offsets'] != (vertex_offset, plane_offset):
+                    entry['corners'] = ''.join([utils.format_corners(part, vertex_offsets[i_part]) for i_part, part in enumerate(entry['parts'])])
+                    entry['planes'] = ''.join([utils.format_planes(part, vertex_offsets[i_part], plane_offsets[i_part]) for i_part, part in enumerate(entry['parts'])])
+                    entry['offsets'] = (vertex_offset, plane_offset)
+
+                corners.append(entry['corners'])
+                planes.append(entry['planes'])
+                vertex_offset, plane_offset = vertex_offsets[-1], plane_offsets[-1]
 
-        for i_obj, obj in enumerate(objects):
+        # open file
+        with profiling.stage('write'), utils.ExportFile(file_path) as data:
 
-            # debug log
-            if catt_io.debug: print('copying objects {0}/{1}: {2}'.format(i_obj+1, len(objects), obj.name))
+            # init write
+            fw = data.write
 
-            # duplicate object
-            obj_copy = obj.copy()
-            obj_copy.data = obj_copy.data.copy() # make sure object data is not linked to original
-            bpy.context.collection.objects.link(obj_copy)
+            self.write_header(fw)
+            self.write_materials(fw, material_table['definitions'])
+            fw('CORNERS \n\n')
+            fw(''.join(corners))
+            fw('\n\n')
+            fw('PLANES\n\n')
+            fw(''.join(planes))
 
-            # apply transform, triangulate, apply modifiers
-            bm = utils.bmesh_copy_from_object(obj, transform=False, triangulate=catt_io.triangulate_faces, apply_modifiers=catt_io.apply_modifiers)
+        # return
+        if catt_io.debug: print('file {0}: {1}'.format('saved to' if data.changed else 'unchanged', file_path))
 
-            # copy back bmesh to mesh data
-            bm.to_mesh(obj_copy.data)
-            obj_copy.data.update()
-            bm.free()
+        return 0
 
-            # save to locals
-            objects_copy.append(obj_copy)
 
-        # is there a join operation to apply?
-        if catt_io.merge_objects and len(objects_copy) > 1:
+    def export_objects_stream(self, file_path, objects, material_table):
+        """ export list of objects to catt geo file, one object in memory at a time """
 
-            # debug log
-            if catt_io.debug: print('merging objects')
+        # init locals
+        catt_io = bpy.context.scene.catt_io
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        vertex_offset = 0
+        plane_offset = 0
 
-            # Deselect everything
-            bpy.ops.object.select_all(action='DESELECT')
+        # counting pass: number of instances of each mesh (to free shared arrays after last use)
+        with profiling.stage('count instances'):
+            mesh_uses = utils.count_mesh_uses(depsgraph, objects, catt_io.apply_modifiers)
+        if catt_io.debug: print('streaming {0} mesh instances'.format(sum(mesh_uses.values())))
 
-            # Select all objects to prepare join operation
-            for obj in objects_copy:
-                obj.select_set(True)
-            bpy.context.view_layer.objects.active = objects_copy[0]
+        # corners and planes sections buffered in temporary files (next to export file)
+        export_dir = os.path.dirname(file_path)
+        with tempfile.TemporaryFile('w+', newline='', dir=export_dir) as corners, tempfile.TemporaryFile('w+', newline='', dir=export_dir) as planes:
 
-            # join objects, get result
-            bpy.ops.object.join()
-            concat_object = objects_copy[0]
+            # extract, write and free one object at a time
+            with profiling.stage('stream objects'):
+                for part in utils.iter_export_parts(depsgraph, objects, material_table['names'], catt_io.triangulate_faces, catt_io.apply_modifiers, catt_io.export_face_ids, mesh_uses=mesh_uses):
 
-            # remove duplicate vertices
-            if catt_io.rm_duplicates_dist > 0:
+                    corners.write(utils.format_corners(part, vertex_offset))
+                    planes.write(utils.format_planes(part, vertex_offset, plane_offset))
 
-                # debug
-                if catt_io.debug: print('merging neighbour vertices')
+                    vertex_offset += len(part['vertices'])
+                    plane_offset += len(part['loop_starts'])
 
-                # merge using bmesh
-                bm = bmesh.new()
-                bm.from_mesh(concat_object.data)
-                bmesh.ops.remove_doubles(bm, verts = bm.verts, dist = catt_io.rm_duplicates_dist)
-                bm.to_mesh(concat_object.data)
-                concat_object.data.update()
-                bm.free()
+            # open file
+            with profiling.stage('write'), utils.ExportFile(file_path) as data:
 
-            # save to locals
-            objects_copy = [concat_object]
+                # init write
+                fw = data.write
 
-        # build list of materials used in objects (unique)
-        materials_to_export = []
-        for obj in objects_copy:
-            [materials_to_export.append(mat) for mat in obj.data.materials]
+                self.write_header(fw)
+                self.write_materials(fw, material_table['definitions'])
 
-        # remove duplicate materials
-        materials_to_export = list(set(materials_to_export))
+                # concatenate sections
+                fw('CORNERS \n\n')
+                corners.seek(0)
+                shutil.copyfileobj(corners, data)
+                fw('\n\n')
+                fw('PLANES\n\n')
+                planes.seek(0)
+                shutil.copyfileobj(planes, data)
 
-        # open file
-        with open(file_path, 'w', newline='\r\n') as data:
+        # return
+        if catt_io.debug: print('file {0}: {1}'.format('saved to' if data.changed else 'unchanged', file_path))
+
+        return 0
+
+
+    def export_objects_split(self, file_path, objects, material_table, layer_index=None):
+        """ export objects to one catt geo file per first level collection of the room collection,
+        included in a master file holding the materials, return error message (None if exported) """
+
+        # init locals
+        catt_io = bpy.context.scene.catt_io
+        file_root, file_extension = os.path.splitext(file_path)
+        exported = set(objects)
+        mesh_cache = dict()
+        file_names = dict()
+        groups = []
+        jobs = []
+
+        # groups of objects validated for export, one per collection
+        for group_name, group_objects in utils.get_room_collection_groups(catt_io, bpy.context.view_layer, layer_index):
+            group_objects = [obj for obj in group_objects if obj in exported]
+            if len(group_objects) > 0: groups.append((group_name, group_objects))
+
+        # check for collection names sharing a file name after sanitisation (case insensitive file systems)
+        for group_name, group_objects in groups:
+            file_name = utils.name_to_file_str(group_name).lower()
+            if file_name in file_names:
+                return 'collections {0}, {1} have the same file name once sanitised, please rename them'.format(file_names[file_name], group_name)
+            file_names[file_name] = group_name
+
+        # pull mesh data out of blender, one group per collection
+        for group_name, group_objects in groups:
+
+            # extract export arrays (meshes shared between collections extracted once)
+            parts = self.get_export_parts(group_objects, material_table['names'], mesh_cache)
+
+            # save to locals
+            group_path = '{0}_{1}{2}'.format(file_root, utils.name_to_file_str(group_name), file_extension)
+            jobs.append((group_path, parts))
+
+        # global corners and planes ids ranges
+        vertex_offsets = np.cumsum([0] + [sum(len(part['vertices']) for part in parts) for group_path, parts in jobs]).tolist()
+        plane_offsets = np.cumsum([0] + [sum(len(part['loop_starts']) for part in parts) for group_path, parts in jobs]).tolist()
+
+        # shape header
+        header = io.StringIO()
+        self.write_header(header.write)
+        header = header.getvalue()
+
+        # serialise collection files concurrently, in worker processes (core library doesn't need bpy),
+        # in threads if processes can't be used (e.g. add-on package not importable from worker)
+        tasks = [(group_path, header, parts, vertex_offsets[i_job], plane_offsets[i_job]) for i_job, (group_path, parts) in enumerate(jobs)]
+        with profiling.stage('write collection files', files=len(tasks)):
+            try:
+                results = self.write_geometry_files(concurrent.futures.ProcessPoolExecutor, tasks)
+            except (OSError, ImportError, AttributeError, pickle.PicklingError, concurrent.futures.BrokenExecutor) as exception:
+                if catt_io.debug: print('worker processes unavailable ({0}), using threads'.format(exception))
+                results = self.write_geometry_files(concurrent.futures.ThreadPoolExecutor, tasks)
+
+        for group_path, changed in results:
+            if catt_io.debug: print('file {0}: {1}'.format('saved to' if changed else 'unchanged', group_path))
+
+        # write master file: materials and includes
+        with profiling.stage('write master'), utils.ExportFile(file_path) as data:
 
             # init write
             fw = data.write
 
-            # header
-            fw('; File generated by the blender catt export add-on from .blend file: \n')
-            fw('; {0} \n\n\n'.format(bpy.data.filepath))
+            self.write_header(fw)
+            self.write_materials(fw, material_table['definitions'])
+            for group_path, parts in jobs: fw('INCLUDE {0} \n'.format(os.path.basename(group_path)))
 
-            # header from embedded script
-            if( catt_io.editor_scripts in bpy.data.texts.keys() ):
+        # return
+        if catt_io.debug: print('file {0}: {1}'.format('saved to' if data.changed else 'unchanged', file_path))
 
-                # header
-                fw('; COMMENTS \n')
-                fw('; (generated from embedded script: {0}) \n\n'.format(catt_io.editor_scripts))
+        return None
 
-                # get text
-                text = bpy.data.texts[catt_io.editor_scripts]
 
-                # write line as catt comment
-                for line in text.lines: fw('; ' + line.body + '\n')
-                fw('\n\n')
+    def write_geometry_files(self, executor_type, tasks):
+        """ write geometry files (see core.geo.write_geometry_file arguments) using an executor pool """
+
+        with executor_type(max_workers=max(1, min(os.cpu_count(), len(tasks)))) as pool:
+
+            futures = [pool.submit(core.geo.write_geometry_file, *task) for task in tasks]
+            return [future.result() for future in futures]
+
+
+    def get_export_parts(self, objects, material_names, mesh_cache=None):
+        """ return export arrays (see utils.get_export_parts) of objects, merged if need be """
+
+        # init locals
+        catt_io = bpy.context.scene.catt_io
+        depsgraph = bpy.context.evaluated_depsgraph_get()
 
-            # materials
-            fw('; MATERIALS \n\n')
-            r = 1 # round factor
+        # debug log
+        if catt_io.debug: print('extracting geometry of {0} objects'.format(len(objects)))
 
-            # loop over materials
-            for i_mat, mat in enumerate(materials_to_export):
+        # extract arrays of every mesh instance
+        with profiling.stage('extract', objects=len(objects)):
+            parts = utils.get_export_parts(depsgraph, objects, material_names, catt_io.triangulate_faces, catt_io.apply_modifiers, catt_io.export_face_ids, mesh_cache)
 
-                # debug log
-                if catt_io.debug: print('exporting materials {0}/{1}: {2} '.format(i_mat+1, len(materials_to_export), mat.name))
+        # is there a merge operation to apply?
+        if catt_io.merge_objects and len(parts) > 1:
 
-                # absorption
-                fw("abs {0} = <{1} {2} {3} {4} {5} {6} : {7} {8}>".format(utils.mat_name_to_str(mat.name), round(mat['abs_0'], r), round(mat['abs_1'], r), round(mat['abs_2'], r), round(mat['abs_3'], r), round(mat['abs_4'], r), round(mat['abs_5'], r), round(mat['abs_6'], r), round(mat['abs_7'], r)))
+            # debug log
+            if catt_io.debug: print('merging objects')
 
-                # diffraction
-                if mat["use_diffraction"]:
+            # merge parts, remove duplicate vertices
+            with profiling.stage('merge and remove_doubles'):
+                parts = [utils.merge_parts(parts, catt_io.rm_duplicates_dist)]
 
-                    fw(" L ")
+        return parts
 
-                    if mat['is_diff_estimate']:
 
-                        fw("<estimate({0})>".format(round(mat['diff_estimate'], 3)))
+    def write_header(self, fw):
+        """ write catt geo file header (comments) """
 
-                    else:
+        # init locals
+        catt_io = bpy.context.scene.catt_io
 
-                        fw("<{0} {1} {2} {3} {4} {5} : {6} {7}>".format(round(mat['dif_0'], r), round(mat['dif_1'], r), round(mat['dif_2'], r), round(mat['dif_3'], r), round(mat['dif_4'], r), round(mat['dif_5'], r), round(mat['dif_6'], r), round(mat['dif_7'], r)))
+        # header
+        fw('; File generated by the blender catt export add-on from .blend file: \n')
+        fw('; {0} \n\n\n'.format(bpy.data.filepath))
 
-                # colour
-                fw(" {{{0} {1} {2}}} \n".format(int(255*mat.diffuse_color[0]), int(255*mat.diffuse_color[1]), int(255*mat.diffuse_color[2])))
+        # header from embedded script
+        if( catt_io.editor_scripts in bpy.data.texts.keys() ):
 
+            # header
+            fw('; COMMENTS \n')
+            fw('; (generated from embedded script: {0}) \n\n'.format(catt_io.editor_scripts))
+
+            # get text
+            text = bpy.data.texts[catt_io.editor_scripts]
+
+            # write line as catt comment
+            for line in text.lines: fw('; ' + line.body + '\n')
             fw('\n\n')
 
-            # vertices header
-            fw('CORNERS \n\n')
 
-            # init locals
-            vertex_index_offsets = [0]
-            faces_index_offsets = [0]
+    def write_materials(self, fw, definitions):
+        """ write catt materials from list of (name, definition string) """
 
-            # loop over objects (but first)
-            for obj in objects_copy[:-1]:
+        # init locals
+        catt_io = bpy.context.scene.catt_io
+
+        # materials
+        fw('; MATERIALS \n\n')
 
-                # incr. vertices offsets (to prevent vertex id overwrite)
-                vertex_index_offsets.append( len(obj.data.vertices) + vertex_index_offsets[-1])
-                faces_index_offsets.append( len(obj.data.polygons) + faces_index_offsets[-1] )
+        # loop over materials (deduplicated definitions)
+        for i_mat, (mat_name, mat_definition) in enumerate(definitions):
 
-            # loop over objects
-            for i_obj, obj in enumerate(objects_copy):
+            # debug log
+            if catt_io.debug: print('exporting materials {0}/{1}: {2} '.format(i_mat+1, len(definitions), mat_name))
+
+            # absorption, diffraction, colour
+            fw("abs {0} = {1} \n".format(mat_name, mat_definition))
 
-                # debug log
-                if catt_io.debug: print('exporting vertices {0}/{1}: {2} '.format(i_obj+1, len(objects_copy), obj.name))
+        fw('\n\n')
 
-                # loop over vertices
-                for vertice in obj.data.vertices:
 
-                    # get vertex coords (absolute)
-                    coords = (obj.matrix_world @ vertice.co)
+    def write_geometry(self, fw, parts):
+        """ write catt corners and planes of export parts """
 
-                    # write line
-                    index = vertice.index + vertex_index_offsets[i_obj] + 1
-                    fw("{0} {1:.2f} {2:.2f} {3:.2f} \n".format(index, coords[0], coords[1], coords[2]) )
+        # init locals
+        vertex_offsets, plane_offsets = utils.get_geometry_offsets(parts)
 
+        # vertices
+        with profiling.stage('CORNERS', corners=vertex_offsets[-1]):
+            fw('CORNERS \n\n')
+            for i_part, part in enumerate(parts): fw(utils.format_corners(part, vertex_offsets[i_part]))
             fw('\n\n')
 
-            # faces header
+        # faces
+        with profiling.stage('PLANES', planes=plane_offsets[-1]):
             fw('PLANES\n\n')
+            for i_part, part in enumerate(parts): fw(utils.format_planes(part, vertex_offsets[i_part], plane_offsets[i_part]))
 
-            for i_obj, obj in enumerate(objects_copy):
 
-                # get handle to original object (for original name and collection access)
-                # warning: may misbehave with merging option
-                obj_original = objects[i_obj]
+class MESH_OT_catt_export_room_sweep(MESH_OT_catt_export_room):
+    """Export room geometry once, and one .GEO file per material variant of the sweep table including it"""
 
-                # debug log
-                if catt_io.debug: print('exporting faces {0}/{1}: {2} '.format(i_obj+1, len(objects_copy), obj_original.name))
+    # init locals
+    bl_idname = "catt.export_room_sweep"
+    bl_label = "Catt Export Room Material Sweep"
 
-                # loop over faces
-                for i_face, face in enumerate(obj.data.polygons):
+    @profiled
+    def execute(self, context):
+        """ method called from ui """
 
-                    # init locals
-                    # had to use original object here (otherwise copy doesn't belong to any collection)
-                    collection_name = '' if len(obj_original.users_collection) == 0 else obj_original.users_collection[0].name
-                    material_name = utils.mat_name_to_str(obj.material_slots[face.material_index].material.name)
-                    object_name = obj_original.name
+        # init local
+        catt_io = context.scene.catt_io
 
-                    # auto edge diffraction if collection or object names end with '*'
-                    edge_diffraction_str = ''
-                    if( len(collection_name) > 0 and collection_name[-1] == '*' ):
+        # load sweep table
+        sweep_path = bpy.path.abspath(catt_io.sweep_table_path)
+        if not os.path.isfile(sweep_path):
+            self.report({'ERROR'}, 'Sweep table file not found')
+            return {'CANCELLED'}
+        try:
+            variants = material_library.read_sweep_table(sweep_path, len(catt_io.frequency_bands))
+        except (ValueError, OSError, csv.Error) as exception:
+            self.report({'ERROR'}, 'Sweep table could not be read ({0})'.format(exception))
+            return {'CANCELLED'}
+        if len(variants) == 0:
+            self.report({'ERROR'}, 'Sweep table defines no variants')
+            return {'CANCELLED'}
 
-                        edge_diffraction_str = '*'
-                        collection_name = collection_name.rstrip('*')
+        # check for variant names sharing a file name after sanitisation (or the geometry file name,
+        # case insensitive file systems)
+        file_names = {'geometry': None}
+        for variant_name, overrides in variants:
+            file_name = utils.name_to_file_str(variant_name).lower()
+            if file_name in file_names:
+                self.report({'ERROR'}, 'variant {0} has the same file name as {1}, please rename it'.format(variant_name, 'the geometry file' if file_names[file_name] is None else 'variant ' + file_names[file_name]))
+                return {'CANCELLED'}
+            file_names[file_name] = variant_name
 
-                    if object_name[-1] == '*':
+        # get list of objects to export
+        objects = self.get_export_objects(context)
+        if objects is None: return {'CANCELLED'}
 
-                        object_name = object_name.rstrip('*')
-                        edge_diffraction_str = '*'
+        # build material table of every variant
+        material_table = utils.build_material_table(objects, variants=variants, frequency_bands=tuple(catt_io.frequency_bands))
 
-                    # shape face name from collection and object names
-                    # 'Master Collection' is the name of blender root collection
-                    face_name = object_name
+        # check for name collisions of distinct definitions after name sanitisation
+        if len(material_table['collisions']) > 0:
+            self.report({'ERROR'}, 'materials {0} have different definitions but the same CATT name, please rename them'.format(', '.join(material_table['collisions'][0])))
+            return {'CANCELLED'}
 
-                     # keep original face id (no offset here)
-                    if catt_io.export_face_ids: face_name = "{0}-{1}".format(face_name, face.index)
-                    if collection_name not in ('', 'Master Collection'): face_name = "{0}-{1}".format(collection_name, face_name)
+        # check for sweep table materials not used in the room (typos would export unchanged variants)
+        if len(material_table['unknown']) > 0:
+            self.report({'ERROR'}, 'sweep table material(s) not found in the room: {0}'.format(', '.join(material_table['unknown'])))
+            return {'CANCELLED'}
 
-                    # get face vertices ids
-                    offset = vertex_index_offsets[i_obj] + 1
-                    vertices_list = [vertice + offset for vertice in face.vertices]
-                    vertices_list_str = ' '.join(map(str, vertices_list))
+        # get export path
+        export_path = bpy.path.abspath(catt_io.export_path)
+        file_name = catt_io.room_file_name
+        file_path = os.path.join(export_path, file_name)
+        profiling.annotate(file=file_path)
+
+        # export objects
+        self.export_sweep(file_path, objects, material_table)
 
-                    # write face line
-                    offset = faces_index_offsets[i_obj] + 1
-                    fw("[ {0} {1} / {2} / {3}{4} ]\n".format(face.index + offset, face_name, vertices_list_str, material_name, edge_diffraction_str) )
+        # exit
+        self.report({'INFO'}, 'Room sweep export complete ({0} variants)'.format(len(variants)))
+        return {'FINISHED'}
 
-        # loop over objects to remove
-        for i_obj, obj in enumerate(objects_copy):
-            if catt_io.debug: print('deleting copied objects {0}/{1}: {2} '.format(i_obj+1, len(objects_copy), obj.name))
-            bpy.data.objects.remove(obj)
 
-        # return
-        if catt_io.debug: print('file saved to: {0}'.format(file_path))
+    def export_sweep(self, file_path, objects, material_table):
+        """ export geometry to <name>_geometry.geo and material variants to <name>_<variant>.geo """
+
+        # init locals
+        catt_io = bpy.context.scene.catt_io
+        file_root, file_extension = os.path.splitext(file_path)
+        geometry_path = '{0}_geometry{1}'.format(file_root, file_extension)
+
+        # pull mesh data out of blender
+        parts = self.get_export_parts(objects, material_table['names'])
+
+        # write geometry once
+        with utils.ExportFile(geometry_path) as data:
+
+            fw = data.write
+            self.write_header(fw)
+            self.write_geometry(fw, parts)
+
+        if catt_io.debug: print('file {0}: {1}'.format('saved to' if data.changed else 'unchanged', geometry_path))
+
+        # loop over variants
+        for variant_name, definitions in material_table['variants']:
+
+            # write materials, include geometry
+            variant_path = '{0}_{1}{2}'.format(file_root, utils.name_to_file_str(variant_name), file_extension)
+            with utils.ExportFile(variant_path) as data:
+
+                fw = data.write
+                self.write_header(fw)
+                fw('; MATERIAL VARIANT: {0} \n\n'.format(variant_name))
+                self.write_materials(fw, definitions)
+                fw('INCLUDE {0} \n'.format(os.path.basename(geometry_path)))
+
+            if catt_io.debug: print('file {0}: {1}'.format('saved to' if data.changed else 'unchanged', variant_path))
 
         return 0
 
 
+class MESH_OT_catt_reverb_preview(Operator):
+    """Estimate Sabine and Eyring reverberation times of the room collection"""
+
+    # init locals
+    bl_idname = "catt.reverb_preview"
+    bl_label = "Catt Reverberation Preview"
+
+    @profiled
+    def execute(self, context):
+        """ method called from ui """
+
+        # init local
+        scene = context.scene
+        catt_io = scene.catt_io
+
+        # discard if room collection not defined
+        if catt_io.room_collection not in bpy.data.collections:
+            self.report({'ERROR'}, 'Room collection not defined')
+            return {'CANCELLED'}
+
+        # get list of mesh objects in room collection
+        objects = utils.get_room_objects(catt_io, context.view_layer)
+        if len(objects) == 0:
+            self.report({'INFO'}, 'No visible objects to analyse')
+            return {'CANCELLED'}
+
+        # check for catt materials
+        error_msg = utils.check_room_materials(objects, len(catt_io.frequency_bands))
+        if error_msg is not None:
+            self.report({'ERROR'}, error_msg)
+            return {'CANCELLED'}
+
+        # compute room volume and per material surfaces
+        depsgraph = context.evaluated_depsgraph_get()
+        [volume, material_areas] = utils.get_room_volume_and_areas(objects, depsgraph, catt_io.apply_modifiers)
+
+        # discard if room is not closed / badly oriented
+        if volume <= 0.0:
+            self.report({'ERROR'}, 'Negative or null room volume: check normal orientations and that room is closed')
+            return {'CANCELLED'}
+
+        # compute reverberation times
+        frequencies = list(catt_io.frequency_bands)
+        [rt_sabine, rt_eyring, absorption_areas] = utils.get_reverberation_times(volume, material_areas, len(frequencies))
+        surface = sum(material_areas.values())
+
+        # save to scene (displayed in panel)
+        scene['catt_reverb_preview'] = {
+            'volume': volume,
+            'surface': surface,
+            'frequencies': frequencies,
+            'sabine': rt_sabine.tolist(),
+            'eyring': rt_eyring.tolist(),
+        }
+
+        # write csv file
+        export_path = bpy.path.abspath(catt_io.export_path)
+        file_path = os.path.join(export_path, catt_io.reverb_file_name)
+        profiling.annotate(file=file_path)
+        with open(file_path, 'w', newline='') as file:
+
+            file.write('frequency_hz,sabine_s,eyring_s,absorption_area_m2,volume_m3,surface_m2\n')
+            for i_freq, freq in enumerate(frequencies):
+                file.write('{0},{1:.3f},{2:.3f},{3:.3f},{4:.3f},{5:.3f}\n'.format(int(freq), rt_sabine[i_freq], rt_eyring[i_freq], absorption_areas[i_freq], volume, surface))
+
+        # exit
+        if catt_io.debug: print('file saved to:', file_path)
+        self.report({'INFO'}, 'Reverberation preview complete (V = {0:.1f} m3, S = {1:.1f} m2)'.format(volume, surface))
+        return {'FINISHED'}
+
+
+class MESH_OT_catt_visibility(Operator):
+    """Compute source/receiver direct visibility through the room collection"""
+
+    # init locals
+    bl_idname = "catt.visibility_matrix"
+    bl_label = "Catt Visibility Matrix"
+
+    @profiled
+    def execute(self, context):
+        """ method called from ui """
+
+        # init local
+        catt_io = context.scene.catt_io
+
+        # discard if room collection not defined
+        if catt_io.room_collection not in bpy.data.collections:
+            self.report({'ERROR'}, 'Room collection not defined')
+            return {'CANCELLED'}
+
+        # get sources and receivers positions
+        [source_names, sources] = utils.get_positions(context, catt_io.source_export_type, catt_io.source_collection, catt_io.source_object, catt_io.source_dist_thresh)
+        [receiver_names, receivers] = utils.get_positions(context, catt_io.receiver_export_type, catt_io.receiver_collection, catt_io.receiver_object, catt_io.receiver_dist_thresh)
+        if len(sources) == 0 or len(receivers) == 0:
+            self.report({'INFO'}, 'No sources or receivers to process')
+            return {'CANCELLED'}
+
+        # build bvh of room and compute visibility
+        objects = utils.get_room_objects(catt_io, context.view_layer)
+        if len(objects) == 0:
+            self.report({'ERROR'}, 'No visible mesh objects in room collection')
+            return {'CANCELLED'}
+        if catt_io.debug: print('computing visibility of {0} source/receiver pairs'.format(len(sources) * len(receivers)))
+        bvh = utils.build_room_bvh(objects)
+        [visibility, lengths] = utils.get_visibility_matrix(bvh, sources, receivers)
+
+        # write visibility matrix and path lengths to csv files
+        export_path = bpy.path.abspath(catt_io.export_path)
+        file_path = os.path.join(export_path, catt_io.visibility_file_name)
+        profiling.annotate(file=file_path)
+        file_path_lengths = '{0}_length{1}'.format(*os.path.splitext(file_path))
+        header = ','.join(['source'] + receiver_names) + '\n'
+
+        with open(file_path, 'w', newline='') as file:
+            file.write(header)
+            for i_src, name in enumerate(source_names):
+                file.write(','.join([name] + [str(v) for v in visibility[i_src].astype(int)]) + '\n')
+
+        with open(file_path_lengths, 'w', newline='') as file:
+            file.write(header)
+            for i_src, name in enumerate(source_names):
+                file.write(','.join([name] + ['{0:.3f}'.format(l) for l in lengths[i_src]]) + '\n')
+
+        # exit
+        if catt_io.debug: print('files saved to:', file_path, file_path_lengths)
+        self.report({'INFO'}, '{0}/{1} source/receiver pairs in direct sight'.format(int(visibility.sum()), visibility.size))
+        return {'FINISHED'}
+
+
 class MESH_OT_catt_export_receiver_animation(Operator):
     """Export objects along animated path"""
 
@@ -554,6 +1144,7 @@ class MESH_OT_catt_export_receiver_animation(Operator):
     bl_idname = "catt.export_receiver_animation"
     bl_label = "Catt Export Animation"
 
+    @profiled
     def execute(self, context):
         """ method called from ui """
 
@@ -567,37 +1158,17 @@ class MESH_OT_catt_export_receiver_animation(Operator):
         export_path = bpy.path.abspath(catt_io.export_path)
         file_name = catt_io.receiver_file_name
         file_path = os.path.join(export_path, file_name)
-        file = open(file_path,'w')
-
-        # add header
-        file.write("RECEIVERS \r\n")
+        profiling.annotate(file=file_path)
+        with utils.ExportFile(file_path, newline=None) as file:
 
-        # sample positions along animations
-        [list_translation, list_rotation_euler] = utils.sample_animation_path(context, obj, catt_io.receiver_dist_thresh)
-
-        # loop over positions
-        for iPos in range(0, len(list_translation)):
-
-            # init locals
-            obj_id = iPos + 1
-            loc = list_translation[iPos]
-
-            # shape line
-            s = ""
-            s += f'{obj_id:02}' + " "
-            s += str(round(loc[0], round_factor)) + " " + str(round(loc[1], round_factor)) + " " + str(round(loc[2], round_factor)) + " "
+            # sample positions along animations
+            [list_translation, list_rotation_euler] = utils.sample_animation_path(context, obj, catt_io.receiver_dist_thresh)
 
             # WARNING: if you add rotation/euler export, sample_animation_path removes duplicates (even far away duplicates animation wise). Might want to alleviate that depending on export scenarios.
-            # rot = obj.rotation_euler
-            # s += str(round(rot.x,r)) + " " + str(round(rot.y,r)) + " " + str(round(rot.z,r))
-
-            # write to file
-            s += "\r\n"
-            file.write(s)
+            file.write(utils.format_receivers(list_translation, 1, round_factor))
 
         # write to file
         if catt_io.debug: print('file saved to:', file_path)
-        file.close()
 
         self.report({'INFO'}, "Receiver export complete")
         return {'FINISHED'}
@@ -610,6 +1181,7 @@ class MESH_OT_catt_export_source_animation(Operator):
     bl_idname = "catt.export_source_animation"
     bl_label = "Catt Export Animation"
 
+    @profiled
     def execute(self, context):
         """ method called from ui """
 
@@ -623,49 +1195,27 @@ class MESH_OT_catt_export_source_animation(Operator):
         export_path = bpy.path.abspath(catt_io.export_path)
         file_name = catt_io.source_file_name
         file_path = os.path.join(export_path, file_name)
-        file = open(file_path,'w')
-
-        # sample positions along animations
-        [list_translation, list_rotation_euler] = utils.sample_animation_path(context, obj, catt_io.source_dist_thresh)
-
-        # get list of available source names
-        source_names = utils.get_catt_source_names()
+        profiling.annotate(file=file_path)
+        with utils.ExportFile(file_path, newline=None) as file:
 
-        # discard if too many positions compared to available source names
-        if( len(list_translation) > len(source_names) ):
+            # sample positions along animations
+            [list_translation, list_rotation_euler] = utils.sample_animation_path(context, obj, catt_io.source_dist_thresh)
 
-            file.write("ERROR: too many source positions to export, not enough valid CATT source names")
-            file.close()
-            self.report({'WARNING'}, "Source export aborted")
-            return {'FINISHED'}
-
-        # loop over positions
-        for iPos in range(0, len(list_translation)):
-
-            # source header
-            file.write("SOURCE " + source_names[iPos] + "\r\n")
+            # get list of available source names
+            source_names = utils.get_catt_source_names()
 
-            # source pos
-            loc = list_translation[iPos]
-            s = "  "
-            s += "POS = "
-            s += str(round(loc[0], round_factor)) + " " + str(round(loc[1], round_factor)) + " " + str(round(loc[2], round_factor))
-            s += " \r\n"
-            file.write(s)
+            # discard if too many positions compared to available source names
+            if( len(list_translation) > len(source_names) ):
 
-            # # source aim pos
-            # s = "  "
-            # s += "AIMPOS = "
-            # aimpos = mathutils.Vector([0, 0, 0])
-            # s += str(round(aimpos.x, round_factor)) + " " + str(round(aimpos.y, round_factor)) + " " + str(round(aimpos.z, round_factor))
-            # s += " \r\n"
-            # file.write(s)
+                file.write("ERROR: too many source positions to export, not enough valid CATT source names")
+                self.report({'WARNING'}, "Source export aborted")
+                return {'FINISHED'}
 
-            file.write("END \r\n \r\n")
+            # write positions
+            file.write(utils.format_sources(source_names[:len(list_translation)], list_translation, round_factor))
 
         # write to file
         if catt_io.debug: print('file saved to:', file_path)
-        file.close()
 
         self.report({'INFO'}, "Source export complete")
         return {'FINISHED'}
@@ -678,6 +1228,7 @@ class MESH_OT_catt_export_receiver_collection(Operator):
     bl_idname = "catt.export_receiver_collection"
     bl_label = "Catt Export Collection"
 
+    @profiled
     def execute(self, context):
         """ method called from ui """
 
@@ -691,40 +1242,22 @@ class MESH_OT_catt_export_receiver_collection(Operator):
         export_path = bpy.path.abspath(catt_io.export_path)
         file_name = catt_io.receiver_file_name
         file_path = os.path.join(export_path, file_name)
-        file = open(file_path,'w')
+        profiling.annotate(file=file_path)
+        with utils.ExportFile(file_path, newline=None) as file:
 
-        # add header
-        file.write("RECEIVERS \r\n")
+            # get sorted list (alphabetical, as displayed in outliner)
+            obj_list = collection.objects[:]
+            obj_list.sort(key=lambda obj: obj.name)
 
-        # init loop over objects
-        obj_id = 0
+            # log receiver ids
+            if catt_io.debug:
+                for obj_id, obj in enumerate(obj_list): print('export', obj.name, 'as receiver', obj_id)
 
-        # get sorted list (alphabetical, as displayed in outliner)
-        obj_list = collection.objects[:]
-        obj_list.sort(key=lambda obj: obj.name)
-
-        # loop over objects in collection
-        for obj in obj_list:
-
-            # init locals
-            loc = obj.matrix_world.translation
-
-            # shape line
-            s = ""
-            s += f'{obj_id:02}' + " "
-            s += str(round(loc.x, round_factor)) + " " + str(round(loc.y, round_factor)) + " " + str(round(loc.z, round_factor)) + " "
-
-            # write to file
-            if catt_io.debug: print('export', obj.name, 'as receiver', obj_id)
-            s += "\r\n"
-            file.write(s)
-
-            # increment counters
-            obj_id += 1
+            # write positions (ids starting from 0)
+            file.write(utils.format_receivers([obj.matrix_world.translation for obj in obj_list], 0, round_factor))
 
         # write to file
         if catt_io.debug: print('file saved to:', file_path)
-        file.close()
 
         self.report({'INFO'}, "Receiver export complete")
         return {'FINISHED'}
@@ -737,6 +1270,7 @@ class MESH_OT_catt_export_source_collection(Operator):
     bl_idname = "catt.export_source_collection"
     bl_label = "Catt Export Collection"
 
+    @profiled
     def execute(self, context):
         """ method called from ui """
 
@@ -750,39 +1284,18 @@ class MESH_OT_catt_export_source_collection(Operator):
         export_path = bpy.path.abspath(catt_io.export_path)
         file_name = catt_io.source_file_name
         file_path = os.path.join(export_path, file_name)
-        file = open(file_path,'w')
-
-        # get sorted list (alphabetical, as displayed in outliner)
-        obj_list = collection.objects[:]
-        obj_list.sort(key=lambda obj: obj.name)
-
-        # loop over objects in collection
-        for obj in obj_list:
+        profiling.annotate(file=file_path)
+        with utils.ExportFile(file_path, newline=None) as file:
 
-            # source header
-            file.write("SOURCE " + obj.name + "\r\n")
+            # get sorted list (alphabetical, as displayed in outliner)
+            obj_list = collection.objects[:]
+            obj_list.sort(key=lambda obj: obj.name)
 
-            # source pos
-            loc = obj.matrix_world.translation
-            s = "  "
-            s += "POS = "
-            s += str(round(loc.x, round_factor)) + " " + str(round(loc.y, round_factor)) + " " + str(round(loc.z, round_factor))
-            s += " \r\n"
-            file.write(s)
-
-            # # source aim pos
-            # s = "  "
-            # s += "AIMPOS = "
-            # aimpos = mathutils.Vector([0, 0, 0])
-            # s += str(round(aimpos.x, round_factor)) + " " + str(round(aimpos.y, round_factor)) + " " + str(round(aimpos.z, round_factor))
-            # s += " \r\n"
-            # file.write(s)
-
-            file.write("END \r\n \r\n")
+            # write positions
+            file.write(utils.format_sources([obj.name for obj in obj_list], [obj.matrix_world.translation for obj in obj_list], round_factor))
 
         # write to file
-        if catt_io.debug: print('file saved to:', filePath)
-        file.close()
+        if catt_io.debug: print('file saved to:', file_path)
 
         self.report({'INFO'}, "Source export complete")
         return {'FINISHED'}
@@ -801,6 +1314,19 @@ class MESH_OT_catt_utils(Operator):
     # shape input argument
     arg: bpy.props.StringProperty(name='arg', default='')
 
+    @classmethod
+    def description(cls, context, properties):
+        """ per argument tooltip """
+
+        if properties.arg == 'orient_normals':
+            return "Flip faces of the room collection so that they face the air (inwards for walls, outwards for furnitures)"
+
+        if properties.arg == 'flag_edge_diffraction':
+            return "Flag faces of the room collection with sharp and long edges for automatic edge diffraction upon export"
+
+        return cls.__doc__
+
+    @profiled
     def execute(self, context):
         """ method called from ui """
 
@@ -854,3 +1380,85 @@ class MESH_OT_catt_utils(Operator):
                 self.report({'INFO'}, 'No non-flat face detected.')
 
             return {'FINISHED'}
+
+
+        # orient room faces towards the air (inwards for walls, outwards for furnitures)
+        elif self.arg == 'orient_normals':
+
+            # discard if room collection not defined
+            if catt_io.room_collection not in bpy.data.collections:
+                self.report({'ERROR'}, 'Room collection not defined')
+                return {'CANCELLED'}
+
+            # flipping faces requires object mode
+            if context.mode != 'OBJECT':
+                bpy.ops.object.mode_set(mode = 'OBJECT')
+
+            # get list of mesh objects in room collection
+            objects = utils.get_room_objects(catt_io, context.view_layer)
+
+            # classify faces orientation
+            if catt_io.debug: print('classifying faces orientation of {0} objects'.format(len(objects)))
+            flags = utils.get_inward_orientation_flags(objects)
+
+            # loop over objects, flip inverted faces (mesh data shared by linked duplicates is
+            # flipped once, from the first of its objects, faces counted per mesh)
+            num_flipped = 0
+            num_ambiguous = 0
+            processed_meshes = set()
+            for obj, flags_obj in zip(objects, flags):
+
+                if obj.data in processed_meshes: continue
+                processed_meshes.add(obj.data)
+
+                # discard if nothing to flip
+                num_ambiguous += int((flags_obj == 0).sum())
+                face_indices = np.flatnonzero(flags_obj == -1)
+                if len(face_indices) == 0: continue
+
+                # flip faces
+                if catt_io.debug: print('flipping {0} faces of {1}'.format(len(face_indices), obj.name))
+                utils.flip_mesh_faces(obj.data, face_indices)
+                num_flipped += len(face_indices)
+
+            self.report({'INFO'}, '{0} faces flipped, {1} ambiguous faces left untouched (open geometry?)'.format(num_flipped, num_ambiguous))
+
+            return {'FINISHED'}
+
+
+        # flag faces with acoustically relevant edges for automatic edge diffraction
+        elif self.arg == 'flag_edge_diffraction':
+
+            # discard if room collection not defined
+            if catt_io.room_collection not in bpy.data.collections:
+                self.report({'ERROR'}, 'Room collection not defined')
+                return {'CANCELLED'}
+
+            # attributes are only written back to mesh data in object mode
+            if context.mode != 'OBJECT':
+                bpy.ops.object.mode_set(mode = 'OBJECT')
+
+            # get list of mesh objects in room collection
+            objects = utils.get_room_objects(catt_io, context.view_layer)
+
+            # loop over objects (mesh data shared by linked duplicates is processed once)
+            num_flagged = 0
+            num_faces = 0
+            processed_meshes = set()
+            for obj in objects:
+
+                if obj.data in processed_meshes: continue
+                processed_meshes.add(obj.data)
+
+                # compute and store flags
+                flags = utils.get_diffraction_edge_flags(obj.data, obj.matrix_world, catt_io.edge_diffraction_angle, catt_io.edge_diffraction_length)
+                utils.set_face_flags(obj.data, utils.EDGE_DIFFRACTION_ATTRIBUTE, flags)
+
+                # update locals
+                num_flagged += int(flags.sum())
+                num_faces += len(flags)
+                if catt_io.debug: print('flagged {0}/{1} faces of {2} for edge diffraction'.format(int(flags.sum()), len(flags), obj.name))
+
+            self.report({'INFO'}, '{0}/{1} faces flagged for edge diffraction'.format(num_flagged, num_faces))
+
+            return {'FINISHED'}
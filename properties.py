@@ -0,0 +1,344 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Add-on settings, stored per scene (scene.catt_io)
+
+import bpy
+import math
+
+from bpy.props import (
+    StringProperty,
+    BoolProperty,
+    # IntProperty,
+    FloatProperty,
+    FloatVectorProperty,
+    EnumProperty,
+)
+
+from bpy.types import (
+    PropertyGroup,
+)
+
+
+def get_embedded_text_names(self, context):
+    """populate comments drop down with embedded text file names"""
+
+    # init
+    out = []
+    out.append(("DISABLED", "Disabled", "", 1))
+
+    # loop over text files
+    for i_key, key in enumerate(bpy.data.texts.keys()):
+        out.append((key, key, "", i_key+2))
+
+    return out
+
+
+class SceneProperties(PropertyGroup):
+
+    export_path: StringProperty(
+        name="Export Folder",
+        description="Path to the directory where the file will be saved",
+        default="//",
+        maxlen=1024,
+        subtype="DIR_PATH",
+    )
+
+    live_export: BoolProperty(
+        name="Live Export",
+        description='Re-export room, sources and receivers files once edits of the objects and materials they hold settle (files with unchanged content are not rewritten)',
+        default=False,
+    )
+
+    live_export_delay: FloatProperty(
+        name="Delay",
+        description="Time (in s) without edits before live export runs",
+        default=1.0,
+        min=0.1, max=60.0, soft_min=0.2, soft_max=10.0,
+    )
+
+    debug: BoolProperty(
+        name="Show Console Logs",
+        description='Print logs to blender console',
+        default=False,
+    )
+
+    profile: BoolProperty(
+        name="Profile",
+        description='Track peak memory of each stage of add-on operations (slower) and write stage timings to a .profile.json file next to exported files',
+        default=False,
+    )
+
+    room_file_name: StringProperty(
+        name="File",
+        description="Name of the room file created upon export",
+        default="master.geo",
+        maxlen=1024,
+    )
+
+    lint_export: BoolProperty(
+        name="Check Exported File",
+        description='Check the exported room file (and included files) for errors CATT would fail on (undefined or duplicate corners, planes and materials, too long names and lines), listed in the console',
+        default=False,
+    )
+
+    export_hidden_collections: BoolProperty(
+        name="Export Hidden Collections",
+        description='Export objects of room sub collections hidden in the viewport (excluded collections are never exported)',
+        default=True,
+    )
+
+    triangulate_faces: BoolProperty(
+        name="Triangulate Faces",
+        description='Transform ngons in triangles upon export',
+        default=False,
+    )
+
+    apply_modifiers: BoolProperty(
+        name="Apply Modifiers",
+        description='Apply objects modifiers upon export',
+        default=False,
+    )
+
+    merge_objects: BoolProperty(
+        name="Merge Objects",
+        description='Merge objects into single mesh upon export (enables remove duplicate vertices)',
+        default=False,
+    )
+
+    split_collections: BoolProperty(
+        name="Split by Collection",
+        description='Export one .GEO file per first level collection of the room collection, included in a master file holding materials (files written concurrently)',
+        default=False,
+    )
+
+    stream_export: BoolProperty(
+        name="Low Memory Export",
+        description='Extract, write and free objects one at a time upon export (corners and planes buffered in temporary files), for rooms too large to hold in memory. Ignored if objects are merged',
+        default=False,
+    )
+
+    frequency_bands: FloatVectorProperty(
+        name="Frequency Bands",
+        description='Frequency bands (in Hz) for which absorption/diffraction coefs are defined',
+        size=8,
+        default=(125, 250, 500, 1000, 2000, 4000, 8000, 16000),
+    )
+
+    rm_duplicates_dist: FloatProperty(
+        name="Merge Vertices Distance",
+        description='Distance (in m) below which two vertices are merged when creating the export mesh',
+        default=1e-7,
+        min=0.0, max=1.0, soft_min=0.0, soft_max=1.0,
+    )
+
+    sweep_table_path: StringProperty(
+        name="Sweep Table",
+        description="Path to a .csv table of material variants (columns: variant, name, abs_*, dif_*, estimate), exported as one .GEO file per variant including the room geometry",
+        default="",
+        maxlen=1024,
+        subtype="FILE_PATH",
+    )
+
+    edge_diffraction_angle: FloatProperty(
+        name="Min Edge Angle",
+        description="Angle between the normals of two adjacent faces above which their common edge is flagged for automatic edge diffraction",
+        default=math.radians(30.0),
+        min=0.0, max=math.pi,
+        subtype="ANGLE",
+    )
+
+    edge_diffraction_length: FloatProperty(
+        name="Min Edge Length",
+        description="Length (in m) below which edges are not flagged for automatic edge diffraction",
+        default=0.5,
+        min=0.0, soft_max=10.0,
+        unit="LENGTH",
+    )
+
+    export_face_ids: BoolProperty(
+        name="Export Face IDs",
+        description='Add face id information in exported plane names (for debug purpose)',
+        default=False,
+    )
+
+    # export_progress: IntProperty(
+    #         name="Progress", description="",
+    #         default=0,
+    #         min=0, max=100,
+    #         step=1, subtype='PERCENTAGE'
+    #         )
+
+    editor_scripts: EnumProperty(
+        name="Comments",
+        description="Select an embedded text, its content will be added as comments at the top of the exported .GEO file",
+        items=get_embedded_text_names,
+    )
+
+    material_library_path: StringProperty(
+        name="Library",
+        description="Path to a material library file (.json or .csv) of absorption/diffraction coefficients",
+        default="",
+        maxlen=1024,
+        subtype="FILE_PATH",
+    )
+
+    material_library_search: StringProperty(
+        name="Search",
+        description="Search material library by name",
+        default="",
+        maxlen=1024,
+        options={'TEXTEDIT_UPDATE'},
+    )
+
+    material_library_fuzzy: BoolProperty(
+        name="Fuzzy Matching",
+        description='Match blender materials to library entries with similar (not only identical) names',
+        default=False,
+    )
+
+    import_procedural: BoolProperty(
+        name="Expand Procedural Syntax",
+        description="Expand CATT procedural syntax (INCLUDE, GLOBAL/LOCAL variables, expressions, transforms) of imported files into explicit corners and planes, included files parsed once per session (files without INCLUDE, GLOBAL, LOCAL nor transform statements parsed directly)",
+        default=False,
+    )
+
+    import_hierarchy: BoolProperty(
+        name="Rebuild Hierarchy",
+        description="Rebuild collections and objects from plane names written upon export (collection-object[-faceid]), instead of one object per plane name",
+        default=True,
+    )
+
+    import_instances: BoolProperty(
+        name="Linked Duplicates",
+        description="Import objects identical up to a rigid transform (e.g. seats) as linked duplicates sharing a single mesh",
+        default=True,
+    )
+
+    import_proxies: BoolProperty(
+        name="Proxy Import",
+        description="Import objects as bounding boxes, realised into their full mesh when selected (or with Realize Proxies). Parsed data is saved to a .catt.npz file next to the .GEO file and reused while the file is unchanged",
+        default=False,
+    )
+
+    proxy_realize_selected: BoolProperty(
+        name="Realize Selected",
+        description="Realise proxy objects into their full mesh as soon as they are selected",
+        default=True,
+    )
+
+    diff_reference_path: StringProperty(
+        name="Compare With",
+        description="Reference .GEO file imported rooms are compared with: faces coloured by change ('catt_diff' colour attribute), removed planes imported in a separate collection",
+        default="",
+        maxlen=1024,
+        subtype="FILE_PATH",
+    )
+
+    diff_dist: FloatProperty(
+        name="Diff Distance",
+        description="Distance (in m) under which corners of compared files are considered identical",
+        default=0.01,
+        min=0.0, max=1.0, soft_min=0.001, soft_max=0.1,
+    )
+
+    room_collection: StringProperty(
+        name="Room",
+        description="Collection of objects to export as room",
+        default="", maxlen=1024,
+    )
+
+    reverb_file_name: StringProperty(
+        name="File",
+        description="Name of the reverberation times file created upon reverberation preview",
+        default="rt60.csv",
+        maxlen=1024,
+    )
+
+    visibility_file_name: StringProperty(
+        name="File",
+        description="Name of the source/receiver visibility matrix file (path lengths are saved next to it, with a _length suffix)",
+        default="visibility.csv",
+        maxlen=1024,
+    )
+
+    receiver_file_name: StringProperty(
+        name="File",
+        description="Name of the file created upon export",
+        default="rec.loc",
+        maxlen=1024,
+    )
+
+    receiver_object: StringProperty(
+        name="Receiver",
+        description="Object which animation will be exported as receiver positions",
+        default="", maxlen=1024,
+    )
+
+    receiver_collection: StringProperty(
+        name="Receivers",
+        description="Collection of objects to export as receivers",
+        default="", maxlen=1024,
+    )
+
+    receiver_export_type: EnumProperty(
+        name="Export",
+        description="Export either animated object or collection of objects",
+        items=[("ANIMATED", "Object/Animation", ""), ("COLLECTION", "Collection", "")],
+        default="COLLECTION"
+    )
+
+    receiver_dist_thresh: FloatProperty(
+        name="Merge Distance",
+        description="Minimum distance (in m) between two exported positions along animation curve",
+        default=0,
+        min=0.0, max=100.0, soft_min=0.0, soft_max=100.0,
+    )
+
+    source_file_name: StringProperty(
+        name="File",
+        description="Name of the file created upon export",
+        default="src.loc",
+        maxlen=1024,
+    )
+
+    source_object: StringProperty(
+        name="Source",
+        description="Object which animation will be exported as source positions",
+        default="", maxlen=1024,
+    )
+
+    source_collection: StringProperty(
+        name="Sources",
+        description="Collection of objects to export as sources",
+        default="", maxlen=1024,
+    )
+
+    source_export_type: EnumProperty(
+        name="Export",
+        description="Export either animated object or collection of objects",
+        items=[("ANIMATED", "Object/Animation", ""), ("COLLECTION", "Collection", "")],
+        default="COLLECTION"
+    )
+
+    source_dist_thresh: FloatProperty(
+        name="Merge Distance",
+        description="Minimum distance (in m) between two exported positions along animation curve",
+        default=0,
+        min=0.0, max=100.0, soft_min=0.0, soft_max=100.0,
+    )
@@ -0,0 +1,74 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Proxy import: bounding boxes of proxy imported objects realised into their full mesh once selected
+# (depsgraph handler, realisation deferred to a timer out of the handler)
+
+import bpy
+from bpy.app.handlers import persistent
+from . import utils
+
+
+@persistent
+def depsgraph_update_post_handler(scene, depsgraph):
+    """ schedule realisation of selected proxy objects (proxies that failed to realise are skipped
+    until their sidecar file changes) """
+
+    # discard if disabled, or already scheduled
+    if not scene.catt_io.proxy_realize_selected or bpy.app.timers.is_registered(realize_selected): return
+
+    # discard if no proxy to realise selected
+    if not any(utils.is_proxy_pending(obj) for obj in bpy.context.selected_objects): return
+
+    bpy.app.timers.register(realize_selected, first_interval=0.0)
+
+
+def realize_selected():
+    """ timer callback: realise selected proxy objects """
+
+    objects = [obj for obj in bpy.context.selected_objects if utils.is_proxy_pending(obj)]
+    num_realized, missing = utils.realize_proxy_objects(objects)
+    if len(missing) > 0: print('proxy import: data file(s) not found or rewritten since import, re-import to realise:', ', '.join(missing))
+    if bpy.context.scene.catt_io.debug: print('proxy import:', num_realized, 'object(s) realised')
+
+    return None
+
+
+@persistent
+def load_post_handler(dummy):
+    """ forget sidecar files columns loaded for the previous file """
+
+    utils.proxy_columns.clear()
+
+
+def register():
+
+    bpy.app.handlers.depsgraph_update_post.append(depsgraph_update_post_handler)
+    bpy.app.handlers.load_post.append(load_post_handler)
+
+
+def unregister():
+
+    if depsgraph_update_post_handler in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(depsgraph_update_post_handler)
+
+    if load_post_handler in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(load_post_handler)
+
+    if bpy.app.timers.is_registered(realize_selected):
+        bpy.app.timers.unregister(realize_selected)
@@ -0,0 +1,29 @@
+# Shared test setup, run with: python -m pytest tests
+# The bpy stand-in (utils/bpy_standin.py) is installed before any add-on module is imported, so that
+# add-on modules (not only the bpy-free core library) are importable outside Blender
+
+import importlib
+import os
+import sys
+import pytest
+
+ADDON_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ADDON_PATH, 'utils'))
+sys.path.insert(0, os.path.dirname(ADDON_PATH))
+
+import bpy_standin
+bpy_standin.install()
+
+
+@pytest.fixture
+def addon():
+    """ add-on registered in an empty stand-in scene (load handlers called, as upon file load) """
+
+    bpy_standin.reset()
+    module = importlib.import_module(os.path.basename(ADDON_PATH))
+    module.register()
+    for handler in list(sys.modules['bpy'].app.handlers.load_post): handler(None)
+
+    yield module
+
+    module.unregister()
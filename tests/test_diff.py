@@ -0,0 +1,52 @@
+# Tests of the geometric diff of .GEO files (bpy-free core library), run with: python -m pytest tests
+
+import importlib
+import os
+import sys
+
+# import core library from the add-on folder, whatever its name
+ADDON_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(ADDON_PATH))
+diff = importlib.import_module(os.path.basename(ADDON_PATH) + '.core.diff')
+
+
+def get_geo(corners, planes):
+    """ return [vertices, faces] dicts (as parse_geo_file) of corners (id: xyz) and planes (id: (name, corner ids, material)) """
+
+    vertices = {corner_id: {'xyz': xyz} for corner_id, xyz in corners.items()}
+    faces = {plane_id: {'obj_name': name, 'vertices': ids, 'material': material} for plane_id, (name, ids, material) in planes.items()}
+
+    return [vertices, faces]
+
+
+def test_diff_is_independent_of_numbering():
+
+    # a: wall, floor, seat, column / b: renumbered wall (within dist), floor rematerialed,
+    # seat translated, column removed, door added
+    geo_a = get_geo(
+        {0: [0, 0, 0], 1: [1, 0, 0], 2: [0, 1, 0], 3: [0, 0, 1], 4: [5, 5, 0], 5: [6, 5, 0], 6: [5, 6, 0], 7: [9, 9, 9]},
+        {1: ('wall', [0, 1, 2], 'concrete'), 2: ('floor', [0, 1, 3], 'wood'), 3: ('seat', [4, 5, 6], 'fabric'), 4: ('column', [7, 0, 1], 'concrete')})
+    geo_b = get_geo(
+        {10: [0.005, 0, 0], 11: [0, 1, 0], 12: [1, 0, 0], 13: [0, 0, 1], 14: [5, 5, 2], 15: [6, 5, 2], 16: [5, 6, 2], 17: [3, 3, 3]},
+        {7: ('wall', [10, 12, 11], 'concrete'), 8: ('floor', [10, 12, 13], 'carpet'), 9: ('seat', [14, 15, 16], 'fabric'), 10: ('door', [17, 10, 11], 'wood')})
+
+    result = diff.diff_geometry(geo_a, geo_b)
+
+    assert result['unchanged'] == [(1, 7)]
+    assert result['rematerialed'] == [(2, 8, 'wood', 'carpet')]
+    assert [(plane_a, plane_b) for plane_a, plane_b, translation in result['moved']] == [(3, 9)]
+    assert result['moved'][0][2] == [0, 0, 2]
+    assert result['removed'] == [4]
+    assert result['added'] == [10]
+    assert result['status_b'].tolist() == [diff.UNCHANGED, diff.REMATERIALED, diff.MOVED, diff.ADDED]
+
+
+def test_identical_files_have_no_diff(tmp_path):
+
+    file_path = tmp_path / 'room.geo'
+    file_path.write_text('CORNERS\n1 0 0 0\n2 1 0 0\n3 0 1 0\nPLANES\n[ 1 wall / 1 2 3 / concrete ]\n')
+
+    result = diff.diff_geo_files(str(file_path), str(file_path))
+
+    assert result['unchanged'] == [(1, 1)]
+    assert diff.format_diff(result) == '1 unchanged, 0 moved, 0 rematerialed, 0 removed, 0 added planes'
@@ -0,0 +1,74 @@
+# Room export tests, run against the bpy stand-in (see conftest.py)
+
+import os
+import pytest
+import bpy
+import bpy_standin as standin
+
+
+def export_room(tmp_path, **settings):
+    """ export room collection 'room' to tmp_path, return planes lines of the exported file """
+
+    catt_io = bpy.context.scene.catt_io
+    catt_io.room_collection = 'room'
+    catt_io.export_path = str(tmp_path)
+    for key, value in settings.items(): setattr(catt_io, key, value)
+
+    assert bpy.ops.catt.export_room() == {'FINISHED'}
+
+    with open(tmp_path / catt_io.room_file_name) as file:
+        return [line for line in file if line.startswith('[')]
+
+
+def test_hidden_room_objects_are_exported(addon, tmp_path):
+
+    # objects hidden, and in a collection disabled in viewports (not evaluated by the depsgraph)
+    room = standin.new_collection('room')
+    disabled = standin.new_collection('disabled', room)
+    disabled.hide_viewport = True
+    mat = standin.new_catt_material('wall')
+    standin.new_mesh_object('visible', [[0, 0, 0], [1, 0, 0], [0, 1, 0]], [[0, 1, 2]], [mat], room)
+    standin.new_mesh_object('hidden', [[0, 0, 1], [1, 0, 1], [0, 1, 1]], [[0, 1, 2]], [mat], room).hidden = True
+    standin.new_mesh_object('inside', [[0, 0, 2], [1, 0, 2], [0, 1, 2]], [[0, 1, 2]], [mat], disabled)
+
+    planes = export_room(tmp_path)
+
+    assert sorted(line.split()[2] for line in planes) == ['disabled-inside', 'room-hidden', 'room-visible']
+
+
+def test_collection_instances_are_exported(addon, tmp_path):
+
+    # collection outside the room, instanced twice in the room (second instancer hidden)
+    room = standin.new_collection('room')
+    seats = standin.new_collection('seats')
+    mat = standin.new_catt_material('seat')
+    standin.new_mesh_object('seat', [[0, 0, 0], [1, 0, 0], [0, 1, 0]], [[0, 1, 2]], [mat], seats)
+    for name, hidden in (('row', False), ('hidden row', True)):
+        instancer = bpy.data.objects.new(name, None)
+        instancer.instance_type, instancer.instance_collection, instancer.hidden = 'COLLECTION', seats, hidden
+        room.objects.link(instancer)
+
+    planes = export_room(tmp_path)
+
+    assert [line.split()[2] for line in planes] == ['room-row']
+
+
+def test_sweep_table_errors(addon, tmp_path):
+
+    room = standin.new_collection('room')
+    standin.new_mesh_object('wall', [[0, 0, 0], [1, 0, 0], [0, 1, 0]], [[0, 1, 2]], [standin.new_catt_material('concrete.old')], room)
+    catt_io = bpy.context.scene.catt_io
+    catt_io.room_collection, catt_io.export_path, catt_io.sweep_table_path = 'room', str(tmp_path), str(tmp_path / 'sweep.csv')
+
+    # empty variant name
+    (tmp_path / 'sweep.csv').write_text('variant,name,abs_125\nhard,concrete.old,10\n,concrete.old,50\n')
+    with pytest.raises(RuntimeError, match='empty variant name for material concrete.old'): bpy.ops.catt.export_room_sweep()
+
+    # material name not found in the room (typo)
+    (tmp_path / 'sweep.csv').write_text('variant,name,abs_125\nhard,concrete.old,10\nsoft,concret_old,50\n')
+    with pytest.raises(RuntimeError, match='not found in the room: concret_old'): bpy.ops.catt.export_room_sweep()
+
+    # blender and catt material names
+    (tmp_path / 'sweep.csv').write_text('variant,name,abs_125\nhard,concrete.old,10\nsoft,concrete_old,50\n')
+    assert bpy.ops.catt.export_room_sweep() == {'FINISHED'}
+    assert sorted(os.listdir(tmp_path)) == ['master_geometry.geo', 'master_hard.geo', 'master_soft.geo', 'sweep.csv']
@@ -0,0 +1,61 @@
+# Tests of exported files writing (bpy-free core library), run with: python -m pytest tests
+
+import importlib
+import os
+import sys
+
+# import core library from the add-on folder, whatever its name
+ADDON_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(ADDON_PATH))
+files = importlib.import_module(os.path.basename(ADDON_PATH) + '.core.files')
+
+
+def write(file_path, text):
+    """ write text with ExportFile, return whether file was replaced """
+
+    with files.ExportFile(str(file_path)) as file: file.write(text)
+
+    return file.changed
+
+
+def test_unchanged_content_keeps_file(tmp_path):
+
+    file_path = tmp_path / 'room.geo'
+    assert write(file_path, 'CORNERS\n1 0 0 0\n')
+    checksum = files.read_checksum(str(file_path))
+    os.utime(file_path, (0, 0))
+
+    # same content: file untouched, no temporary file left
+    assert not write(file_path, 'CORNERS\n1 0 0 0\n')
+    assert os.path.getmtime(file_path) == 0
+    assert os.listdir(tmp_path) == ['room.geo']
+
+    # new content: file replaced, checksum updated
+    assert write(file_path, 'CORNERS\n1 0 0 1\n')
+    assert files.read_checksum(str(file_path)) not in (None, checksum)
+    assert file_path.read_bytes().endswith(b'1 0 0 1\r\n')
+
+
+def test_failed_write_keeps_file(tmp_path):
+
+    file_path = tmp_path / 'room.geo'
+    write(file_path, 'CORNERS\n')
+
+    try:
+        with files.ExportFile(str(file_path)) as file:
+            file.write('PLANES\n')
+            raise RuntimeError('export failed')
+    except RuntimeError:
+        pass
+
+    assert not file.changed
+    assert os.listdir(tmp_path) == ['room.geo']
+    assert file_path.read_bytes().endswith(b'CORNERS\r\n')
+
+
+def test_checksum_of_foreign_files(tmp_path):
+
+    (tmp_path / 'room.geo').write_text('CORNERS\n')
+
+    assert files.read_checksum(str(tmp_path / 'room.geo')) is None
+    assert files.read_checksum(str(tmp_path / 'missing.geo')) is None
@@ -0,0 +1,89 @@
+# Tests of .GEO file reading and writing (bpy-free core library), run with: python -m pytest tests
+
+import importlib
+import os
+import sys
+import numpy as np
+
+# import core library from the add-on folder, whatever its name
+ADDON_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(ADDON_PATH))
+geo = importlib.import_module(os.path.basename(ADDON_PATH) + '.core.geo')
+
+
+def test_parse_warnings_and_errors_are_all_printed(tmp_path, capsys):
+
+    # materials with missing bands, planes broken over several lines
+    file_path = tmp_path / 'room.geo'
+    file_path.write_text(''.join('abs m{0} = < 10 > L < 20 > {{ 1 2 3 }}\n'.format(i) for i in range(5)) + 'CORNERS\n1 0 0 0\nPLANES\n' + '[ 1 wall / 1 2\n' * 5)
+
+    [vertices, faces, materials, error_detected] = geo.parse_geo_file(str(file_path), False)
+    output = capsys.readouterr().out
+
+    assert error_detected
+    assert output.count('WARNING') == 10
+    assert output.count('ERROR') == 5
+    assert all('at line {0}'.format(line_id) in output for line_id in range(9, 14))
+
+
+def get_triangles_part(vertices, names, materials):
+    """ return export part of consecutive triangles ('*' name suffixes flag edge diffraction, as on export) """
+
+    num_faces = len(vertices) // 3
+
+    return {
+        'vertices': np.array(vertices, dtype=np.float64),
+        'loop_starts': np.arange(num_faces) * 3, 'loop_totals': np.full(num_faces, 3), 'loop_vertices': np.arange(3 * num_faces),
+        'names': [name.rstrip('*') for name in names], 'materials': materials, 'diffraction': np.array([name.endswith('*') for name in names]),
+    }
+
+
+def test_formatted_geometry_parses_back(tmp_path):
+
+    # two parts (ids of second part offset by the first), diffraction flag on one plane
+    parts = [
+        get_triangles_part([[0, 0, 0], [1, 0, 0], [0, 1, 0]], ['room-wall'], ['concrete']),
+        get_triangles_part([[0, 0, 2], [1.25, 0, 2], [0, 1, 2], [5, 5, 5], [6, 5, 5], [5, 6, 5]], ['room-ceiling', 'room-beam*'], ['plaster', 'wood']),
+    ]
+    file_path = tmp_path / 'room.geo'
+    file_path.write_text('abs concrete = < {0} > L < {0} > {{ 1 2 3 }}\n'.format(geo.bands_to_str([10] * 8)) + ''.join(geo.format_geometry(parts)))
+
+    [vertices, faces, materials, error_detected] = geo.parse_geo_file(str(file_path), False)
+
+    assert not error_detected
+    assert materials['concrete']['absorption'] == [10.0] * 8
+    assert [vertices[i]['xyz'] for i in range(len(vertices))] == [[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 2], [1.25, 0, 2], [0, 1, 2], [5, 5, 5], [6, 5, 5], [5, 6, 5]]
+    assert [(face['obj_name'], face['vertices'], face['material']) for face in faces.values()] == [
+        ('room-wall', [0, 1, 2], 'concrete'), ('room-ceiling', [3, 4, 5], 'plaster'), ('room-beam*', [6, 7, 8], 'wood')]
+
+
+def test_bands_after_colon_frequency():
+
+    assert geo.bands_to_str([10, 20, 30, 40, 50, 60, 70, 80]) == '10.0 20.0 30.0 40.0 50.0 60.0 : 70.0 80.0'
+    assert geo.bands_to_str([10.04, 20, 30, 40, 50, 60]) == '10.0 20.0 30.0 40.0 50.0 60.0'
+    assert geo.bands_to_str([1, 2, 3], frequency_bands=(2000, 4000, 8000)) == '1.0 2.0 : 3.0'
+
+
+def test_close_pairs():
+
+    points = [[0, 0, 0], [1, 0, 0], [0, 0, 0], [1.005, 0, 0], [0, 0, 0], [3, 3, 3]]
+
+    # exact matches paired with first identical point only
+    assert geo.get_close_pairs(points, 0).tolist() == [[0, 2], [0, 4]]
+
+    # every pair within distance, across grid cells
+    assert geo.get_close_pairs(points, 0.01).tolist() == [[0, 2], [0, 4], [1, 3], [2, 4]]
+    assert geo.get_close_pairs(np.random.default_rng(0).random((500, 3)) * 100, 0.0).shape == (0, 2)
+
+
+def test_mirroring_transform_reverses_winding():
+
+    part = get_triangles_part([[0, 0, 0], [1, 0, 0], [0, 1, 0]], ['wall'], ['concrete'])
+
+    moved = geo.transform_arrays(part, [[1, 0, 0, 2], [0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]])
+    mirrored = geo.transform_arrays(part, [[-1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]])
+
+    assert moved['vertices'].tolist() == [[2, 0, 0], [3, 0, 0], [2, 1, 0]]
+    assert moved['loop_vertices'].tolist() == [0, 1, 2]
+    assert mirrored['loop_vertices'].tolist() == [0, 2, 1]
+    assert part['loop_vertices'].tolist() == [0, 1, 2]
@@ -0,0 +1,73 @@
+# Tests of the objects hierarchy of parsed .GEO files (bpy-free core library), run with: python -m pytest tests
+
+import importlib
+import os
+import sys
+import time
+import numpy as np
+
+# import core library from the add-on folder, whatever its name
+ADDON_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(ADDON_PATH))
+hierarchy = importlib.import_module(os.path.basename(ADDON_PATH) + '.core.hierarchy')
+
+
+def get_quad(width, depth, angle=0.0, translation=(0.0, 0.0, 0.0)):
+    """ return part of a single quad, rotated around z and translated (corners rounded to cm) """
+
+    rotation = np.array([[np.cos(angle), -np.sin(angle), 0.0], [np.sin(angle), np.cos(angle), 0.0], [0.0, 0.0, 1.0]])
+    vertices = np.array([[0.0, 0.0, 0.0], [width, 0.0, 0.0], [width, depth, 0.0], [0.0, depth, 0.0]]) @ rotation.T + translation
+
+    return {'collection': '', 'name': 'quad', 'vertices': np.round(vertices, 2), 'polygons': [[0, 1, 2, 3]], 'materials': ['wall']}
+
+
+def test_split_plane_names():
+
+    split = hierarchy.split_plane_names(['room-seat-0', 'room-seat-1', 'wall*', 'room-door-2'])
+
+    assert split['room-seat-0'] == ('room', 'seat', 0)
+    assert split['room-seat-1'] == ('room', 'seat', 1)
+    assert split['wall*'] == ('', 'wall*', None)
+    assert split['room-door-2'] == ('room', 'door-2', None)
+
+
+
+def test_object_parts_rebuilt_from_plane_names():
+
+    # collection instance exported twice (face ids repeated), object without collection
+    vertices = {i: {'xyz': [i, 0, i % 2]} for i in range(6)}
+    names = ['room-seat-0', 'room-seat-1', 'room-seat-0', 'room-seat-1', 'wall']
+    faces = {plane_id: {'obj_name': name, 'vertices': [plane_id % 3, 3, 4 + plane_id % 2], 'material': 'wood'} for plane_id, name in enumerate(names, 1)}
+
+    parts = hierarchy.get_object_parts(vertices, faces)
+
+    assert [(part['collection'], part['name'], part['plane_ids']) for part in parts] == [('room', 'seat', [1, 2]), ('room', 'seat', [3, 4]), ('', 'wall', [5])]
+    assert parts[0]['polygons'] == [[0, 1, 2], [3, 1, 4]]
+    assert parts[0]['vertices'].tolist() == [[1, 0, 1], [3, 0, 1], [5, 0, 1], [2, 0, 0], [4, 0, 0]]
+
+    # one part per plane name without hierarchy
+    flat = hierarchy.get_object_parts(vertices, faces, rebuild_hierarchy=False)
+    assert [(part['collection'], part['name'], part['plane_ids']) for part in flat] == [('', 'room-seat-0', [1, 3]), ('', 'room-seat-1', [2, 4]), ('', 'wall', [5])]
+
+def test_rigid_copies_are_instances():
+
+    parts = [get_quad(1.2, 0.8, angle, (angle, 2 * angle, 0.0)) for angle in np.linspace(0.0, 3.0, 10)] + [get_quad(1.3, 0.8)]
+
+    instances = hierarchy.find_instances(parts)
+
+    assert [reference for reference, matrix in instances] == [0] * 10 + [10]
+    mapped = parts[0]['vertices'] @ instances[5][1][:3, :3].T + instances[5][1][:3, 3]
+    assert np.abs(mapped - parts[5]['vertices']).max() <= hierarchy.INSTANCE_TOLERANCE
+
+
+def test_distinct_parts_of_same_topology_are_fast():
+
+    # thousands of single quads sharing topology and material, but of distinct sizes
+    widths = np.linspace(0.5, 200.0, 4000)
+    parts = [get_quad(width, 0.5) for width in widths]
+
+    time_start = time.perf_counter()
+    instances = hierarchy.find_instances(parts)
+
+    assert time.perf_counter() - time_start < 2.0
+    assert [reference for reference, matrix in instances] == list(range(len(parts)))
@@ -0,0 +1,36 @@
+# Regression tests of the .GEO file checker (bpy-free core library), run with: python -m pytest tests
+
+import importlib
+import os
+import sys
+
+# import core library from the add-on folder, whatever its name
+ADDON_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(ADDON_PATH))
+lint = importlib.import_module(os.path.basename(ADDON_PATH) + '.core.lint')
+
+
+def test_sparse_id_stays_defined_when_dense_range_grows():
+
+    # id beyond the initial dense range, then enough ids for the dense range to cover it
+    table = lint.IdTable()
+    table.define(3000000, 3)
+    for index in range(1, 800001): table.define(index, index + 3)
+
+    assert table.get_flags(3000000) & table.DEFINED
+    assert table.get_location(3000000) == (0, 3)
+    assert table.define(3000000, 1) == (0, 3)
+
+
+def test_plane_referencing_sparse_corner(tmp_path):
+
+    # corner with a large id defined first, plane referencing it after many corners
+    file_path = tmp_path / 'room.geo'
+    with open(file_path, 'w') as file:
+        file.write('abs wall = < 5 5 5 5 5 5 5 5 > L < 10 10 10 10 10 10 10 10 > { 200 200 200 }\nCORNERS\n3000000 0 0 0\n')
+        file.writelines('{0} {0} 0 0\n'.format(index) for index in range(1, 800001))
+        file.write('PLANES\n[ 1 wall / 3000000 1 2 / wall ]\n')
+
+    issues = lint.lint_geo_file(str(file_path))
+
+    assert [issue for issue in issues if issue['severity'] == lint.ERROR] == []
@@ -0,0 +1,36 @@
+# Live export tests, run against the bpy stand-in (see conftest.py)
+
+import bpy
+import bpy_standin as standin
+
+
+def test_edits_of_collections_instanced_in_room_are_exported(addon, tmp_path):
+
+    # seats collection outside the room, instanced in the room
+    room = standin.new_collection('room')
+    seats = standin.new_collection('seats')
+    mat = standin.new_catt_material('seat')
+    seat = standin.new_mesh_object('seat', [[0, 0, 0], [1, 0, 0], [0, 1, 0]], [[0, 1, 2]], [mat], seats)
+    instancer = bpy.data.objects.new('row', None)
+    instancer.instance_type, instancer.instance_collection = 'COLLECTION', seats
+    room.objects.link(instancer)
+
+    # live export settings
+    catt_io = bpy.context.scene.catt_io
+    catt_io.room_collection = 'room'
+    catt_io.export_path = str(tmp_path)
+    catt_io.live_export = True
+    catt_io.live_export_delay = 0.0
+    file_path = tmp_path / catt_io.room_file_name
+
+    # first export
+    standin.notify_update(standin.DepsgraphUpdate(instancer, is_updated_transform=True))
+    standin.run_timers(0.01)
+    assert '1 0.00 0.00 0.00' in file_path.read_text()
+
+    # move instanced object: room exported again, instancer section not reused
+    seat.location = (5.0, 0.0, 0.0)
+    standin.notify_update(standin.DepsgraphUpdate(seat, is_updated_transform=True))
+    assert 'room' in addon.live_export.state['pending']
+    standin.run_timers(0.01)
+    assert '1 5.00 0.00 0.00' in file_path.read_text()
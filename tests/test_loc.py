@@ -0,0 +1,35 @@
+# Tests of receivers and sources files content (bpy-free core library), run with: python -m pytest tests
+
+import importlib
+import os
+import sys
+
+# import core library from the add-on folder, whatever its name
+ADDON_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(ADDON_PATH))
+loc = importlib.import_module(os.path.basename(ADDON_PATH) + '.core.loc')
+
+
+def test_duplicates_removed_against_kept_points_only():
+
+    # 1 close to 0 (removed), 2 close to 1 only (kept, 1 was removed)
+    points = [(0.0, 0.0, 0.0), (0.4, 0.0, 0.0), (0.8, 0.0, 0.0), (0.0, 0.1, 0.0), (5.0, 5.0, 5.0)]
+
+    [points_filtered, ids_filtered] = loc.remove_duplicates(points, 0.5)
+
+    assert ids_filtered == [0, 2, 4]
+    assert points_filtered == [points[0], points[2], points[4]]
+
+
+def test_catt_source_names():
+
+    names = loc.get_catt_source_names()
+
+    assert len(names) == 260 and len(set(names)) == 260
+    assert names[:3] == ['A0', 'A1', 'A2'] and names[-1] == 'Z9'
+
+
+def test_receivers_and_sources_content():
+
+    assert loc.format_receivers([(1.234, 2, 3), (4, 5.678, 6)], first_id=9) == 'RECEIVERS \r\n09 1.23 2.0 3.0 \r\n10 4.0 5.68 6.0 \r\n'
+    assert loc.format_sources(['A0'], [(1, 2.005, 3, 1)]) == 'SOURCE A0\r\n  POS = 1.0 2.0 3.0 \r\nEND \r\n \r\n'
@@ -0,0 +1,35 @@
+# Tests of the absorption coefficient library (bpy-free core library), run with: python -m pytest tests
+
+import importlib
+import os
+import sys
+import pytest
+
+# import core library from the add-on folder, whatever its name
+ADDON_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(ADDON_PATH))
+material_library = importlib.import_module(os.path.basename(ADDON_PATH) + '.core.material_library')
+
+
+def test_library_match_and_padding():
+
+    library = material_library.MaterialLibrary.from_dict({'Concrete': {'abs': [1, 2, 3], 'estimate': 0.1}, 'Carpet': {'abs': [5], 'dif': [10, 20]}})
+
+    assert library.match('concrete.001') == library.get('CONCRETE')
+    assert library.match('concret') == library.get('concrete')
+    assert library.match('concret', fuzzy=False) is None
+    assert library.get_coefs(library.get('concrete'), 5) == [[1, 2, 3, 3, 3], None, 0.1]
+    assert library.get_coefs(library.get('carpet'), 3) == [[5, 5, 5], [10, 20, 20], None]
+
+
+def test_sweep_table(tmp_path):
+
+    file_path = tmp_path / 'sweep.csv'
+    file_path.write_text('variant,name,abs_125,abs_250,estimate\nhard,wall,1,2,\nsoft,wall,50,,0.3\nhard,floor,3,,\n')
+
+    variants = material_library.read_sweep_table(str(file_path), 3)
+
+    assert variants == [('hard', {'wall': {'abs': [1, 2, 2]}, 'floor': {'abs': [3, 3, 3]}}), ('soft', {'wall': {'abs': [50, 50, 50], 'diff_estimate': 0.3, 'use_diffraction': 1, 'is_diff_estimate': 1}})]
+
+    file_path.write_text('variant,name,abs_125\n ,wall,1\n')
+    with pytest.raises(ValueError, match='empty variant name'): material_library.read_sweep_table(str(file_path), 3)
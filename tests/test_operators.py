@@ -0,0 +1,50 @@
+# Room utility operators tests, run against the bpy stand-in (see conftest.py)
+
+import numpy as np
+import bpy
+import bpy_standin as standin
+
+from test_export import export_room
+
+# 4x3x2 box, faces oriented outwards
+BOX_VERTICES = [[0, 0, 0], [4, 0, 0], [4, 3, 0], [0, 3, 0], [0, 0, 2], [4, 0, 2], [4, 3, 2], [0, 3, 2]]
+BOX_FACES = [[0, 3, 2, 1], [4, 5, 6, 7], [0, 1, 5, 4], [1, 2, 6, 5], [2, 3, 7, 6], [3, 0, 4, 7]]
+
+
+def test_orient_normals_flips_room_walls_inwards(addon):
+
+    room = standin.new_collection('room')
+    box = standin.new_mesh_object('box', BOX_VERTICES, BOX_FACES, [standin.new_catt_material('wall')], room)
+    bpy.context.scene.catt_io.room_collection = 'room'
+    loops = box.data.get_arrays()[2].copy()
+
+    assert bpy.ops.catt.utils(arg='orient_normals') == {'FINISHED'}
+
+    # every face flipped (same loop, reversed winding)
+    flipped = box.data.get_arrays()[2]
+    assert len(flipped) == len(loops) and not np.array_equal(flipped, loops)
+    assert bpy.ops.catt.utils(arg='orient_normals') == {'FINISHED'}
+    assert np.array_equal(np.sort(box.data.get_arrays()[2]), np.sort(loops))
+
+
+def test_flag_edge_diffraction_is_exported(addon, tmp_path):
+
+    # box faces share sharp (90 deg) long edges, the small panel edges are shorter than the min edge length
+    room = standin.new_collection('room')
+    mat = standin.new_catt_material('wall')
+    box = standin.new_mesh_object('box', BOX_VERTICES, BOX_FACES, [mat], room)
+    standin.new_mesh_object('panel', [[10, 0, 0], [10.2, 0, 0], [10, 0.2, 0]], [[0, 1, 2]], [mat], room)
+    bpy.context.scene.catt_io.room_collection = 'room'
+
+    assert bpy.ops.catt.utils(arg='flag_edge_diffraction') == {'FINISHED'}
+
+    # face attribute sized from the mesh faces
+    attribute = box.data.attributes['catt_edge_diffraction']
+    flags = np.zeros(len(box.data.polygons), dtype=bool)
+    attribute.data.foreach_get('value', flags)
+    assert attribute.domain == 'FACE' and flags.all()
+
+    # flagged planes exported with automatic edge diffraction
+    planes = export_room(tmp_path)
+    assert len(planes) == 7
+    assert sum('*' in line for line in planes) == 6
@@ -0,0 +1,53 @@
+# Tests of procedural .GEO syntax expansion (bpy-free core library), run with: python -m pytest tests
+
+import importlib
+import os
+import sys
+import pytest
+
+# import core library from the add-on folder, whatever its name
+ADDON_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(ADDON_PATH))
+procedural = importlib.import_module(os.path.basename(ADDON_PATH) + '.core.procedural')
+
+SEAT = 'LOCAL w = 0.5\nCORNERS\n1 0 0 0\n2 w 0 0\n3 w w 0\nPLANES\n[ 1 seat / 1 2 3 / wood ]\n'
+
+
+def test_includes_are_transformed_and_renumbered(tmp_path):
+
+    # seat included twice, second copy rotated around z
+    (tmp_path / 'seat.geo').write_text(SEAT)
+    (tmp_path / 'room.geo').write_text('GLOBAL h = 2*3\nCORNERS\n1 0 0 h\nPLANES\nTRANSLATE 10 0 0\nINCLUDE seat.geo\nROTATE 0 0 90\nINCLUDE seat.geo\n')
+    expander = procedural.Expander()
+
+    lines = list(procedural.expand_geo_file(str(tmp_path / 'room.geo'), expander))
+
+    assert [line for line in lines if line[0].isdigit()] == ['1 0 0 6', '2 10 0 0', '3 10.5 0 0', '4 10.5 0.5 0', '5 10 0 0', '6 10 0.5 0', '7 9.5 0.5 0']
+    assert [line for line in lines if line.startswith('[')] == ['[ 1 seat / 2 3 4 / wood ]', '[ 2 seat / 5 6 7 / wood ]']
+
+    # included file parsed and evaluated once
+    assert expander.stats == {'files': 3, 'parsed': 2, 'evaluated': 1}
+
+
+def test_procedural_files_detection(tmp_path):
+
+    (tmp_path / 'seat.geo').write_text(SEAT)
+    (tmp_path / 'explicit.geo').write_text('CORNERS\n1 0 0 0\nPLANES\n')
+
+    assert procedural.is_procedural_file(str(tmp_path / 'seat.geo'))
+    assert not procedural.is_procedural_file(str(tmp_path / 'explicit.geo'))
+
+
+@pytest.mark.parametrize('text, message', [
+    ('GLOBAL x = 1 +\n', 'invalid expression'),
+    ('GLOBAL x = __import__(1)\n', 'unknown function'),
+    ('INCLUDE room.geo\n', 'recursive INCLUDE'),
+])
+def test_errors_report_file_and_line(tmp_path, text, message):
+
+    (tmp_path / 'room.geo').write_text(text)
+
+    with pytest.raises(procedural.ProceduralError, match=message) as error:
+        list(procedural.expand_geo_file(str(tmp_path / 'room.geo'), procedural.Expander()))
+
+    assert str(error.value).startswith(str(tmp_path / 'room.geo') + ':')
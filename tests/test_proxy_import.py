@@ -0,0 +1,45 @@
+# Proxy import tests, run against the bpy stand-in (see conftest.py)
+
+import os
+import bpy
+import bpy_standin as standin
+
+
+def import_proxies(file_path):
+    """ proxy import .GEO file, return created objects """
+
+    catt_io = bpy.context.scene.catt_io
+    catt_io.import_proxies = True
+    num_objects = len(bpy.data.objects)
+
+    assert getattr(bpy.ops.catt, 'import')(filepath=str(file_path)) == {'FINISHED'}
+
+    return list(bpy.data.objects)[num_objects:]
+
+
+def test_failed_proxies_are_not_rescheduled(addon, tmp_path, capsys):
+
+    file_path = tmp_path / 'room.geo'
+    file_path.write_text('abs wall = < 5 5 5 5 5 5 5 5 > L < 10 10 10 10 10 10 10 10 > { 200 200 200 }\nCORNERS\n1 0 0 0\n2 1 0 0\n3 0 1 0\n4 0 0 1\nPLANES\n[ 1 a / 1 2 3 / wall ]\n[ 2 b / 1 2 4 / wall ]\n')
+    objects = import_proxies(file_path)
+    sidecar_path = addon.utils.get_proxy_root(objects[0])[addon.utils.PROXY_FILE_KEY]
+
+    # sidecar file deleted: selected proxy fails to realise once, then is skipped on updates
+    addon.utils.proxy_columns.clear()
+    os.remove(sidecar_path)
+    objects[0].select_set(True)
+    standin.notify_update()
+    standin.run_timers(0.1)
+    for i in range(3): standin.notify_update()
+
+    assert len(standin.registered_timers) == 0
+    assert capsys.readouterr().out.count('re-import to realise') == 1
+    assert not addon.utils.is_proxy_pending(objects[0])
+
+    # sidecar file rewritten (re-import of the unchanged .GEO file): proxy of the first import retried
+    import_proxies(file_path)
+    assert addon.utils.is_proxy_pending(objects[0])
+    standin.notify_update()
+    standin.run_timers(0.1)
+
+    assert addon.utils.PROXY_KEY not in objects[0]
@@ -21,6 +21,9 @@
 import bpy
 from bpy.types import Panel
 from . import utils
+from .core import material_library
+from . import operators
+from . import live_export
 
 class View3DCattPanel:
     """ common panel """
@@ -81,17 +84,64 @@ class VIEW3D_PT_catt_main(View3DCattPanel, Panel):
         row = box.row()
         row.prop(catt_io, "export_path")
 
+        row = box.row(align=True)
+        row.prop(catt_io, "live_export")
+        sub = row.row(align=True)
+        sub.enabled = catt_io.live_export
+        sub.prop(catt_io, "live_export_delay")
+
+        if catt_io.live_export and len(live_export.state['status']) > 0:
+            row = box.row()
+            row.label(text='Last live export: {0}'.format(live_export.state['status']), icon='FILE_REFRESH')
+
         row = box.row()
         row.prop(catt_io, "debug")
 
+        row = box.row()
+        row.prop(catt_io, "profile")
+
+        # last run summary
+        last_run = context.scene.get(operators.LAST_RUN_KEY)
+        if last_run is not None:
+
+            col = box.column(align=True)
+            peak_memory = '' if last_run['peak_memory'] < 0 else ', peak {0:.1f} MB'.format(last_run['peak_memory'] / 1e6)
+            col.label(text='Last run: {0} ({1:.2f}s{2})'.format(last_run['operator'], last_run['time'], peak_memory), icon='TIME')
+            for name, duration in zip(last_run['stage_names'], last_run['stage_times']):
+                col.label(text='{0}{1}: {2:.3f}s'.format('    ' * name.count('/'), name.rsplit('/', 1)[-1], duration))
+
 
         # Import
         box = layout.box()
         box.label(text="Import", icon="IMPORT")
 
+        row = box.row()
+        row.prop(catt_io, "import_procedural")
+
+        row = box.row()
+        row.prop(catt_io, "import_hierarchy")
+        row.prop(catt_io, "import_instances")
+
+        row = box.row()
+        row.prop(catt_io, "import_proxies")
+        sub = row.row()
+        sub.enabled = catt_io.import_proxies
+        sub.prop(catt_io, "proxy_realize_selected")
+
+        row = box.row()
+        row.prop(catt_io, "diff_reference_path")
+
+        row = box.row()
+        row.enabled = len(catt_io.diff_reference_path) > 0
+        row.prop(catt_io, "diff_dist")
+
         row = box.row()
         row.operator("catt.import", text="Import Room From File", icon='IMPORT')
 
+        if catt_io.import_proxies:
+            row = box.row()
+            row.operator("catt.realize_proxies", text="Realize Proxies", icon='MESH_CUBE')
+
 
         # Room export
         box = layout.box()
@@ -103,6 +153,16 @@ class VIEW3D_PT_catt_main(View3DCattPanel, Panel):
         row = box.row(align=True)
         row.operator("catt.utils", text="Detect Non-Planar faces", icon="XRAY").arg = 'check_nonflat_faces' # 'SURFACE_DATA', 'XRAY', 'MOD_WARP'
 
+        row = box.row(align=True)
+        row.operator("catt.utils", text="Orient Normals", icon="NORMALS_FACE").arg = 'orient_normals'
+
+        row = box.row(align=True)
+        row.prop(catt_io, "edge_diffraction_angle")
+        row.prop(catt_io, "edge_diffraction_length")
+
+        row = box.row(align=True)
+        row.operator("catt.utils", text="Flag Diffraction Edges", icon="EDGESEL").arg = 'flag_edge_diffraction'
+
         row = box.row(align=True)
         row.prop(catt_io, "triangulate_faces")
 
@@ -112,6 +172,9 @@ class VIEW3D_PT_catt_main(View3DCattPanel, Panel):
         row = box.row(align=True)
         row.prop(catt_io, "export_face_ids")
 
+        row = box.row(align=True)
+        row.prop(catt_io, "export_hidden_collections")
+
         row = box.row(align=True)
         row.prop(catt_io, "merge_objects")
 
@@ -119,6 +182,13 @@ class VIEW3D_PT_catt_main(View3DCattPanel, Panel):
         row.enabled = catt_io.merge_objects
         row.prop(catt_io, "rm_duplicates_dist")
 
+        row = box.row(align=True)
+        row.prop(catt_io, "split_collections")
+
+        row = box.row(align=True)
+        row.enabled = not catt_io.merge_objects and not catt_io.split_collections
+        row.prop(catt_io, "stream_export")
+
         # row.ui_units_y += 1 + ui_elmt_offset
 
         row = box.row()
@@ -127,9 +197,19 @@ class VIEW3D_PT_catt_main(View3DCattPanel, Panel):
         row = box.row()
         row.prop(catt_io, "room_file_name")
 
+        row = box.row(align=True)
+        row.prop(catt_io, "lint_export")
+
         row = box.row(align=True)
         row.operator("catt.export_room", text="Export Room", icon='EXPORT')
 
+        row = box.row()
+        row.prop(catt_io, "sweep_table_path")
+
+        row = box.row(align=True)
+        row.enabled = len(catt_io.sweep_table_path) > 0
+        row.operator("catt.export_room_sweep", text="Export Material Sweep", icon='EXPORT')
+
         # row = col.row(align=True)
         # row.prop(catt_io, "export_progress", slider=True)
         # row.enabled = False
@@ -246,6 +326,17 @@ class VIEW3D_PT_catt_material(View3DCattPanel, Panel):
 
                 return
 
+            # material created with an older add-on version (or other frequency bands)
+            if utils.is_catt_material_outdated(mat, len(catt_io.frequency_bands)):
+
+                box = layout.row()
+                box.label(text="Outdated CATT material", icon='ERROR')
+
+                box = layout.row()
+                box.operator("catt.convert_to_catt_material", text="Update CATT material")
+
+                return
+
             # # retro compatibility
             # if 'use_diffraction' not in mat:
             #     box = layout.row()
@@ -262,7 +353,7 @@ class VIEW3D_PT_catt_material(View3DCattPanel, Panel):
             for i_freq, freq in enumerate(catt_io.frequency_bands):
                 row = layout.row(align=True)
                 row.label(text=utils.freq_to_str(freq))
-                row.prop(mat,'["abs_{0}"]'.format(i_freq), text="")
+                row.prop(mat,'["abs"]', index=i_freq, text="")
 
             # empty space
             box = layout.row(align=True)
@@ -303,5 +394,105 @@ class VIEW3D_PT_catt_material(View3DCattPanel, Panel):
                 for i_freq, freq in enumerate(catt_io.frequency_bands):
                     row = layout.row(align=True)
                     row.label(text=utils.freq_to_str(freq))
-                    row.prop(mat,'["dif_{0}"]'.format(i_freq), text="")
+                    row.prop(mat,'["dif"]', index=i_freq, text="")
 
+
+
+class VIEW3D_PT_catt_material_library(View3DCattPanel, Panel):
+    """ panel material library """
+
+    # title
+    bl_label = "Library"
+    bl_parent_id = "VIEW3D_PT_catt_material"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        """ method called upon ui draw """
+
+        # init locals
+        layout = self.layout
+        catt_io = context.scene.catt_io
+
+        row = layout.row()
+        row.prop(catt_io, "material_library_path")
+
+        # discard if library not available
+        [library, error_msg] = material_library.get_library(bpy.path.abspath(catt_io.material_library_path))
+        if error_msg is not None: layout.label(text=error_msg, icon='ERROR')
+        if library is None: return
+
+        # bulk assignment
+        row = layout.row(align=True)
+        row.prop(catt_io, "material_library_fuzzy")
+        row.operator("catt.library_assign", text="Assign Room Materials by Name").entry = ''
+
+        # search
+        row = layout.row()
+        row.prop(catt_io, "material_library_search", icon='VIEWZOOM')
+
+        # discard if no active material
+        obj = context.active_object
+        if not obj or not obj.active_material: return
+
+        # results, assigned to active material on click
+        col = layout.column(align=True)
+        for i_entry in library.search(catt_io.material_library_search):
+            col.operator("catt.library_assign", text=library.names[i_entry]).entry = library.names[i_entry]
+
+
+class VIEW3D_PT_catt_analysis(View3DCattPanel, Panel):
+    """ panel analysis (reverberation preview, visibility) """
+
+    # title
+    bl_label = "Analysis"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        """ method called upon ui draw """
+
+        # init locals
+        layout = self.layout
+        catt_io = context.scene.catt_io
+
+
+        # Visibility
+        box = layout.box()
+        box.label(text="Source/Receiver Visibility", icon="HIDE_OFF")
+
+        row = box.row()
+        row.prop(catt_io, "visibility_file_name")
+
+        row = box.row(align=True)
+        row.operator("catt.visibility_matrix", text="Compute Visibility", icon='EXPORT')
+
+
+        # Reverberation preview
+        box = layout.box()
+        box.label(text="Reverberation Preview", icon="SPEAKER")
+
+        row = box.row()
+        row.prop(catt_io, "reverb_file_name")
+
+        row = box.row(align=True)
+        row.operator("catt.reverb_preview", text="Compute RT60", icon='EXPORT')
+
+        # discard if no preview computed yet
+        preview = context.scene.get('catt_reverb_preview')
+        if preview is None: return
+
+        # room summary
+        col = box.column(align=True)
+        col.label(text="Volume: {0:.1f} m3".format(preview['volume']))
+        col.label(text="Surface: {0:.1f} m2".format(preview['surface']))
+
+        # reverberation times table
+        col = box.column(align=True)
+        row = col.row(align=True)
+        row.label(text="Band")
+        row.label(text="Sabine")
+        row.label(text="Eyring")
+        for freq, rt_sabine, rt_eyring in zip(preview['frequencies'], preview['sabine'], preview['eyring']):
+            row = col.row(align=True)
+            row.label(text=utils.freq_to_str(freq))
+            row.label(text="{0:.2f} s".format(rt_sabine))
+            row.label(text="{0:.2f} s".format(rt_eyring))
@@ -19,439 +19,838 @@
 import bmesh
 import bpy
 import mathutils
+import json
 import math
+import os
+import numpy as np
+from mathutils.bvhtree import BVHTree
+
+# file format logic lives in the bpy-free core library, re-exported here for the add-on modules
+from .core.files import (
+    CHECKSUM_PREFIX,
+    read_checksum,
+    ExportFile,
+)
+
+from .core.geo import (
+    DEFAULT_FREQUENCY_BANDS,
+    freq_to_str,
+    bands_to_str,
+    name_to_file_str,
+    mat_name_to_str,
+    parse_geo_file,
+    onlyDigitList,
+    transform_arrays,
+    get_close_pairs,
+    merge_parts,
+    remove_doubles,
+    get_geometry_offsets,
+    format_corners,
+    format_planes,
+    format_geometry,
+    write_geometry_file,
+)
+
+from .core.hierarchy import (
+    get_object_parts,
+    find_instances,
+)
+
+from .core.proxy import (
+    get_bounding_boxes,
+    get_part,
+    load_columns,
+    read_geo_columns,
+)
+
+from .core.procedural import (
+    ProceduralError,
+)
+
+from .core.loc import (
+    remove_duplicates,
+    get_catt_source_names,
+    format_receivers,
+    format_sources,
+)
+
+from .core.lint import (
+    lint_geo_file,
+    format_issue,
+)
+
+from .core.diff import (
+    REMOVED as DIFF_REMOVED,
+    diff_geometry,
+    format_diff,
+)
+
+
+# version of the catt material properties layout, stamped on materials (increment upon layout change)
+CATT_MATERIAL_VERSION = 2
+CATT_MATERIAL_VERSION_KEY = 'catt_version'
+
+
+# name of the face attribute flagging faces for automatic edge diffraction upon export
+EDGE_DIFFRACTION_ATTRIBUTE = 'catt_edge_diffraction'
+
+
+def create_objects_from_parsed_geo_file(vertices, faces, materials, collection_name='catt import', rebuild_hierarchy=False, use_instances=False):
+    """ create objects of parsed .GEO file (see core.hierarchy.get_object_parts), return list of
+    parts (with 'object' key) in file order
+
+    With rebuild_hierarchy, collections and objects are rebuilt from exported plane names (nested in
+    the import collection), otherwise one object per plane name. With use_instances, parts identical
+    up to a rigid transform are created as linked duplicates sharing a single mesh.
+    """
+
+    # create missing materials
+    create_parsed_materials(materials)
+
+    # group planes into objects, find linked duplicates
+    parts = get_object_parts(vertices, faces, rebuild_hierarchy)
+    instances = find_instances(parts) if use_instances else [(i_part, None) for i_part in range(len(parts))]
 
+    # make collection
+    collections = new_import_collections(collection_name)
 
-def freq_to_str(freq):
-    """convert float frequency to string"""
+    # loop over objects to create
+    for part, (i_reference, matrix) in zip(parts, instances):
 
-    # kHz
-    if freq < 1000.0: return '{0}Hz'.format(int(freq))
+        # linked duplicate: reuse mesh of reference part
+        if parts[i_reference] is not part: new_mesh = parts[i_reference]['object'].data
+        else: new_mesh = new_part_mesh(part)
 
-    # Hz
-    return '{0}kHz'.format(int(freq/1000.0))
+        # make object from mesh
+        new_object = bpy.data.objects.new(part['name'], new_mesh)
+        if parts[i_reference] is not part: new_object.matrix_world = mathutils.Matrix(matrix.tolist())
 
+        # add object to (rebuilt) collection
+        get_import_collection(collections, part['collection']).objects.link(new_object)
+        part['object'] = new_object
 
-def mat_name_to_str(mat_name):
-    """convert string material name to string that will correctly be interpreted by CATT"""
+    return parts
 
-    return mat_name.replace('.', '_')
 
+def create_parsed_materials(materials):
+    """ create blender materials of parsed .GEO file materials (existing materials are kept) """
 
-# method from the Print3D add-on: create a bmesh from an object (for triangulation, apply modifiers, etc.)
-def bmesh_copy_from_object(obj, transform=True, triangulate=True, apply_modifiers=False):
-    """ returns a transformed, triangulated copy of the mesh """
+    # get list of existing materials
+    existing_material_names = [m.name for m in bpy.data.materials]
 
-    assert obj.type == 'MESH'
+    # loop over materials
+    for material_name in materials.keys():
 
-    if apply_modifiers and obj.modifiers:
+        # discard if material exists
+        if( material_name in existing_material_names ): continue
 
-        depsgraph = bpy.context.evaluated_depsgraph_get()
-        obj_eval = obj.evaluated_get(depsgraph)
-        me = obj_eval.to_mesh()
-        bm = bmesh.new()
-        bm.from_mesh(me)
-        obj_eval.to_mesh_clear()
+        # create material
+        material = bpy.data.materials.new(name=material_name)
 
-    else:
+        # set material color (both node and non-node)
+        material.use_nodes = True
+        bsdf = material.node_tree.nodes["Principled BSDF"]
+        material_color = tuple( materials[material_name]['color'] )
+        bsdf.inputs["Base Color"].default_value = material_color
+        material.diffuse_color = material_color
 
-        me = obj.data
-        if obj.mode == 'EDIT':
 
-            bm_orig = bmesh.from_edit_mesh(me)
-            bm = bm_orig.copy()
+def new_import_collections(collection_name):
+    """ create import collection (linked to scene), return dict of rebuilt collections ('' for the import collection) """
 
-        else:
+    new_collection = bpy.data.collections.new(collection_name)
+    bpy.context.scene.collection.children.link(new_collection)
 
-            bm = bmesh.new()
-            bm.from_mesh(me)
+    return {'': new_collection}
 
-    if transform: bm.transform(obj.matrix_world)
 
-    if triangulate: bmesh.ops.triangulate(bm, faces=bm.faces)
+def get_import_collection(collections, name):
+    """ return collection of rebuilt hierarchy (created in import collection upon first use) """
 
-    return bm
+    if name not in collections:
+        collections[name] = bpy.data.collections.new(name)
+        collections[''].children.link(collections[name])
 
+    return collections[name]
 
-def parse_geo_file(filepath, is_debug):
 
-    # init locals
-    materials = dict()
-    vertices = dict()
-    faces = dict()
-    error_detected = False
+def new_part_mesh(part):
+    """ create mesh of object part (see core.hierarchy.get_object_parts), materials must exist """
 
-    # loop over lines
-    with open(filepath, "r") as file_reader:
-        for line_id, line in enumerate(file_reader, 1):
+    # shape list of materials (unique) of current object
+    mesh_materials = list( dict.fromkeys( part['materials'] ))
+    mesh_faces_materials = [ mesh_materials.index(material_name) for material_name in part['materials'] ]
 
-            # shape data
-            line_split = line.split()
-            if( is_debug ): print(line_split)
+    # create mesh
+    new_mesh = bpy.data.meshes.new(part['name'] + '_mesh')
 
-            # discard empty lines
-            if( len(line_split) == 0 ): continue
+    # assign vertices and faces to new mesh
+    edges = []
+    new_mesh.from_pydata(part['vertices'].tolist(), edges, part['polygons'])
 
-            # line: material definition
-            if( line_split[0].lower() == 'abs' ):
+    # add materials to mesh
+    for material_name in mesh_materials:
+        new_mesh.materials.append( bpy.data.materials[material_name] )
 
-                # init locals
-                nFreq = 8
-                material = {'absorption': [0.0]*nFreq, 'diffraction': [0.0]*nFreq, 'color': [0, 0, 0], 'use_diffraction': True, 'is_diff_estimate': False, 'diff_estimate': 0.0}
+    # assign materials to mesh faces
+    new_mesh.polygons.foreach_set("material_index", tuple( mesh_faces_materials ))
 
-                # extract data: material name (assumes no spaces)
-                material_name = line_split[1]
+    # update mesh
+    new_mesh.update()
 
-                # prepare absorption and diffraction extraction
-                abs_index_start = line.index('<')
-                abs_index_end = line.index('>')
-                dif_index_start = line[abs_index_end+1::].index('<') + abs_index_end + 1
-                dif_index_end = line[abs_index_end+1::].index('>') + abs_index_end + 1
+    return new_mesh
 
-                # extract data: absorption
-                absorption = onlyDigitList( line[abs_index_start:abs_index_end].split() )
 
-                # deal with incomplete absorption definition
-                if( len( absorption ) < nFreq ):
+# custom properties of proxy objects (part index), of their collections (import collection), and of
+# import collections (sidecar file path and stamp, realised meshes per reference part, sidecar file
+# version upon failed realisation)
+PROXY_KEY = 'catt_proxy'
+PROXY_ROOT_KEY = 'catt_proxy_root'
+PROXY_FILE_KEY = 'catt_proxy_file'
+PROXY_STAMP_KEY = 'catt_proxy_stamp'
+PROXY_MESHES_KEY = 'catt_proxy_meshes'
+PROXY_FAILED_KEY = 'catt_proxy_failed'
 
-                    # pad with last value
-                    last_value = absorption[-1]
-                    for i in range(nFreq-len( absorption )): absorption.append(last_value)
+# columns of sidecar files loaded for realisation (path to columns, replaced when the sidecar file
+# stamp changes, cleared upon file load)
+proxy_columns = dict()
 
-                    # log error
-                    error_detected = True
-                    print("\nWARNING: expecting 8 freq. bands absorption definition at line", line_id, "\n-> padding high frequencies with last band value")
 
-                # extract data: store absorption to locals
-                material['absorption'] = absorption
+def create_proxy_objects(columns, sidecar_path, collection_name='catt import'):
+    """ create one proxy object per part of columns (see core.proxy): a bounding box sharing a
+    single unit cube mesh, realised into its full mesh by realize_proxy_objects. Return list of objects """
 
-                # extract data: diffraction
-                diffraction = onlyDigitList( line[dif_index_start:dif_index_end].split() )
-                if( dif_index_start == 0 ):
+    # create missing materials
+    create_parsed_materials(json.loads(str(columns['materials'])))
 
-                    # diffraction not defined
-                    material['use_diffraction'] = False
+    # unit cube shared by all proxies
+    cube = bpy.data.meshes.new('catt_proxy_box')
+    cube.from_pydata([(x, y, z) for x in (0, 1) for y in (0, 1) for z in (0, 1)], [], [[0, 1, 3, 2], [4, 6, 7, 5], [0, 4, 5, 1], [2, 3, 7, 6], [0, 2, 6, 4], [1, 5, 7, 3]])
+    cube.update()
 
-                elif( 'estimate' in line[dif_index_start:dif_index_end] ):
+    # bounding boxes (flat parts thickened for display)
+    box_min, box_max = get_bounding_boxes(columns)
+    box_size = np.maximum(box_max - box_min, 1e-3)
 
-                    # material diffraction is defined using catt "estimate(..)" syntax
-                    material['is_diff_estimate'] = True
-                    material['diff_estimate'] = diffraction[0]
+    # make collection, flagged with sidecar file version, columns kept for realisation
+    collections = new_import_collections(collection_name)
+    root = collections['']
+    root[PROXY_FILE_KEY] = sidecar_path
+    root[PROXY_STAMP_KEY] = columns['stamp']
+    root[PROXY_MESHES_KEY] = dict()
+    proxy_columns[sidecar_path] = columns
 
-                else:
+    # loop over parts
+    objects = []
+    for i_part, (name, collection_name, position, size) in enumerate(zip(columns['names'].tolist(), columns['collections'].tolist(), box_min.tolist(), box_size.tolist())):
 
-                    # diffraction is defined using classic (per band) syntax
-                    if( len( diffraction ) < nFreq ):
+        # make object from shared cube
+        new_object = bpy.data.objects.new(name, cube)
+        new_object.matrix_world = mathutils.Matrix(((size[0], 0, 0, position[0]), (0, size[1], 0, position[1]), (0, 0, size[2], position[2]), (0, 0, 0, 1)))
+        new_object.display_type = 'WIRE'
+        new_object[PROXY_KEY] = i_part
 
-                        # pad with last value
-                        last_value = diffraction[-1]
-                        for i in range(nFreq-len( diffraction )): diffraction.append(last_value)
+        # add object to (rebuilt) collection, linked to import collection
+        collection = get_import_collection(collections, collection_name)
+        if PROXY_ROOT_KEY not in collection: collection[PROXY_ROOT_KEY] = root
+        collection.objects.link(new_object)
+        objects.append(new_object)
 
-                        # log error
-                        error_detected = True
-                        print("\nWARNING: expecting 8 freq. bands diffraction definition at line", line_id, "\n-> padding high frequencies with last band value")
+    return objects
 
-                    # update locals
-                    material['diffraction'] = diffraction
 
-                # colour definition
-                color = onlyDigitList( line[dif_index_end::].split() )
-                color = [round(float(x)/255.0, 3) for x in color]
-                color.append(1.0) # alpha
-                material['color'] = color
+def get_proxy_root(obj):
+    """ return import collection of proxy object (None if not a proxy) """
 
-                # save material to locals
-                materials[material_name] = material
+    if PROXY_KEY not in obj: return None
 
-            # line: vertex (corner) definition
-            elif( line_split[0].isnumeric() ):
+    return next((collection[PROXY_ROOT_KEY] for collection in obj.users_collection if PROXY_ROOT_KEY in collection), None)
 
-                # extract data
-                vertice_id = int( line_split[0] )
-                vertice_id -= 1 # start from 0 compared to catt that starts from 1
-                vertice_xyz = [float(x) for x in line_split[1:4]]
 
-                # save to locals
-                vertices[vertice_id] = {'xyz': vertice_xyz}
+def get_sidecar_version(sidecar_path):
+    """ return string identifying sidecar file version (size, modification time), '' if missing """
 
-            # line: face (plane) definition
-            elif( line_split[0][0] == "[" ):
+    try: stat = os.stat(sidecar_path)
+    except OSError: return ''
 
-                # check that catt didn't split line in two (does if line is too long)
-                try:
+    return '{0} {1}'.format(stat.st_size, stat.st_mtime_ns)
 
-                    index_open = line.index("[")
-                    index_close = line.index("]")
 
-                except ValueError:
+def is_proxy_pending(obj):
+    """ return True if obj is a proxy object to realise: realisation didn't fail yet for the current
+    version of its sidecar file """
 
-                    print("\nERROR: Unexpected line break at line", line_id, "\n->", line + "Face import discarded\n")
-                    error_detected = True
-                    continue
+    root = get_proxy_root(obj)
+    if root is None: return False
 
-                # shape data
-                line_strip = line.replace("[", "").replace("]", "")
-                line_split = line_strip.split()
+    return PROXY_FAILED_KEY not in root or root[PROXY_FAILED_KEY] != get_sidecar_version(root[PROXY_FILE_KEY])
 
-                # deal with object names containing spaces
-                index_slash_1 = line_split.index("/")
-                index_slash_2 = line_split.index("/", index_slash_1+1, len(line_split)-1)
 
-                # extract data
-                face_id = int( line_split[0] )
-                obj_name = ' '.join(line_split[1:index_slash_1])
-                face_vertices = [int(x)-1 for x in line_split[(index_slash_1+1):index_slash_2]]
-                face_material = line_split[-1]
+def realize_proxy_objects(objects):
+    """ replace bounding boxes of proxy objects by their full mesh (linked duplicates share meshes),
+    return [number of objects realised, sidecar files not found or rewritten since import]
 
-                # deal with automatic edge diffraction syntax
-                # ('*' at end of material name, that need to be moved to end of object name to be preserved in blender scene for next export)
-                # note: can't use material names with * at the end in original CATT scene
-                if( face_material[-1] == '*' ):
+    Import collections of sidecar files that failed to load are flagged with the sidecar file
+    version, so that automatic realisation skips their proxies until the sidecar file changes (see
+    is_proxy_pending).
+    """
 
-                    face_material = face_material[:-1] # remove last character
-                    obj_name = obj_name + '*'
+    # init locals
+    num_realized = 0
+    missing = set()
+
+    # loop over proxies
+    for obj in objects:
+
+        # load columns of sidecar file, as of import (reloaded if rewritten in between)
+        root = get_proxy_root(obj)
+        if root is None: continue
+        sidecar_path, stamp = root[PROXY_FILE_KEY], root[PROXY_STAMP_KEY]
+        columns = proxy_columns.get(sidecar_path)
+        if columns is None or columns['stamp'] != stamp:
+            columns = load_columns(sidecar_path, stamp)
+            if columns is None:
+                root[PROXY_FAILED_KEY] = get_sidecar_version(sidecar_path)
+                missing.add(sidecar_path)
+                continue
+            proxy_columns[sidecar_path] = columns
+
+        # mesh of reference part (created once per import collection)
+        i_part = obj[PROXY_KEY]
+        i_reference = int(columns['references'][i_part])
+        meshes = root[PROXY_MESHES_KEY]
+        mesh = meshes.get(str(i_reference))
+        if mesh is None:
+            mesh = new_part_mesh(get_part(columns, i_reference))
+            meshes[str(i_reference)] = mesh
+
+        # swap mesh, linked duplicate transform (reference parts are in world space)
+        obj.data = mesh
+        obj.matrix_world = mathutils.Matrix(columns['matrices'][i_part].tolist())
+        obj.display_type = 'TEXTURED'
+        del obj[PROXY_KEY]
+        num_realized += 1
+
+    return [num_realized, sorted(missing)]
+
+
+# colours (rgba) of planes per diff status (unchanged, added, moved, rematerialed, removed)
+DIFF_COLORS = ((0.6, 0.6, 0.6, 1.0), (0.1, 0.8, 0.1, 1.0), (0.1, 0.4, 1.0, 1.0), (1.0, 0.6, 0.0, 1.0), (0.9, 0.1, 0.1, 1.0))
+
+
+def set_diff_colors(parts, faces, status):
+    """ colour faces of objects created from parsed faces (see create_objects_from_parsed_geo_file,
+    without linked duplicates) by plane diff status (see core.diff), stored in the 'catt_diff' colour
+    attribute (viewport shading colour set to Attribute to display them) """
+
+    # status of planes (in file order)
+    statuses = dict(zip(faces.keys(), np.broadcast_to(status, len(faces)).tolist()))
+
+    # loop over objects
+    colors = np.array(DIFF_COLORS, dtype=np.float32)
+    for part in parts:
+
+        # per corner colours
+        mesh = part['object'].data
+        loop_totals = np.zeros(len(mesh.polygons), dtype=np.int32)
+        mesh.polygons.foreach_get('loop_total', loop_totals)
+        loop_colors = colors[np.repeat([statuses[plane_id] for plane_id in part['plane_ids']], loop_totals)]
+
+        # save to attribute
+        attribute = mesh.color_attributes.get('catt_diff') or mesh.color_attributes.new('catt_diff', 'BYTE_COLOR', 'CORNER')
+        attribute.data.foreach_set('color', loop_colors.ravel())
+        mesh.color_attributes.active_color = attribute
+
+
+def import_geo_diff(geo_reference, geo, parts, collection_name, dist):
+    """ colour imported objects by diff with reference parsed .GEO file, import removed planes in a
+    separate collection, return diff (see core.diff.diff_geometry) """
+
+    # diff
+    diff = diff_geometry(geo_reference, geo, dist)
+    set_diff_colors(parts, geo[1], diff['status_b'])
+
+    # import removed planes (missing materials created from reference file)
+    if len(diff['removed']) > 0:
+        vertices, faces, materials = geo_reference[:3]
+        faces_removed = {plane_id: faces[plane_id] for plane_id in diff['removed']}
+        removed_materials = set(face['material'] for face in faces_removed.values())
+        parts_removed = create_objects_from_parsed_geo_file(vertices, faces_removed, {name: material for name, material in materials.items() if name in removed_materials}, collection_name + ' removed')
+        set_diff_colors(parts_removed, faces_removed, DIFF_REMOVED)
+
+    return diff
 
-                # save to locals
-                faces[face_id] = {'obj_name': obj_name, 'vertices': face_vertices, 'material': face_material}
 
-    return [vertices, faces, materials, error_detected]
+def sample_animation_path(context, obj, dist_thresh):
+    """ sample xyz coordinates along animation path, with distance ignore threshold """
 
+    # init local
+    scene = context.scene
 
-def onlyDigitList(list_in):
+    # loop over frames: init
+    scene_frame_original = scene.frame_current
+    previous_export_loc = mathutils.Vector([math.inf, math.inf, math.inf])
+    list_translation = []
+    list_rotation_euler = []
 
-    list_str = [''.join(c for c in x if (c.isdigit() or c =='.')) for x in list_in]
-    list_str = list( filter(None, list_str) )
-    list_float = [float(x) for x in list_str]
+    # loop over frames
+    for frame in range(scene.frame_start, scene.frame_end):
 
-    return list_float
+        # set new current frame
+        scene.frame_set(frame)
 
+        # skip if new location too close from previous one exported
+        # loc = obj.location
+        loc = obj.matrix_world.translation
+        if( (previous_export_loc - loc).length < dist_thresh ): continue
+        rot = obj.rotation_euler
 
-def create_objects_from_parsed_geo_file(vertices, faces, materials, collection_name='catt import'):
+        # update locals
+        previous_export_loc = mathutils.Vector([loc.x, loc.y, loc.z])
 
-    # get list of existing materials
-    existing_material_names = [m.name for m in bpy.data.materials]
+        # append to list
+        list_translation.append([loc.x, loc.y, loc.z])
+        list_rotation_euler.append([rot[0], rot[1], rot[2]])
+
+    # remove duplicates
+    [list_translation_filtered, ids_filtered] = remove_duplicates(list_translation, dist_thresh)
+    list_rotation_euler_filtered = [ list_rotation_euler[id] for id in ids_filtered ]
+
+    # reset scene frame
+    scene.frame_set(scene_frame_original)
+
+    return [list_translation_filtered, list_rotation_euler_filtered]
+
+
+# get mesh objects (and collection instances if need be) of the room collection (if not excluded from view layer)
+def get_room_objects(catt_io, view_layer, include_instances=False, layer_index=None):
+
+    # get list of objects in room collection (each once)
+    collection = bpy.data.collections[catt_io.room_collection]
+    objects = get_all_objects_recursive(collection, view_layer, layer_index, catt_io.export_hidden_collections)
+
+    # filter only mesh objects
+    if include_instances: return [obj for obj in objects if is_room_object(obj)]
+    return [obj for obj in objects if obj.type == 'MESH']
+
+
+# get catt material definition string (absorption, diffraction and colour), as written after "abs name ="
+def get_mat_definition_str(mat, round_factor=1, overrides=None, frequency_bands=DEFAULT_FREQUENCY_BANDS):
+
+    # property access, overridden values first
+    overrides = overrides or {}
+    get = lambda key: overrides[key] if key in overrides else mat[key]
+
+    # absorption
+    definition = "<{0}>".format(bands_to_str(get('abs'), round_factor, frequency_bands))
+
+    # diffraction
+    if get("use_diffraction"):
+
+        if get('is_diff_estimate'):
+            definition += " L <estimate({0})>".format(round(get('diff_estimate'), 3))
+        else:
+            definition += " L <{0}>".format(bands_to_str(get('dif'), round_factor, frequency_bands))
+
+    # colour
+    definition += " {{{0} {1} {2}}}".format(int(255*mat.diffuse_color[0]), int(255*mat.diffuse_color[1]), int(255*mat.diffuse_color[2]))
+
+    return definition
+
+
+# build table of catt materials used by objects, merging materials with identical definitions
+def build_material_table(objects, round_factor=1, variants=None, frequency_bands=DEFAULT_FREQUENCY_BANDS):
+    """ return dict with 'definitions': list of (catt name, definition string), 'names': dict of
+    blender material name -> catt name, and 'collisions': list of blender material names tuples
+    with distinct definitions sharing the same catt name (after sanitisation)
+
+    variants is an optional list of (variant name, overrides) where overrides is a dict of material
+    name (blender or catt) -> dict of overridden material properties. Materials are then merged only
+    if identical in every variant, and 'variants' is added to the output: list of (variant name,
+    definitions), with 'unknown': sorted override names matching no material. frequency_bands (in Hz, one per coefficient) place the colon of coefficient lists.
+    """
+
+    # init locals
+    variants = variants or []
+    definitions = dict()
+    names = dict()
+    catt_names = dict()
+    collisions = []
+
+    # unique materials of material slots (linked to mesh or object, as looked up upon export),
+    # sorted by name (deterministic output)
+    materials = dict()
+    for obj in get_instanced_mesh_objects(objects):
+        for slot in obj.material_slots:
+            if slot.material is not None: materials[slot.material.name] = slot.material
 
     # loop over materials
-    for material_name in materials.keys():
+    for mat_name in sorted(materials.keys()):
 
-        # discard if material exists
-        if( material_name in existing_material_names ): continue
+        # definition as written to file, in base and every variant
+        mat = materials[mat_name]
+        catt_name = mat_name_to_str(mat_name)
+        definition = tuple([get_mat_definition_str(mat, round_factor, None, frequency_bands)] + [get_mat_definition_str(mat, round_factor, overrides.get(mat_name, overrides.get(catt_name)), frequency_bands) for variant_name, overrides in variants])
 
-        # create material
-        material = bpy.data.materials.new(name=material_name)
+        # hash definition: first material with a given definition names it
+        if definition not in definitions:
 
-        # set material color (both node and non-node)
-        material.use_nodes = True
-        bsdf = material.node_tree.nodes["Principled BSDF"]
-        material_color = tuple( materials[material_name]['color'] )
-        bsdf.inputs["Base Color"].default_value = material_color
-        material.diffuse_color = material_color
+            # check sanitised name collisions
+            if catt_name in catt_names:
+                collisions.append((catt_names[catt_name], mat_name))
+            catt_names[catt_name] = mat_name
+            definitions[definition] = catt_name
 
-    # loop over faces, get list of all the objects to create (from names in faces)
-    object_list = {}
-    for face_id in faces.keys():
+        names[mat_name] = definitions[definition]
 
-        # create object entry in local dict if not already in
-        object_name = faces[face_id]['obj_name']
-        if( object_name not in object_list ):
-            object_list[object_name] = {'vertices': [], 'faces': []}
+    # shape output
+    table = {'definitions': [(catt_name, definition[0]) for definition, catt_name in definitions.items()], 'names': names, 'collisions': collisions}
+    if len(variants) > 0:
+        table['variants'] = [(variant_name, [(catt_name, definition[i_variant+1]) for definition, catt_name in definitions.items()]) for i_variant, (variant_name, overrides) in enumerate(variants)]
+        known_names = set(names.keys()) | set(mat_name_to_str(mat_name) for mat_name in names.keys())
+        table['unknown'] = sorted(set(name for variant_name, overrides in variants for name in overrides.keys() if name not in known_names))
 
-        # save face / vertice to object
-        object_list[object_name]['faces'].append( faces[face_id] )
-        object_list[object_name]['vertices'].append( faces[face_id]['vertices'] )
+    return table
 
-    # make collection
-    new_collection = bpy.data.collections.new(collection_name)
-    bpy.context.scene.collection.children.link(new_collection)
 
-    # loop over objects to create
-    for object_name in object_list.keys():
+# get plane name components of an object ('*' suffixes flag automatic edge diffraction)
+def get_plane_name(obj):
+    """ return plane name (collection-object) and edge diffraction flag of object """
 
-        # shape list of materials (unique) of current object
-        mesh_materials = [ face['material'] for face in object_list[object_name]['faces'] ]
-        mesh_materials = list( dict.fromkeys( mesh_materials ))
+    # had to use original object here (otherwise copy doesn't belong to any collection)
+    collection_name = '' if len(obj.users_collection) == 0 else obj.users_collection[0].name
+    object_name = obj.name
 
-        # shape list of vertices (unique) of current object
-        vertice_ids = [item for sublist in object_list[object_name]['vertices'] for item in sublist] # from list of lists to flat list
-        vertice_ids = list( dict.fromkeys( vertice_ids ) ) # remove duplicates
-        vertice_ids.sort() # sort list (to prepare renumbering of vertices ids in faces to span 0:num_vertices
-        mesh_vertices = []
-        for vertice_id in vertice_ids:
-            mesh_vertices.append( tuple( vertices[vertice_id]['xyz'] ) )
+    # auto edge diffraction if collection or object names end with '*'
+    edge_diffraction = False
+    if( len(collection_name) > 0 and collection_name[-1] == '*' ):
 
-        # shape list of faces of current object
-        mesh_faces = []
-        mesh_faces_materials = []
-        face_id = 0
-        for face in object_list[object_name]['faces']:
+        edge_diffraction = True
+        collection_name = collection_name.rstrip('*')
 
-            # add face to local list
-            face_vertices = [ vertice_ids.index(vertice_id) for vertice_id in face['vertices'] ]
-            mesh_faces.append(face_vertices)
+    if object_name[-1] == '*':
 
-            # add face material id to local list
-            mesh_faces_materials.append( mesh_materials.index(face['material']) )
+        object_name = object_name.rstrip('*')
+        edge_diffraction = True
 
-        # create mesh
-        new_mesh = bpy.data.meshes.new(object_name + '_mesh')
+    return [collection_name, object_name, edge_diffraction]
 
-        # assign vertices and faces to new mesh
-        edges = []
-        new_mesh.from_pydata(mesh_vertices, edges, mesh_faces)
 
-        # add materials to mesh
-        for material_name in mesh_materials:
-            new_mesh.materials.append( bpy.data.materials[material_name] )
+# check if object is exported as part of the room (mesh or collection instance)
+def is_room_object(obj):
 
-        # assign materials to mesh faces
-        new_mesh.polygons.foreach_set("material_index", tuple( mesh_faces_materials ))
+    return obj.type == 'MESH' or (obj.instance_type == 'COLLECTION' and obj.instance_collection is not None)
 
-        # update mesh
-        new_mesh.update()
 
-        # make object from mesh
-        new_object = bpy.data.objects.new(object_name, new_mesh)
+def get_instanced_mesh_objects(objects):
+    """ return mesh objects of list, plus mesh objects of (nested) collection instances """
 
-        # add object to scene collection
-        new_collection.objects.link(new_object)
+    # init locals
+    meshes = dict()
+    instancers = list(objects)
+    processed_collections = set()
 
+    # loop over objects (growing list of instancers)
+    while len(instancers) > 0:
 
-def sample_animation_path(context, obj, dist_thresh):
-    """ sample xyz coordinates along animation path, with distance ignore threshold """
+        obj = instancers.pop()
+        if obj.type == 'MESH': meshes[obj.name] = obj
 
-    # init local
-    scene = context.scene
+        # add objects of instanced collection
+        if obj.instance_type == 'COLLECTION' and obj.instance_collection is not None and obj.instance_collection not in processed_collections:
+            processed_collections.add(obj.instance_collection)
+            instancers.extend(obj.instance_collection.all_objects)
 
-    # loop over frames: init
-    scene_frame_original = scene.frame_current
-    previous_export_loc = mathutils.Vector([math.inf, math.inf, math.inf])
-    list_translation = []
-    list_rotation_euler = []
+    return list(meshes.values())
 
-    # loop over frames
-    for frame in range(scene.frame_start, scene.frame_end):
 
-        # set new current frame
-        scene.frame_set(frame)
+def get_local_export_arrays(mesh, triangulate):
+    """ return local space export arrays of mesh (see get_mesh_arrays) and its edge diffraction face flags """
 
-        # skip if new location too close from previous one exported
-        # loc = obj.location
-        loc = obj.matrix_world.translation
-        if( (previous_export_loc - loc).length < dist_thresh ): continue
-        rot = obj.rotation_euler
+    # triangulate a copy of the mesh
+    if triangulate:
 
-        # update locals
-        previous_export_loc = mathutils.Vector([loc.x, loc.y, loc.z])
+        bm = bmesh.new()
+        bm.from_mesh(mesh)
+        bmesh.ops.triangulate(bm, faces=bm.faces[:])
+        mesh = bpy.data.meshes.new('catt_export_tmp')
+        bm.to_mesh(mesh)
+        bm.free()
 
-        # append to list
-        list_translation.append([loc.x, loc.y, loc.z])
-        list_rotation_euler.append([rot[0], rot[1], rot[2]])
+    # extract arrays
+    arrays = get_mesh_arrays(mesh)
+    arrays['diffraction'] = get_face_flags(mesh, EDGE_DIFFRACTION_ATTRIBUTE)
 
-    # remove duplicates
-    [list_translation_filtered, ids_filtered] = remove_duplicates(list_translation, dist_thresh)
-    list_rotation_euler_filtered = [ list_rotation_euler[id] for id in ids_filtered ]
+    # cleanup
+    if triangulate: bpy.data.meshes.remove(mesh)
 
-    # reset scene frame
-    scene.frame_set(scene_frame_original)
+    return arrays
 
-    return [list_translation_filtered, list_rotation_euler_filtered]
 
+def get_arrays_key(obj, apply_modifiers=False):
+    """ return key of local export arrays of original mesh object: object if modifiers are applied,
+    mesh datablock otherwise (shared by linked duplicates) """
+
+    return obj if apply_modifiers and len(obj.modifiers) > 0 else obj.data
+
+
+def iter_object_instances(depsgraph, objects, apply_modifiers=False):
+    """ yield (exported object, local arrays key, evaluated object, world matrix) of every mesh
+    instance of objects: mesh objects themselves (evaluated copies, exported whether the depsgraph
+    evaluates them or not, e.g. hidden), then objects instanced by them (collection instances, as
+    evaluated by the depsgraph, see get_unevaluated_instancers) """
+
+    # mesh objects
+    for obj in objects:
+        if obj.type != 'MESH': continue
+        obj_eval = obj.evaluated_get(depsgraph)
+        yield (obj, get_arrays_key(obj, apply_modifiers), obj_eval, obj_eval.matrix_world)
 
-def remove_duplicates(points, dist_thresh):
+    # instances owned by exported objects
+    owners = set(objects)
+    for instance in depsgraph.object_instances:
+        if not instance.is_instance or instance.object.type != 'MESH': continue
+        owner = instance.parent.original
+        if owner in owners: yield (owner, get_arrays_key(instance.object.original, apply_modifiers), instance.object, instance.matrix_world)
+
+
+def get_unevaluated_instancers(depsgraph, objects):
+    """ return collection instances of objects not evaluated by the depsgraph (e.g. hidden), whose
+    instanced objects can't be exported """
 
     # init locals
-    ids_filtered = []
+    instancers = [obj for obj in objects if obj.instance_type == 'COLLECTION' and obj.instance_collection is not None and len(obj.instance_collection.all_objects) > 0]
+    if len(instancers) == 0: return []
 
-    # loop over points
-    for id in range(0, len(points)):
+    # instancers of evaluated instances
+    evaluated = set(instance.parent.original for instance in depsgraph.object_instances if instance.is_instance)
 
-        # if first element, simply add to list
-        if len(ids_filtered) == 0:
+    return [obj for obj in instancers if obj not in evaluated]
 
-            ids_filtered.append(id)
-            continue
 
-        # check if current point far enough from any already filtered points
-        too_close = False
-        for id_filtered in ids_filtered:
+def count_mesh_uses(depsgraph, objects, apply_modifiers=False):
+    """ return number of exported instances of each local arrays key (see iter_object_instances) """
 
-            point1 = mathutils.Vector(points[id])
-            point2 = mathutils.Vector(points[id_filtered])
+    # init locals
+    uses = dict()
 
-            if (point1 - point2).length <= dist_thresh:
+    # loop over instances (no mesh data accessed)
+    for owner, key, obj_eval, matrix in iter_object_instances(depsgraph, objects, apply_modifiers):
+        uses[key] = uses.get(key, 0) + 1
 
-                too_close = True
-                break
+    return uses
 
-        # store to locals if not too close from filtered points
-        if not too_close:
-            ids_filtered.append(id)
 
-    # construct filtered list
-    points_filtered = [ points[id] for id in ids_filtered ]
+def iter_export_parts(depsgraph, objects, material_names, triangulate=False, apply_modifiers=False, export_face_ids=False, mesh_cache=None, mesh_uses=None):
+    """ yield export data of objects (see get_export_parts) one part at a time: mesh objects first,
+    then instances (see iter_object_instances)
 
-    # output
-    return [points_filtered, ids_filtered]
+    If mesh_uses (see count_mesh_uses) is given, cached local arrays are dropped after their last use,
+    so that only meshes shared by several instances are kept in memory, and only while needed.
+    """
 
+    # init locals
+    mesh_cache = dict() if mesh_cache is None else mesh_cache
+    mesh_uses = None if mesh_uses is None else dict(mesh_uses)
+    owners = {obj: i_obj for i_obj, obj in enumerate(objects)}
 
-def get_catt_source_names():
+    # sync meshes being edited
+    for obj in objects:
+        if obj.mode == 'EDIT': obj.update_from_editmode()
 
-    # init
-    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
-    numbers = '0123456789'
-    names = []
+    # loop over instances (objects, linked duplicates, collection instances)
+    for owner, key, obj_eval, matrix in iter_object_instances(depsgraph, objects, apply_modifiers):
 
-    # generate prefixes
-    for iLetter in range(0, len(letters)):
-        for iNumber in range(0, len(numbers)):
-            names.append(letters[iLetter] + numbers[iNumber])
+        # local arrays, extracted once per mesh
+        if key not in mesh_cache:
+            use_modifiers = key == obj_eval.original
+            mesh_cache[key] = get_local_export_arrays(obj_eval.data if use_modifiers else obj_eval.original.data, triangulate)
+        local = mesh_cache[key]
 
-    return names
+        # free local arrays after last use
+        if mesh_uses is not None:
+            mesh_uses[key] -= 1
+            if mesh_uses[key] == 0: del mesh_cache[key]
 
+        # apply instance transform
+        part = transform_arrays(local, matrix)
 
-# recursively get all objects in a collection and its children collections (if not excluded from view layer)
-def get_all_objects_recursive(collection, view_layer):
+        # plane names: shape face name from collection and object names
+        # 'Master Collection' is the name of blender root collection
+        collection_name, object_name, edge_diffraction = get_plane_name(owner)
+        num_faces = len(part['loop_starts'])
+        if export_face_ids: names = ["{0}-{1}".format(object_name, i_face) for i_face in range(num_faces)] # keep original face id (no offset here)
+        else: names = [object_name] * num_faces
+        if collection_name not in ('', 'Master Collection'): names = ["{0}-{1}".format(collection_name, name) for name in names]
+        part['names'] = names
 
-    # get a list of objects in collection
-    objects = list(collection.objects)
+        # materials
+        slot_names = [material_names[slot.material.name] for slot in obj_eval.material_slots]
+        part['materials'] = [slot_names[i] for i in part['material_indices'].tolist()]
 
-    # loop over child collections
-    for child_coll in collection.children:
+        # auto edge diffraction: from names or face attribute
+        part['diffraction'] = local['diffraction'] | edge_diffraction
 
-        # only if collection not excluded (check box ticked)
-        if is_collection_included_in_viewlayer(child_coll, view_layer):
+        part['owner'] = owners[owner]
+        yield part
 
-            # extend with list of child collection objects
-            objects.extend(get_all_objects_recursive(child_coll, view_layer))
 
-    return objects
+def get_export_parts(depsgraph, objects, material_names, triangulate=False, apply_modifiers=False, export_face_ids=False, mesh_cache=None):
+    """ pull export data of objects out of blender, one part per mesh instance: world space vertices,
+    polygon loops, plane names, catt material names and edge diffraction flags (one per face)
 
+    Linked duplicates and collection instances (iterated from depsgraph object instances, see
+    iter_object_instances) share
+    local space arrays, extracted once per mesh datablock (or per object if modifiers are applied)
+    and stored in mesh_cache. Only instance transforms are applied per part.
+    """
 
-# check if collection excluded from view layer
-def is_collection_included_in_viewlayer(collection, view_layer):
+    # extract all parts
+    parts = list(iter_export_parts(depsgraph, objects, material_names, triangulate, apply_modifiers, export_face_ids, mesh_cache))
 
-    # find layer
-    layer_collection = find_layer_collection(view_layer.layer_collection, collection)
+    # sort parts in objects order (depsgraph order is arbitrary)
+    parts.sort(key=lambda part: part['owner'])
+
+    return parts
+
+
+# export parts and formatted corners and planes sections per object name, kept by live exports (see
+# live_export, entries of edited objects discarded) to only extract and format objects edited since
+# the previous export, None outside live exports
+section_cache = None
+
+
+# check if catt material properties need an update (older add-on version or different number of frequency bands)
+def is_catt_material_outdated(mat, num_bands):
+
+    if mat.get(CATT_MATERIAL_VERSION_KEY, 0) < CATT_MATERIAL_VERSION: return True
+    if 'abs' not in mat or len(mat['abs']) != num_bands: return True
+
+    return False
+
+
+# check that all objects materials are valid catt materials, return error message (None if valid)
+def check_room_materials(objects, num_bands):
 
-    return layer_collection is not None and not layer_collection.exclude
+    # loop over objects (and objects of collection instances)
+    for obj in get_instanced_mesh_objects(objects):
 
-# find layer of a given collection (recursive)
-def find_layer_collection(layer_coll, target_collection):
+        # no material or dummy material?
+        # (material slots, as looked up upon export: materials linked to mesh or object)
+        slots = obj.material_slots
+        if len(slots) == 0 or (len(slots) == 1 and slots[0].material is None):
+            return 'object {0} has no materials'.format(obj.name)
 
-    # search complete
-    if layer_coll.collection == target_collection:
-        return layer_coll
+        # loop over materials
+        for slot in slots:
 
-    # loop over children
-    for child in layer_coll.children:
-        found = find_layer_collection(child, target_collection)
-        if found:
-            return found
+            # discard empty material slots (@todo: handle empty material slots during export)
+            mat = slot.material
+            if mat is None:
+                return 'object {0} has empty material slot(s), please remove them'.format(obj.name)
+
+            # not catt materials?
+            if 'is_catt_material' not in mat:
+                return 'object {0} material {1} is not a CATT material'.format(obj.name, mat.name)
+
+            # outdated catt materials (should have been updated on file load)
+            if is_catt_material_outdated(mat, num_bands):
+                return 'object {0} material {1} is an outdated CATT material, use Convert to CATT material'.format(obj.name, mat.name)
+
+            # material with too long name
+            if len(mat.name) > 15:
+                return 'object {0} material {1} name is too long (max is 15 characters)'.format(obj.name, mat.name)
 
-    # default fail
     return None
 
 
+# get mesh objects of the room collection, grouped by first level child collection
+def get_room_collection_groups(catt_io, view_layer, layer_index=None):
+    """ return list of (collection name, mesh objects), objects directly in room collection first """
+
+    # objects directly in room collection
+    collection = bpy.data.collections[catt_io.room_collection]
+    groups = [(collection.name, list(collection.objects))]
+
+    # loop over first level child collections (if not excluded from view layer)
+    if layer_index is None: layer_index = get_layer_collection_index(view_layer)
+    for child_coll in collection.children:
+        if is_collection_included_in_viewlayer(child_coll, view_layer, layer_index, catt_io.export_hidden_collections):
+            groups.append((child_coll.name, get_all_objects_recursive(child_coll, view_layer, layer_index, catt_io.export_hidden_collections)))
+
+    # filter mesh objects, each exported once
+    seen = set()
+    groups_filtered = []
+    for name, objects in groups:
+
+        objects = [obj for obj in objects if is_room_object(obj) and obj not in seen]
+        seen.update(objects)
+        if len(objects) > 0: groups_filtered.append((name, objects))
+
+    return groups_filtered
+
+
+# index layer collections of a view layer by collection (single traversal, reused for every lookup)
+def get_layer_collection_index(view_layer):
+    """ return dict of collection to layer collection, for collections reachable from the view layer
+    (collections linked in several places are indexed at their first occurrence, depth first) """
+
+    # init locals
+    index = dict()
+    layer_colls = [view_layer.layer_collection]
+
+    # loop over layer collections (growing list)
+    while len(layer_colls) > 0:
+
+        layer_coll = layer_colls.pop()
+        if layer_coll.collection in index: continue
+        index[layer_coll.collection] = layer_coll
+        layer_colls.extend(reversed(layer_coll.children))
+
+    return index
+
+
+# recursively get all objects in a collection and its children collections (if not excluded from view layer)
+def get_all_objects_recursive(collection, view_layer, layer_index=None, include_hidden=True):
+    """ return objects of collection and included child collections, each once (layer_index from
+    get_layer_collection_index, built if None; hidden collections skipped if not include_hidden) """
+
+    # init locals
+    if layer_index is None: layer_index = get_layer_collection_index(view_layer)
+    objects = dict()
+    visited = set()
+    collections = [collection]
+
+    # loop over collections (growing list, depth first)
+    while len(collections) > 0:
+
+        coll = collections.pop()
+        if coll in visited: continue
+        visited.add(coll)
+
+        # add collection objects
+        objects.update(dict.fromkeys(coll.objects))
+
+        # add child collections, only if not excluded (check box ticked)
+        collections.extend(reversed([child_coll for child_coll in coll.children if is_collection_included_in_viewlayer(child_coll, view_layer, layer_index, include_hidden)]))
+
+    return list(objects)
+
+
+# check if collection excluded from view layer
+def is_collection_included_in_viewlayer(collection, view_layer, layer_index=None, include_hidden=True):
+
+    # find layer
+    if layer_index is None: layer_index = get_layer_collection_index(view_layer)
+    layer_collection = layer_index.get(collection)
+
+    # discard excluded (and hidden if need be) collections
+    if layer_collection is None or layer_collection.exclude: return False
+    if not include_hidden and (layer_collection.hide_viewport or collection.hide_viewport): return False
+
+    return True
+
+
 # get material bsdf node color if exist
 def get_mat_color(mat):
 
@@ -467,3 +866,389 @@ def get_mat_color(mat):
     # return default color if not bsdf node was found
     default_color = (1.0, 1.0, 1.0, 1.0)
     return default_color
+
+
+# get mesh vertices and polygons as flat numpy arrays (fast foreach_get access)
+def get_mesh_arrays(mesh, matrix=None):
+    """ return mesh vertices (optionally transformed, see transform_arrays), polygon loops and material indices as numpy arrays """
+
+    # vertices
+    vertices = np.empty(len(mesh.vertices) * 3, dtype=np.float64)
+    mesh.vertices.foreach_get('co', vertices)
+    vertices = vertices.reshape(-1, 3)
+
+    # polygons
+    num_polygons = len(mesh.polygons)
+    loop_starts = np.empty(num_polygons, dtype=np.int64)
+    loop_totals = np.empty(num_polygons, dtype=np.int64)
+    material_indices = np.empty(num_polygons, dtype=np.int64)
+    mesh.polygons.foreach_get('loop_start', loop_starts)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+    mesh.polygons.foreach_get('material_index', material_indices)
+
+    # loops
+    loop_vertices = np.empty(len(mesh.loops), dtype=np.int64)
+    mesh.loops.foreach_get('vertex_index', loop_vertices)
+
+    arrays = {'vertices': vertices, 'loop_starts': loop_starts, 'loop_totals': loop_totals, 'loop_vertices': loop_vertices, 'material_indices': material_indices}
+
+    # apply transform
+    if matrix is not None: arrays = transform_arrays(arrays, matrix)
+
+    return arrays
+
+
+def get_polygons_geometry(vertices, loop_starts, loop_totals, loop_vertices):
+    """ return polygons normals (Newell method, length is twice the area), centroids and areas """
+
+    # discard empty meshes
+    if len(loop_starts) == 0:
+        return [np.zeros((0, 3)), np.zeros((0, 3)), np.zeros(0)]
+
+    # index of the next loop within each polygon (wraps to polygon first loop)
+    loop_next = np.arange(len(loop_vertices)) + 1
+    loop_next[loop_starts + loop_totals - 1] = loop_starts
+
+    # sum cross products of consecutive loop vertices (robust for non-flat ngons)
+    v_curr = vertices[loop_vertices]
+    v_next = vertices[loop_vertices[loop_next]]
+    normals = np.add.reduceat(np.cross(v_curr, v_next), loop_starts, axis=0)
+    centroids = np.add.reduceat(v_curr, loop_starts, axis=0) / loop_totals[:, None]
+    areas = 0.5 * np.linalg.norm(normals, axis=1)
+
+    return [normals, centroids, areas]
+
+
+def build_bvh_from_arrays(vertices, loop_starts, loop_vertices):
+    """ create BVH tree from concatenated (world space) polygon arrays """
+
+    polygons = [p.tolist() for p in np.split(loop_vertices, loop_starts[1:])]
+
+    return BVHTree.FromPolygons(vertices.tolist(), polygons, all_triangles=False)
+
+
+def count_ray_crossings(bvh, origin, direction, max_crossings=64, eps=1e-6):
+    """ count surfaces crossed by a ray cast from origin to infinity """
+
+    # init locals
+    crossings = 0
+    origin = mathutils.Vector(origin)
+    direction = mathutils.Vector(direction)
+
+    # step through successive hits
+    while crossings < max_crossings:
+
+        location, normal, index, distance = bvh.ray_cast(origin, direction)
+        if location is None: break
+
+        crossings += 1
+        origin = location + direction * eps
+
+    return crossings
+
+
+def get_inward_orientation_flags(objects, num_rays=3):
+    """ classify each face of objects as correctly oriented (1), inverted (-1) or ambiguous (0)
+
+    A face is correctly oriented when the space in front of it is "air": inside the room shell
+    and outside any furniture. Air is detected with a ray crossing parity test against a BVH of
+    all the faces (odd number of crossings to infinity), voted over several ray directions.
+    Returns a list (one per object) of numpy arrays: 1 correct, -1 inverted, 0 ambiguous.
+    """
+
+    # init locals
+    meshes = []
+    vertex_offset = 0
+    loop_offset = 0
+
+    # gather world space polygons of every object
+    for obj in objects:
+
+        arrays = get_mesh_arrays(obj.data, obj.matrix_world)
+        normals, centroids, areas = get_polygons_geometry(arrays['vertices'], arrays['loop_starts'], arrays['loop_totals'], arrays['loop_vertices'])
+        arrays['normals'] = normals
+        arrays['centroids'] = centroids
+        arrays['areas'] = areas
+        arrays['loop_vertices_global'] = arrays['loop_vertices'] + vertex_offset
+        arrays['loop_starts_global'] = arrays['loop_starts'] + loop_offset
+
+        vertex_offset += len(arrays['vertices'])
+        loop_offset += len(arrays['loop_vertices'])
+        meshes.append(arrays)
+
+    # discard if nothing to process
+    if vertex_offset == 0:
+        return [np.zeros(0, dtype=np.int8) for obj in objects]
+
+    # build bvh of the whole room
+    vertices = np.concatenate([m['vertices'] for m in meshes])
+    loop_starts = np.concatenate([m['loop_starts_global'] for m in meshes])
+    loop_vertices = np.concatenate([m['loop_vertices_global'] for m in meshes])
+    bvh = build_bvh_from_arrays(vertices, loop_starts, loop_vertices)
+
+    # scale ray offsets with room size
+    diagonal = np.linalg.norm(vertices.max(axis=0) - vertices.min(axis=0))
+    eps = max(diagonal * 1e-6, 1e-7)
+
+    # fixed set of (normalised) ray directions, jittered away from axis aligned directions
+    # to limit rays grazing edges of axis aligned geometry
+    rng = np.random.default_rng(0)
+    jitters = rng.normal(size=(num_rays, 3)) * 0.2
+
+    # loop over objects
+    flags = []
+    for arrays in meshes:
+
+        # init locals
+        num_faces = len(arrays['areas'])
+        flags_obj = np.zeros(num_faces, dtype=np.int8)
+        valid = arrays['areas'] > 0.0
+        normals = np.zeros((num_faces, 3))
+        normals[valid] = arrays['normals'][valid] / (2.0 * arrays['areas'][valid, None])
+
+        # sample a point in front of each face
+        origins = arrays['centroids'] + normals * eps * 10.0
+
+        # loop over faces (skip degenerate faces)
+        for i_face in np.flatnonzero(valid):
+
+            votes = 0
+            for jitter in jitters:
+
+                # ray direction: face normal, jittered towards the front half space
+                direction = normals[i_face] + jitter
+                if np.dot(direction, normals[i_face]) <= 0.0: direction = normals[i_face]
+                direction = direction / np.linalg.norm(direction)
+
+                # odd number of crossings: point in front of face is in the air
+                crossings = count_ray_crossings(bvh, origins[i_face], direction, eps=eps)
+                votes += 1 if crossings % 2 == 1 else -1
+
+            # require unanimous vote to classify face
+            if votes == num_rays: flags_obj[i_face] = 1
+            elif votes == -num_rays: flags_obj[i_face] = -1
+
+        flags.append(flags_obj)
+
+    return flags
+
+
+def flip_mesh_faces(mesh, face_indices):
+    """ reverse winding (hence normal) of given mesh faces """
+
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    bm.faces.ensure_lookup_table()
+    bmesh.ops.reverse_faces(bm, faces=[bm.faces[i] for i in face_indices])
+    bm.to_mesh(mesh)
+    mesh.update()
+    bm.free()
+
+
+def get_diffraction_edge_flags(mesh, matrix, angle_thresh, length_thresh):
+    """ flag faces having at least one edge sharper than angle_thresh (in rad) and longer than length_thresh (in m)
+
+    Edge sharpness is the angle between the normals of the two faces sharing the edge
+    (0 on flat surfaces). Boundary edges (single face) are considered sharp (thin plates).
+    Returns a boolean numpy array, one value per face.
+    """
+
+    # init locals
+    arrays = get_mesh_arrays(mesh, matrix)
+    num_polygons = len(arrays['loop_starts'])
+    num_edges = len(mesh.edges)
+    if num_polygons == 0 or num_edges == 0: return np.zeros(num_polygons, dtype=bool)
+
+    # world space face normals
+    normals, centroids, areas = get_polygons_geometry(arrays['vertices'], arrays['loop_starts'], arrays['loop_totals'], arrays['loop_vertices'])
+    normals = normals / np.maximum(2.0 * areas, 1e-12)[:, None]
+
+    # edges vertices and lengths
+    edge_vertices = np.empty(num_edges * 2, dtype=np.int64)
+    mesh.edges.foreach_get('vertices', edge_vertices)
+    edge_vertices = edge_vertices.reshape(-1, 2)
+    vertices = arrays['vertices']
+    edge_lengths = np.linalg.norm(vertices[edge_vertices[:, 0]] - vertices[edge_vertices[:, 1]], axis=1)
+
+    # faces sharing each edge: sort loops by edge
+    loop_edges = np.empty(len(mesh.loops), dtype=np.int64)
+    mesh.loops.foreach_get('edge_index', loop_edges)
+    loop_polygons = np.repeat(np.arange(num_polygons), arrays['loop_totals'])
+    order = np.argsort(loop_edges, kind='stable')
+    edge_face_counts = np.bincount(loop_edges, minlength=num_edges)
+    edge_first_loop = np.concatenate(([0], np.cumsum(edge_face_counts)[:-1]))
+
+    # angle between normals of manifold edges faces
+    edge_angles = np.zeros(num_edges)
+    manifold = np.flatnonzero(edge_face_counts == 2)
+    face_0 = loop_polygons[order[edge_first_loop[manifold]]]
+    face_1 = loop_polygons[order[edge_first_loop[manifold] + 1]]
+    dots = np.einsum('ij,ij->i', normals[face_0], normals[face_1])
+    edge_angles[manifold] = np.arccos(np.clip(dots, -1.0, 1.0))
+
+    # boundary edges are diffracting edges
+    edge_angles[edge_face_counts == 1] = math.pi
+
+    # flag faces owning a sharp and long enough edge
+    edges_flagged = (edge_angles >= angle_thresh) & (edge_lengths >= length_thresh)
+    flags = np.zeros(num_polygons, dtype=bool)
+    flags[loop_polygons[edges_flagged[loop_edges]]] = True
+
+    return flags
+
+
+def set_face_flags(mesh, attribute_name, flags):
+    """ store boolean numpy array as mesh face attribute """
+
+    attribute = mesh.attributes.get(attribute_name)
+    if attribute is None: attribute = mesh.attributes.new(attribute_name, 'BOOLEAN', 'FACE')
+    attribute.data.foreach_set('value', flags)
+    mesh.update()
+
+
+def get_face_flags(mesh, attribute_name):
+    """ read boolean mesh face attribute as numpy array (all False if attribute doesn't exist) """
+
+    flags = np.zeros(len(mesh.polygons), dtype=bool)
+    attribute = mesh.attributes.get(attribute_name)
+    if attribute is None or attribute.domain != 'FACE' or attribute.data_type != 'BOOLEAN': return flags
+    attribute.data.foreach_get('value', flags)
+
+    return flags
+
+
+def get_mat_absorption(mat, num_bands):
+    """ return catt material absorption coefficients (in %) as numpy array """
+
+    return np.array(mat['abs'][:num_bands], dtype=np.float64)
+
+
+def get_room_volume_and_areas(objects, depsgraph, apply_modifiers=False):
+    """ return room volume (divergence theorem, walls facing inwards) and surface per material
+
+    Volume is computed as the sum over faces of dot(p, N) / 6 with p any point of the face and
+    N its Newell normal (twice the area), which is exact for flat faces. Furnitures (closed,
+    facing outwards) are thus subtracted from the room volume. Returns volume (in m3) and a
+    dict of surfaces (in m2) with materials as keys.
+    """
+
+    # init locals
+    volume = 0.0
+    material_areas = dict()
+
+    # loop over objects
+    for obj in objects:
+
+        # get export mesh (with modifiers if need be)
+        obj_eval = obj.evaluated_get(depsgraph) if apply_modifiers else obj
+        mesh = obj_eval.to_mesh() if apply_modifiers else obj.data
+
+        # world space polygons
+        arrays = get_mesh_arrays(mesh, obj.matrix_world)
+        normals, centroids, areas = get_polygons_geometry(arrays['vertices'], arrays['loop_starts'], arrays['loop_totals'], arrays['loop_vertices'])
+
+        # signed volume contribution (negative for faces looking inwards)
+        volume -= np.einsum('ij,ij->i', centroids, normals).sum() / 6.0
+
+        # area per material slot
+        slot_areas = np.bincount(arrays['material_indices'], weights=areas, minlength=len(obj.material_slots))
+        for i_slot, slot in enumerate(obj.material_slots):
+            if slot.material is None: continue
+            material_areas[slot.material] = material_areas.get(slot.material, 0.0) + slot_areas[i_slot]
+
+        # cleanup
+        if apply_modifiers: obj_eval.to_mesh_clear()
+
+    return [float(volume), material_areas]
+
+
+def get_reverberation_times(volume, material_areas, num_bands):
+    """ return Sabine and Eyring reverberation times (in s) and absorption areas (in m2) per band """
+
+    # vectorised over materials: surfaces (M) and absorption coefficients (M x F)
+    surfaces = np.array(list(material_areas.values()), dtype=np.float64)
+    alphas = np.array([get_mat_absorption(mat, num_bands) for mat in material_areas.keys()], dtype=np.float64).reshape(len(surfaces), num_bands) / 100.0
+    surface = surfaces.sum()
+
+    # equivalent absorption area per band
+    absorption_areas = surfaces @ alphas
+
+    # Sabine
+    with np.errstate(divide='ignore'):
+        rt_sabine = 0.161 * volume / absorption_areas
+
+    # Eyring (from mean absorption coefficient)
+    alpha_mean = np.clip(absorption_areas / max(surface, 1e-12), 0.0, 1.0 - 1e-12)
+    with np.errstate(divide='ignore'):
+        rt_eyring = 0.161 * volume / (-surface * np.log(1.0 - alpha_mean))
+
+    return [rt_sabine, rt_eyring, absorption_areas]
+
+
+def build_room_bvh(objects):
+    """ create BVH tree of the (world space) faces of all objects """
+
+    # init locals
+    vertices = []
+    loop_starts = []
+    loop_vertices = []
+    vertex_offset = 0
+    loop_offset = 0
+
+    # concatenate objects polygons
+    for obj in objects:
+
+        arrays = get_mesh_arrays(obj.data, obj.matrix_world)
+        vertices.append(arrays['vertices'])
+        loop_starts.append(arrays['loop_starts'] + loop_offset)
+        loop_vertices.append(arrays['loop_vertices'] + vertex_offset)
+        vertex_offset += len(arrays['vertices'])
+        loop_offset += len(arrays['loop_vertices'])
+
+    return build_bvh_from_arrays(np.concatenate(vertices), np.concatenate(loop_starts), np.concatenate(loop_vertices))
+
+
+def get_positions(context, export_type, collection_name, object_name, dist_thresh):
+    """ return names and positions of objects exported as sources or receivers (collection or animation) """
+
+    # animation: positions sampled along path, named after their index
+    if export_type == 'ANIMATED':
+
+        obj = context.scene.objects[object_name]
+        [list_translation, list_rotation_euler] = sample_animation_path(context, obj, dist_thresh)
+        names = ['{0:02}'.format(i_pos + 1) for i_pos in range(len(list_translation))]
+
+        return [names, np.array(list_translation, dtype=np.float64).reshape(-1, 3)]
+
+    # collection: sorted list (alphabetical, as displayed in outliner)
+    obj_list = bpy.data.collections[collection_name].objects[:]
+    obj_list.sort(key=lambda obj: obj.name)
+    names = [obj.name for obj in obj_list]
+    positions = np.array([obj.matrix_world.translation[:] for obj in obj_list], dtype=np.float64).reshape(-1, 3)
+
+    return [names, positions]
+
+
+def get_visibility_matrix(bvh, sources, receivers, eps=1e-4):
+    """ return visibility (bool) and direct path length matrices (sources x receivers)
+
+    A receiver is visible from a source if the segment joining them intersects no face
+    (ignoring a small distance eps at both ends, for points lying on surfaces).
+    """
+
+    # path vectors and lengths, vectorised over all pairs
+    paths = receivers[None, :, :] - sources[:, None, :]
+    lengths = np.linalg.norm(paths, axis=2)
+    directions = paths / np.maximum(lengths, 1e-12)[:, :, None]
+    visibility = np.ones(lengths.shape, dtype=bool)
+
+    # loop over pairs far enough apart to hold an obstacle
+    ray_cast = bvh.ray_cast
+    for i_src, i_rec in zip(*np.nonzero(lengths > 2.0 * eps)):
+
+        direction = directions[i_src, i_rec]
+        origin = sources[i_src] + direction * eps
+        location, normal, index, distance = ray_cast(origin, direction, lengths[i_src, i_rec] - 2.0 * eps)
+        if location is not None: visibility[i_src, i_rec] = False
+
+    return [visibility, lengths]
@@ -0,0 +1,93 @@
+"""
+Script for exporting CATT files from many .blend files, each exported by a background
+Blender process running the add-on cli.py (up to --jobs processes at a time). Run with
+a regular python interpreter (no bpy needed), e.g.:
+
+python batch_export.py --blender /path/to/blender --job job.json --jobs 4 --summary summary.json variants/*.blend
+
+with job.json holding scene settings and exports (see cli.py), e.g.:
+{"settings": {"export_path": "//catt", "merge_objects": true}, "exports": ["room", "receivers", "sources"]}
+
+Relative paths ('//') in settings are relative to each .blend file. Per-file exit codes,
+timings (process and per export) and logs are collected in the summary file.
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import subprocess
+import sys
+import time
+
+# add-on cli script, and prefix of its stdout report line
+CLI_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cli.py')
+REPORT_PREFIX = 'CATT_CLI_REPORT '
+
+
+# export one .blend file in a background blender process
+def run_file(blender, blend_path, cli_args, timeout):
+
+    # shape command
+    cmd = [blender, '--background', '--factory-startup', blend_path, '--python-exit-code', '1', '--python', CLI_PATH, '--'] + cli_args
+
+    # run blender
+    time_start = time.perf_counter()
+    try:
+        process = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors='replace', timeout=timeout)
+        exit_code, log = process.returncode, process.stdout
+    except subprocess.TimeoutExpired as exception:
+        exit_code, log = None, exception.stdout.decode(errors='replace') if exception.stdout else ''
+
+    # get cli report
+    report = None
+    for line in log.splitlines():
+        if line.startswith(REPORT_PREFIX): report = json.loads(line[len(REPORT_PREFIX):])
+
+    return {'file': blend_path, 'exit_code': exit_code, 'time': time.perf_counter() - time_start, 'report': report, 'log': log}
+
+
+def main():
+
+    # get arguments
+    parser = argparse.ArgumentParser(description='Export CATT files from .blend files with a pool of background Blender processes')
+    parser.add_argument('files', nargs='+', help='.blend files to export')
+    parser.add_argument('--blender', default='blender', help='blender executable')
+    parser.add_argument('--job', help='json job file passed to cli.py')
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE', help='scene setting passed to cli.py')
+    parser.add_argument('--export', action='append', help='export passed to cli.py (repeatable, in order)')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='number of concurrent blender processes')
+    parser.add_argument('--timeout', type=float, default=None, help='per file timeout (in seconds)')
+    parser.add_argument('--summary', help='write json summary (per file exit code, timings, log) to this file')
+    args = parser.parse_args()
+
+    # shape cli arguments
+    cli_args = []
+    if args.job is not None: cli_args += ['--job', os.path.abspath(args.job)]
+    for item in args.set: cli_args += ['--set', item]
+    if args.export is not None: cli_args += ['--export'] + args.export
+
+    # fan files out over blender processes (threads only wait on processes)
+    time_start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+
+        futures = [pool.submit(run_file, args.blender, os.path.abspath(path), cli_args, args.timeout) for path in args.files]
+        for future in concurrent.futures.as_completed(futures):
+
+            result = future.result()
+            status = 'timeout' if result['exit_code'] is None else 'exit code {0}'.format(result['exit_code'])
+            print('{0}: {1} ({2:.1f}s)'.format(result['file'], status, result['time']))
+
+    # summary (in files order)
+    results = [future.result() for future in futures]
+    num_failed = len([result for result in results if result['exit_code'] != 0])
+    print('exported {0} file(s) in {1:.1f}s, {2} failed'.format(len(results), time.perf_counter() - time_start, num_failed))
+
+    if args.summary is not None:
+        with open(args.summary, 'w') as file: json.dump({'time': time.perf_counter() - time_start, 'results': results}, file, indent=2)
+
+    sys.exit(1 if num_failed > 0 else 0)
+
+
+if __name__ == '__main__':
+    main()
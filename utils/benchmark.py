@@ -0,0 +1,301 @@
+"""
+Benchmark suite for the add-on import and export paths, run in background Blender:
+
+blender -b --factory-startup --python utils/benchmark.py -- --scales small medium --output results.json
+
+Synthetic rooms (grids of quads spread over objects, with CATT materials), an animated
+object and source/receiver collections are generated for each scale, then the timings of
+parse_geo_file, create_objects_from_parsed_geo_file, room export (export_objects), sample_animation_path
+and the source/receiver exporters are measured separately (best of --repeat runs).
+
+Results are written as json. If --baseline (a previous results file) is given, any stage
+slower than baseline time * --tolerance (plus --slack seconds) is reported as a regression
+and the script exits with status 1 (for release tracking).
+"""
+
+import argparse
+import importlib
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import bpy
+import numpy as np
+
+# scale presets: number of planes, objects, materials, animation frames
+SCALES = {
+    'tiny': {'planes': 1000, 'objects': 1, 'materials': 10, 'frames': 1000},
+    'small': {'planes': 10000, 'objects': 50, 'materials': 50, 'frames': 5000},
+    'medium': {'planes': 100000, 'objects': 500, 'materials': 100, 'frames': 10000},
+    'large': {'planes': 1000000, 'objects': 2000, 'materials': 500, 'frames': 50000},
+    'huge': {'planes': 5000000, 'objects': 5000, 'materials': 1000, 'frames': 100000},
+}
+
+# number of objects in source and receiver collections
+NUM_LOCATIONS = 100
+
+
+# import add-on package from parent folder, register it if need be
+def get_addon():
+
+    folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if os.path.dirname(folder) not in sys.path: sys.path.append(os.path.dirname(folder))
+    addon = importlib.import_module(os.path.basename(folder))
+
+    if not hasattr(bpy.types.Scene, 'catt_io'): addon.register()
+
+    return addon
+
+
+# return vertices and quads (loop vertices) of a grid of num_quads quads
+def get_grid_arrays(num_quads, size=0.1):
+
+    # grid dimensions
+    nx = int(math.ceil(math.sqrt(num_quads)))
+    ny = int(math.ceil(num_quads / nx))
+
+    # vertices
+    xs, ys = np.meshgrid(np.arange(nx + 1), np.arange(ny + 1))
+    vertices = np.stack((xs.ravel(), ys.ravel(), np.zeros(xs.size)), axis=1) * size
+
+    # quads
+    quads = np.arange(num_quads)
+    v0 = (quads // nx) * (nx + 1) + quads % nx
+    loop_vertices = np.stack((v0, v0 + 1, v0 + nx + 2, v0 + nx + 1), axis=1).ravel()
+
+    return [vertices, loop_vertices]
+
+
+# create mesh from quads arrays
+def create_mesh(name, vertices, loop_vertices, material_indices):
+
+    mesh = bpy.data.meshes.new(name)
+    num_polygons = len(loop_vertices) // 4
+
+    mesh.vertices.add(len(vertices))
+    mesh.vertices.foreach_set('co', vertices.astype(np.float32).ravel())
+    mesh.loops.add(len(loop_vertices))
+    mesh.loops.foreach_set('vertex_index', loop_vertices.astype(np.int32))
+    mesh.polygons.add(num_polygons)
+    mesh.polygons.foreach_set('loop_start', np.arange(0, len(loop_vertices), 4, dtype=np.int32))
+    mesh.polygons.foreach_set('material_index', material_indices.astype(np.int32))
+    mesh.update(calc_edges=True)
+
+    return mesh
+
+
+# create synthetic room in a new collection (set as room collection)
+def create_room(addon, context, num_planes, num_objects, num_materials):
+
+    # init locals
+    collection = bpy.data.collections.new('catt bench room')
+    context.scene.collection.children.link(collection)
+    template = addon.operators.get_material_template(context)
+    rng = np.random.default_rng(0)
+
+    # catt materials
+    materials = []
+    for i_material in range(num_materials):
+        mat = bpy.data.materials.new('bench_{0:04}'.format(i_material))
+        addon.operators.convert_to_catt_material(mat, template)
+        mat['abs'] = rng.uniform(1, 99, len(mat['abs'])).round(1).tolist()
+        materials.append(mat)
+
+    # objects: grids of quads, side by side
+    num_slots = min(num_materials, max(1, int(math.ceil(num_materials / num_objects))))
+    planes_per_object = int(math.ceil(num_planes / num_objects))
+    for i_object in range(num_objects):
+
+        num_quads = min(planes_per_object, num_planes - i_object * planes_per_object)
+        if num_quads <= 0: break
+
+        vertices, loop_vertices = get_grid_arrays(num_quads)
+        mesh = create_mesh('bench_{0:05}'.format(i_object), vertices, loop_vertices, np.arange(num_quads) % num_slots)
+        for i_slot in range(num_slots): mesh.materials.append(materials[(i_object * num_slots + i_slot) % num_materials])
+
+        obj = bpy.data.objects.new(mesh.name, mesh)
+        obj.location = ((i_object % 100) * 10.0, (i_object // 100) * 10.0, 0.0)
+        collection.objects.link(obj)
+
+    context.scene.catt_io.room_collection = collection.name
+
+    return collection
+
+
+# create object animated along a helix over num_frames frames
+def create_animated_object(context, num_frames):
+
+    # object
+    obj = bpy.data.objects.new('catt bench path', None)
+    context.scene.collection.objects.link(obj)
+
+    # keyframes (one per frame)
+    frames = np.arange(1, num_frames + 1, dtype=np.float64)
+    positions = np.stack((np.cos(frames / 50.0) * 10.0, np.sin(frames / 50.0) * 10.0, frames / num_frames * 5.0), axis=1)
+    obj.animation_data_create()
+    obj.animation_data.action = bpy.data.actions.new('catt bench path')
+    for i_axis in range(3):
+        fcurve = obj.animation_data.action.fcurves.new('location', index=i_axis)
+        fcurve.keyframe_points.add(num_frames)
+        fcurve.keyframe_points.foreach_set('co', np.stack((frames, positions[:, i_axis]), axis=1).ravel())
+        fcurve.update()
+
+    # scene range
+    context.scene.frame_start = 1
+    context.scene.frame_end = num_frames
+
+    return obj
+
+
+# create collection of num_objects empties
+def create_locations(context, name, num_objects):
+
+    collection = bpy.data.collections.new(name)
+    context.scene.collection.children.link(collection)
+    for i_object in range(num_objects):
+        obj = bpy.data.objects.new('{0} {1:03}'.format(name, i_object), None)
+        obj.location = (i_object % 10, i_object // 10, 1.5)
+        collection.objects.link(obj)
+
+    return collection
+
+
+# return pointers of data blocks that benchmarks create
+def get_data_snapshot():
+
+    return set(id.as_pointer() for collection in (bpy.data.objects, bpy.data.meshes, bpy.data.materials, bpy.data.collections, bpy.data.actions) for id in collection)
+
+
+# remove data blocks created since snapshot
+def remove_new_data(snapshot):
+
+    new_ids = [id for collection in (bpy.data.objects, bpy.data.meshes, bpy.data.materials, bpy.data.collections, bpy.data.actions) for id in collection if id.as_pointer() not in snapshot]
+    bpy.data.batch_remove(new_ids)
+
+
+# run function repeat times, return best time and last result
+def time_stage(function, repeat):
+
+    times = []
+    for i_repeat in range(repeat):
+        time_start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - time_start)
+
+    return [min(times), result]
+
+
+# run benchmark of one scale, return dict of stage timings
+def run_case(addon, context, params, export_path, repeat):
+
+    # init locals
+    catt_io = context.scene.catt_io
+    timings = dict()
+    snapshot = get_data_snapshot()
+
+    # scene settings
+    catt_io.export_path = export_path
+    catt_io.receiver_dist_thresh = 0.5
+    catt_io.source_dist_thresh = 0.5
+
+    # generate scene
+    time_start = time.perf_counter()
+    create_room(addon, context, params['planes'], params['objects'], params['materials'])
+    path = create_animated_object(context, params['frames'])
+    catt_io.receiver_collection = create_locations(context, 'catt bench receivers', NUM_LOCATIONS).name
+    catt_io.source_collection = create_locations(context, 'catt bench sources', NUM_LOCATIONS).name
+    catt_io.receiver_object = catt_io.source_object = path.name
+    timings['generate'] = time.perf_counter() - time_start
+
+    # export
+    timings['export_objects'] = time_stage(lambda: bpy.ops.catt.export_room(), repeat)[0]
+    timings['export_receiver_collection'] = time_stage(lambda: bpy.ops.catt.export_receiver_collection(), repeat)[0]
+    timings['export_source_collection'] = time_stage(lambda: bpy.ops.catt.export_source_collection(), repeat)[0]
+    timings['sample_animation_path'] = time_stage(lambda: addon.utils.sample_animation_path(context, path, catt_io.receiver_dist_thresh), repeat)[0]
+
+    # import
+    file_path = os.path.join(export_path, catt_io.room_file_name)
+    timings['parse_geo_file'], parsed = time_stage(lambda: addon.utils.parse_geo_file(file_path, False, len(catt_io.frequency_bands)), repeat)
+    vertices, faces, materials, is_error_detected = parsed
+
+    # object creation (a single run, creates new objects)
+    timings['create_objects_from_parsed_geo_file'] = time_stage(lambda: addon.utils.create_objects_from_parsed_geo_file(vertices, faces, materials, 'catt bench import'), 1)[0]
+
+    # cleanup
+    remove_new_data(snapshot)
+
+    return timings
+
+
+# compare timings to baseline results, return list of regressions
+def get_regressions(results, baseline, tolerance, slack):
+
+    # baseline timings per scale
+    baseline_timings = {case['scale']: case['timings'] for case in baseline['cases']}
+    regressions = []
+
+    for case in results['cases']:
+        for stage, duration in case['timings'].items():
+
+            reference = baseline_timings.get(case['scale'], dict()).get(stage)
+            if reference is None or stage == 'generate': continue
+
+            threshold = reference * tolerance + slack
+            if duration > threshold:
+                regressions.append({'scale': case['scale'], 'stage': stage, 'time': duration, 'baseline': reference, 'threshold': threshold})
+
+    return regressions
+
+
+def main():
+
+    # get arguments
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    parser = argparse.ArgumentParser(prog='blender -b --factory-startup --python benchmark.py --', description='Benchmark CATT add-on import and export on synthetic rooms')
+    parser.add_argument('--scales', nargs='+', default=['tiny', 'small'], choices=list(SCALES.keys()), help='scale presets to run')
+    parser.add_argument('--planes', type=int, help='custom scale: number of planes')
+    parser.add_argument('--objects', type=int, default=10, help='custom scale: number of objects')
+    parser.add_argument('--materials', type=int, default=10, help='custom scale: number of materials')
+    parser.add_argument('--frames', type=int, default=1000, help='custom scale: number of animation frames')
+    parser.add_argument('--repeat', type=int, default=1, help='runs per stage (best time kept)')
+    parser.add_argument('--output', help='write json results to this file')
+    parser.add_argument('--baseline', help='json results of a previous run to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=1.25, help='regression if time > baseline time * tolerance + slack')
+    parser.add_argument('--slack', type=float, default=0.05, help='absolute regression margin (in seconds)')
+    args = parser.parse_args(argv)
+
+    # init locals
+    addon = get_addon()
+    context = bpy.context
+    scales = [(name, SCALES[name]) for name in args.scales]
+    if args.planes is not None: scales = [('custom', {'planes': args.planes, 'objects': args.objects, 'materials': args.materials, 'frames': args.frames})]
+    results = {'blender': bpy.app.version_string, 'python': platform.python_version(), 'platform': platform.platform(), 'cases': []}
+
+    # loop over scales
+    with tempfile.TemporaryDirectory() as export_path:
+        for name, params in scales:
+
+            timings = run_case(addon, context, params, export_path, args.repeat)
+            results['cases'].append({'scale': name, 'params': params, 'timings': timings, 'planes_per_second': {stage: params['planes'] / timings[stage] for stage in ('export_objects', 'parse_geo_file', 'create_objects_from_parsed_geo_file') if timings[stage] > 0}})
+
+            print('{0}: {1}'.format(name, ', '.join('{0} {1:.3f}s'.format(stage, duration) for stage, duration in timings.items())))
+
+    # check for regressions
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as file: baseline = json.load(file)
+        results['regressions'] = get_regressions(results, baseline, args.tolerance, args.slack)
+        for regression in results['regressions']:
+            print('REGRESSION {scale} {stage}: {time:.3f}s > {threshold:.3f}s (baseline {baseline:.3f}s)'.format(**regression))
+
+    # output
+    if args.output is not None:
+        with open(args.output, 'w') as file: json.dump(results, file, indent=2)
+
+    sys.exit(1 if len(results.get('regressions', [])) > 0 else 0)
+
+
+if __name__ == '__main__':
+    main()
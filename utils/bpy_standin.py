@@ -0,0 +1,945 @@
+"""
+Lightweight stand-in for the parts of bpy, bmesh and mathutils used by the add-on, backed
+by numpy arrays, to run (profile, fuzz) import and export code paths in plain python:
+
+import bpy_standin
+bpy = bpy_standin.install()       # registers bpy, bmesh, mathutils, bpy_extras stand-in modules
+addon = bpy_standin.load_addon()  # imports and registers the add-on (parent folder of this script)
+
+collection = bpy_standin.new_collection('room')
+bpy_standin.new_mesh_object('wall', vertices, faces, [material], collection)
+bpy.context.scene.catt_io.room_collection = 'room'
+bpy.context.scene.catt_io.export_path = '/tmp'
+bpy.ops.catt.export_room()
+
+Only the surface the add-on uses is implemented: data blocks (objects, meshes, materials,
+collections, texts), scene with catt_io settings, view layer, depsgraph object instances
+(meshes and collection instances), operators (bpy.ops.catt.*, error reports raised as
+RuntimeError as in blender), mesh foreach_get/foreach_set, face attributes, bmesh
+triangulation and face reversal, Vector/Matrix and a brute force BVHTree. Modifiers,
+edit mode and drawing are not (objects are always in object mode, modifiers ignored).
+"""
+
+import importlib
+import math
+import os
+import sys
+import types
+import numpy as np
+
+
+# mathutils
+
+class Vector(np.ndarray):
+    """ numpy backed mathutils.Vector """
+
+    def __new__(cls, values=(0.0, 0.0, 0.0)):
+        return np.array(values, dtype=np.float64).view(cls)
+
+    x = property(lambda self: float(self[0]), lambda self, value: self.__setitem__(0, value))
+    y = property(lambda self: float(self[1]), lambda self, value: self.__setitem__(1, value))
+    z = property(lambda self: float(self[2]), lambda self, value: self.__setitem__(2, value))
+
+    @property
+    def length(self):
+        return float(np.linalg.norm(np.asarray(self)))
+
+    def normalized(self):
+        length = self.length
+        return Vector(np.asarray(self) / length) if length > 0 else Vector(self)
+
+    def dot(self, other):
+        return float(np.dot(np.asarray(self), np.asarray(other)))
+
+    def cross(self, other):
+        return Vector(np.cross(np.asarray(self), np.asarray(other)))
+
+    def copy(self):
+        return Vector(self)
+
+
+class Matrix(np.ndarray):
+    """ numpy backed 4x4 mathutils.Matrix """
+
+    def __new__(cls, rows=None):
+        return (np.identity(4) if rows is None else np.array(rows, dtype=np.float64)).view(cls)
+
+    @classmethod
+    def Identity(cls, size=4):
+        return cls(np.identity(size))
+
+    @classmethod
+    def Translation(cls, vector):
+        matrix = cls()
+        matrix[:3, 3] = vector
+        return matrix
+
+    @property
+    def translation(self):
+        return Vector(np.asarray(self)[:3, 3])
+
+    def __matmul__(self, other):
+        other = np.asarray(other, dtype=np.float64)
+        if other.shape == (3,): return Vector(np.asarray(self)[:3, :3] @ other + np.asarray(self)[:3, 3])
+        return Matrix(np.asarray(self) @ other)
+
+    def inverted(self):
+        return Matrix(np.linalg.inv(np.asarray(self)))
+
+    def determinant(self):
+        return float(np.linalg.det(np.asarray(self)))
+
+
+class BVHTree:
+    """ brute force (vectorised) stand-in of mathutils.bvhtree.BVHTree """
+
+    def __init__(self, vertices, triangles, triangle_polygons):
+        self.vertices = vertices
+        self.triangles = triangles
+        self.triangle_polygons = triangle_polygons
+
+    @classmethod
+    def FromPolygons(cls, vertices, polygons, all_triangles=False, epsilon=0.0):
+
+        # fan triangulation
+        triangles, triangle_polygons = [], []
+        for i_polygon, polygon in enumerate(polygons):
+            for i in range(1, len(polygon) - 1):
+                triangles.append((polygon[0], polygon[i], polygon[i + 1]))
+                triangle_polygons.append(i_polygon)
+
+        return cls(np.array(vertices, dtype=np.float64).reshape(-1, 3), np.array(triangles, dtype=np.int64).reshape(-1, 3), np.array(triangle_polygons, dtype=np.int64))
+
+    def ray_cast(self, origin, direction, distance=math.inf):
+        """ return location, normal, polygon index and distance of closest hit (Nones if no hit) """
+
+        # Moller-Trumbore against all triangles
+        origin = np.asarray(origin, dtype=np.float64)
+        direction = np.asarray(direction, dtype=np.float64)
+        direction = direction / np.linalg.norm(direction)
+        v0, v1, v2 = (self.vertices[self.triangles[:, i]] for i in range(3))
+        edge1, edge2 = v1 - v0, v2 - v0
+        p = np.cross(direction, edge2)
+        det = (edge1 * p).sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inv_det = 1.0 / det
+            t_vec = origin - v0
+            u = (t_vec * p).sum(axis=1) * inv_det
+            q = np.cross(t_vec, edge1)
+            v = (q * direction).sum(axis=1) * inv_det
+            t = (edge2 * q).sum(axis=1) * inv_det
+        hits = (np.abs(det) > 1e-12) & (u >= 0) & (v >= 0) & (u + v <= 1) & (t > 1e-9) & (t <= distance)
+        if not hits.any(): return [None, None, None, None]
+
+        # closest hit
+        i_triangle = np.flatnonzero(hits)[np.argmin(t[hits])]
+        normal = np.cross(edge1[i_triangle], edge2[i_triangle])
+
+        return [Vector(origin + t[i_triangle] * direction), Vector(normal / np.linalg.norm(normal)), int(self.triangle_polygons[i_triangle]), float(t[i_triangle])]
+
+
+def distance_point_to_plane(point, plane_co, plane_no):
+    return float(np.dot(np.asarray(point) - np.asarray(plane_co), np.asarray(plane_no)))
+
+
+def normal(*points):
+    points = np.array(points[0] if len(points) == 1 else points, dtype=np.float64)
+    value = np.zeros(3)
+    for i in range(len(points)): value += np.cross(points[i], points[(i + 1) % len(points)])
+    return Vector(value / np.linalg.norm(value)) if np.linalg.norm(value) > 0 else Vector(value)
+
+
+# rna collections
+
+class ArrayItems:
+    """ numpy backed rna collection (mesh vertices, loops, polygons, edges, attribute data) """
+
+    def __init__(self, fields):
+
+        # fields: name -> (dtype, number of values per item)
+        self.fields = fields
+        self.arrays = {name: np.zeros((0, size), dtype=dtype) for name, (dtype, size) in fields.items()}
+
+    def __len__(self):
+        return len(next(iter(self.arrays.values())))
+
+    def add(self, count):
+        for name, (dtype, size) in self.fields.items():
+            self.arrays[name] = np.concatenate((self.arrays[name], np.zeros((count, size), dtype=dtype)))
+
+    def foreach_get(self, name, out):
+        out[...] = self.arrays[name].reshape(out.shape) if np.ndim(out) > 1 else self.arrays[name].ravel()
+
+    def foreach_set(self, name, values):
+        self.arrays[name][...] = np.asarray(values).reshape(self.arrays[name].shape)
+
+
+class Attribute:
+
+    def __init__(self, name, data_type, domain, num_items):
+        self.name, self.data_type, self.domain = name, data_type, domain
+        self.data = ArrayItems({'value': ({'BOOLEAN': bool, 'INT': np.int32}.get(data_type, np.float64), 1)})
+        self.data.add(num_items)
+
+
+class Attributes(dict):
+    """ mesh generic attributes (one item per element of their domain, sized on creation) """
+
+    def __init__(self, mesh):
+        super().__init__()
+        self.mesh = mesh
+
+    def new(self, name, data_type, domain):
+        elements = {'POINT': self.mesh.vertices, 'EDGE': self.mesh.edges, 'FACE': self.mesh.polygons, 'CORNER': self.mesh.loops}[domain]
+        self[name] = Attribute(name, data_type, domain, len(elements))
+        return self[name]
+
+    def remove(self, attribute):
+        del self[attribute.name]
+
+
+class ColorAttributes(dict):
+    """ mesh color attributes (CORNER domain, sized on creation) """
+
+    def __init__(self, mesh):
+        super().__init__()
+        self.mesh = mesh
+        self.active_color = None
+
+    def new(self, name, data_type, domain):
+        attribute = types.SimpleNamespace(name=name, data_type=data_type, domain=domain, data=ArrayItems({'color': (np.float32, 4)}))
+        attribute.data.add(len(self.mesh.loops) if domain == 'CORNER' else len(self.mesh.vertices))
+        self[name] = attribute
+        return attribute
+
+
+class IDCollection:
+    """ bpy.data collection of data blocks, indexable by name """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.items = dict()
+
+    def new(self, name, *args):
+        item = self.factory(unique_name(name, self.items), *args)
+        self.items[item.name] = item
+        return item
+
+    def remove(self, item):
+        self.items.pop(item.name, None)
+
+    def __getitem__(self, key):
+        return list(self.items.values())[key] if isinstance(key, int) else self.items[key]
+
+    def __contains__(self, key):
+        return key in self.items if isinstance(key, str) else key in self.items.values()
+
+    def __iter__(self):
+        return iter(list(self.items.values()))
+
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, key, default=None):
+        return self.items.get(key, default)
+
+    def keys(self):
+        return list(self.items.keys())
+
+    def values(self):
+        return list(self.items.values())
+
+
+def unique_name(name, existing):
+    """ blender style .001 suffixes """
+
+    if name not in existing: return name
+    i = 1
+    while '{0}.{1:03}'.format(name, i) in existing: i += 1
+    return '{0}.{1:03}'.format(name, i)
+
+
+# data blocks
+
+class ID:
+    """ data block with custom (id) properties """
+
+    def __init__(self, name):
+        self.name = name
+        self.id_properties = dict()
+
+    def __getitem__(self, key): return self.id_properties[key]
+    def __setitem__(self, key, value): self.id_properties[key] = value
+    def __delitem__(self, key): del self.id_properties[key]
+    def __contains__(self, key): return key in self.id_properties
+    def get(self, key, default=None): return self.id_properties.get(key, default)
+    def keys(self): return self.id_properties.keys()
+    def as_pointer(self): return id(self)
+    def evaluated_get(self, depsgraph): return self
+
+    @property
+    def original(self): return self
+
+    def __repr__(self):
+        return '<{0} "{1}">'.format(type(self).__name__, self.name)
+
+
+class Node:
+
+    def __init__(self, node_type, color=(0.8, 0.8, 0.8, 1.0)):
+        self.type = node_type
+        self.inputs = {'Base Color': types.SimpleNamespace(default_value=color)}
+
+
+class Material(ID):
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.diffuse_color = (0.8, 0.8, 0.8, 1.0)
+        self.use_nodes = False
+        self.node_tree = types.SimpleNamespace(nodes={'Principled BSDF': Node('BSDF_PRINCIPLED')})
+
+    @property
+    def users(self): return 1
+
+
+class Mesh(ID):
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.vertices = ArrayItems({'co': (np.float32, 3)})
+        self.loops = ArrayItems({'vertex_index': (np.int32, 1), 'edge_index': (np.int32, 1)})
+        self.polygons = ArrayItems({'loop_start': (np.int32, 1), 'loop_total': (np.int32, 1), 'material_index': (np.int32, 1)})
+        self.edges = ArrayItems({'vertices': (np.int32, 2)})
+        self.attributes = Attributes(self)
+        self.color_attributes = ColorAttributes(self)
+        self.materials = []
+
+    def from_pydata(self, vertices, edges, faces):
+        vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+        self.set_arrays(vertices, np.array([len(face) for face in faces], dtype=np.int64), np.array([v for face in faces for v in face], dtype=np.int64))
+
+    def set_arrays(self, vertices, loop_totals, loop_vertices, material_indices=None):
+        """ stand-in only: set geometry from numpy arrays """
+
+        self.vertices = ArrayItems(self.vertices.fields)
+        self.vertices.add(len(vertices))
+        self.vertices.foreach_set('co', vertices)
+        self.loops = ArrayItems(self.loops.fields)
+        self.loops.add(len(loop_vertices))
+        self.loops.foreach_set('vertex_index', loop_vertices)
+        self.polygons = ArrayItems(self.polygons.fields)
+        self.polygons.add(len(loop_totals))
+        self.polygons.foreach_set('loop_total', loop_totals)
+        if material_indices is not None: self.polygons.foreach_set('material_index', material_indices)
+        self.update(calc_edges=True)
+
+    def update(self, calc_edges=False):
+
+        # loop starts from totals
+        totals = self.polygons.arrays['loop_total'].ravel().astype(np.int64)
+        if len(totals) > 0 and totals.sum() == 0 and len(self.loops) > 0: return
+        starts = np.concatenate(([0], np.cumsum(totals)[:-1])) if len(totals) > 0 else np.zeros(0, dtype=np.int64)
+        self.polygons.foreach_set('loop_start', starts)
+
+        # resize face attributes
+        for attribute in self.attributes.values():
+            values = attribute.data.arrays['value']
+            if len(values) != len(totals):
+                attribute.data.arrays['value'] = np.resize(values, (len(totals), 1)) if len(values) > 0 else np.zeros((len(totals), 1), dtype=values.dtype)
+
+        # edges from polygon loops
+        loop_vertices = self.loops.arrays['vertex_index'].ravel().astype(np.int64)
+        if len(loop_vertices) == 0: return
+        loop_next = np.arange(len(loop_vertices)) + 1
+        loop_next[starts + totals - 1] = starts
+        pairs = np.sort(np.stack((loop_vertices, loop_vertices[loop_next]), axis=1), axis=1)
+        edges, loop_edges = np.unique(pairs, axis=0, return_inverse=True)
+        self.edges = ArrayItems(self.edges.fields)
+        self.edges.add(len(edges))
+        self.edges.foreach_set('vertices', edges)
+        self.loops.foreach_set('edge_index', loop_edges.ravel())
+
+    def get_arrays(self):
+        """ stand-in only: return vertices, loop totals, loop vertices and material indices """
+
+        return [self.vertices.arrays['co'].astype(np.float64), self.polygons.arrays['loop_total'].ravel().astype(np.int64), self.loops.arrays['vertex_index'].ravel().astype(np.int64), self.polygons.arrays['material_index'].ravel().astype(np.int64)]
+
+
+class MaterialSlot:
+
+    def __init__(self, material, link='DATA'):
+        self.material = material
+        self.link = link
+        self.name = material.name if material is not None else ''
+
+
+class Object(ID):
+
+    def __init__(self, name, data=None):
+        super().__init__(name)
+        self.data = data
+        self.type = 'MESH' if isinstance(data, Mesh) else 'EMPTY'
+        self.matrix_world = Matrix()
+        self.rotation_euler = Vector((0.0, 0.0, 0.0))
+        self.mode = 'OBJECT'
+        self.modifiers = []
+        self.instance_type = 'NONE'
+        self.instance_collection = None
+        self.animation_path = None # stand-in only: (frames, 3) array of locations, frame 1 first
+        self.hidden = False
+        self.selected = False
+        self.object_materials = dict() # stand-in only: slot index -> material linked to object (slot.link == 'OBJECT')
+
+    @property
+    def location(self):
+        return self.matrix_world.translation
+
+    @location.setter
+    def location(self, value):
+        self.matrix_world[:3, 3] = value
+
+    @property
+    def users_collection(self):
+        return [collection for collection in data.collections if self in collection.objects] + [scene.collection for scene in [context.scene] if self in scene.collection.objects]
+
+    @property
+    def material_slots(self):
+        if self.type != 'MESH': return []
+        return [MaterialSlot(self.object_materials[i_slot], 'OBJECT') if i_slot in self.object_materials else MaterialSlot(mat) for i_slot, mat in enumerate(self.data.materials)]
+
+    @property
+    def active_material(self):
+        slots = self.material_slots
+        return slots[0].material if len(slots) > 0 else None
+
+    def visible_get(self): return not self.hidden
+    def select_get(self): return self.selected
+    def select_set(self, state): self.selected = state
+    def to_mesh(self): return self.data
+    def to_mesh_clear(self): pass
+    def update_from_editmode(self): pass
+
+
+class ObjectList(list):
+
+    def link(self, obj):
+        if obj not in self: self.append(obj)
+
+    def unlink(self, obj):
+        self.remove(obj)
+
+    def __getitem__(self, key):
+        if isinstance(key, str): return next(obj for obj in self if obj.name == key)
+        return list.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        return next((obj for obj in self if obj.name == key), default)
+
+
+class Collection(ID):
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.objects = ObjectList()
+        self.children = ObjectList()
+        self.hide_viewport = False
+
+    @property
+    def children_recursive(self):
+        children = []
+        for child in self.children: children.extend([child] + [coll for coll in child.children_recursive if coll not in children])
+        return list(dict.fromkeys(children))
+
+    @property
+    def all_objects(self):
+        objects = list(self.objects)
+        for child in self.children: objects.extend(obj for obj in child.all_objects if obj not in objects)
+        return objects
+
+
+class Text(ID):
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.lines = []
+
+
+# scene
+
+class LayerCollection:
+
+    def __init__(self, collection, exclude=False):
+        self.collection = collection
+        self.exclude = exclude
+        self.hide_viewport = False
+        self.layers = dict()
+
+    @property
+    def name(self):
+        return self.collection.name
+
+    @property
+    def children(self):
+        # mirrors collection children (exclude flags kept per collection)
+        return [self.layers.setdefault(child.name, LayerCollection(child)) for child in self.collection.children]
+
+
+class ViewLayer:
+
+    def __init__(self, scene):
+        self.scene = scene
+        self.layer_collection = LayerCollection(scene.collection)
+
+    @property
+    def objects(self):
+        return self.scene.objects
+
+
+class Scene(ID):
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.collection = Collection('Scene Collection')
+        self.frame_start = 1
+        self.frame_end = 250
+        self.frame_current = 1
+        self.view_layers = [ViewLayer(self)]
+
+    @property
+    def objects(self):
+        return self.collection.all_objects
+
+    def frame_set(self, frame):
+        self.frame_current = frame
+        for obj in self.objects:
+            if obj.animation_path is not None: obj.location = obj.animation_path[min(max(frame - 1, 0), len(obj.animation_path) - 1)]
+
+
+class ObjectInstance:
+
+    def __init__(self, obj, matrix_world, parent=None):
+        self.object = obj
+        self.matrix_world = matrix_world
+        self.parent = parent
+        self.is_instance = parent is not None
+
+
+class DepsgraphUpdate:
+
+    def __init__(self, data_block, is_updated_geometry=False, is_updated_transform=False):
+        self.id = data_block
+        self.is_updated_geometry = is_updated_geometry
+        self.is_updated_transform = is_updated_transform
+        self.is_updated_shading = False
+
+
+class Depsgraph:
+
+    def __init__(self, scene, updates=()):
+        self.scene = scene
+        self.updates = list(updates) # stand-in only: DepsgraphUpdate items, passed to handlers by notify_update
+
+    @property
+    def object_instances(self):
+        """ objects of the scene visible in viewport (not hidden, nor in excluded, disabled or hidden
+        collections), plus objects of their (nested) collection instances """
+
+        instances = []
+        for obj in self.get_visible_objects():
+            instances.append(ObjectInstance(obj, obj.matrix_world))
+            instances.extend(self.get_collection_instances(obj, obj.matrix_world, obj))
+
+        return instances
+
+    def get_visible_objects(self):
+
+        objects = dict()
+        layers = [self.scene.view_layers[0].layer_collection]
+        while len(layers) > 0:
+            layer = layers.pop()
+            objects.update(dict.fromkeys(obj for obj in layer.collection.objects if not obj.hidden))
+            layers.extend(child for child in layer.children if not (child.exclude or child.hide_viewport or child.collection.hide_viewport))
+
+        return list(objects)
+
+    def get_collection_instances(self, obj, matrix, parent):
+
+        if obj.instance_type != 'COLLECTION' or obj.instance_collection is None: return []
+
+        instances = []
+        for child in obj.instance_collection.all_objects:
+            child_matrix = Matrix(np.asarray(matrix) @ np.asarray(child.matrix_world))
+            instances.append(ObjectInstance(child, child_matrix, parent))
+            instances.extend(self.get_collection_instances(child, child_matrix, parent))
+
+        return instances
+
+
+class Context:
+
+    def __init__(self):
+        self.scene = Scene('Scene')
+
+    @property
+    def view_layer(self):
+        return self.scene.view_layers[0]
+
+    @property
+    def active_object(self):
+        return getattr(self, 'active', None)
+
+    @property
+    def object(self):
+        return self.active_object
+
+    @property
+    def collection(self):
+        return getattr(self, 'active_collection', self.scene.collection)
+
+    @property
+    def selected_objects(self):
+        return [obj for obj in self.scene.objects if obj.selected]
+
+    @property
+    def mode(self):
+        return 'OBJECT'
+
+    @property
+    def window_manager(self):
+        return types.SimpleNamespace(windows=[])
+
+    @property
+    def edit_object(self):
+        return None
+
+    @property
+    def preferences(self):
+        return types.SimpleNamespace(view=types.SimpleNamespace(show_developer_ui=False))
+
+    def evaluated_depsgraph_get(self):
+        return Depsgraph(self.scene)
+
+
+# bmesh
+
+class BMFace:
+
+    def __init__(self, vertices, material_index):
+        self.verts = vertices
+        self.material_index = material_index
+        self.index = 0
+
+
+class BMFaces(list):
+
+    def ensure_lookup_table(self): pass
+
+
+class BMesh:
+
+    def __init__(self):
+        self.vertices = np.zeros((0, 3))
+        self.faces = BMFaces()
+        self.face_flags = dict()
+
+    def from_mesh(self, mesh):
+        self.vertices, totals, loop_vertices, material_indices = mesh.get_arrays()
+        starts = np.concatenate(([0], np.cumsum(totals)[:-1])) if len(totals) > 0 else []
+        self.faces = BMFaces(BMFace(loop_vertices[start:start + total].tolist(), int(material_index)) for start, total, material_index in zip(starts, totals, material_indices))
+        self.face_flags = {name: attribute.data.arrays['value'].ravel().copy() for name, attribute in mesh.attributes.items()}
+        for i_face, face in enumerate(self.faces): face.index = i_face
+
+    def to_mesh(self, mesh):
+        totals = np.array([len(face.verts) for face in self.faces], dtype=np.int64)
+        loop_vertices = np.array([v for face in self.faces for v in face.verts], dtype=np.int64)
+        mesh.set_arrays(self.vertices, totals, loop_vertices, np.array([face.material_index for face in self.faces], dtype=np.int64))
+
+        # face attributes follow faces (by source index)
+        sources = np.array([face.index for face in self.faces], dtype=np.int64)
+        for name, flags in self.face_flags.items():
+            attribute = mesh.attributes.new(name, 'BOOLEAN', 'FACE')
+            attribute.data.add(len(sources))
+            attribute.data.foreach_set('value', flags[sources] if len(flags) > 0 else np.zeros(len(sources), dtype=bool))
+
+    def free(self): pass
+    def copy(self):
+        bm = BMesh()
+        bm.vertices = self.vertices.copy()
+        bm.faces = BMFaces(BMFace(list(face.verts), face.material_index) for face in self.faces)
+        for face, source in zip(bm.faces, self.faces): face.index = source.index
+        bm.face_flags = dict(self.face_flags)
+        return bm
+
+    def transform(self, matrix):
+        matrix = np.asarray(matrix)
+        self.vertices = self.vertices @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+def bmesh_triangulate(bm, faces):
+    faces = set(id(face) for face in faces)
+    triangulated = BMFaces()
+    for face in bm.faces:
+        if id(face) not in faces or len(face.verts) <= 3:
+            triangulated.append(face)
+            continue
+        for i in range(1, len(face.verts) - 1):
+            triangle = BMFace([face.verts[0], face.verts[i], face.verts[i + 1]], face.material_index)
+            triangle.index = face.index
+            triangulated.append(triangle)
+    bm.faces = triangulated
+    return {'faces': list(triangulated)}
+
+
+def bmesh_reverse_faces(bm, faces):
+    for face in faces: face.verts = [face.verts[0]] + face.verts[:0:-1]
+
+
+# operators, properties
+
+class Property:
+    """ bpy.props property definition (default value, pointer type) """
+
+    def __init__(self, kind, **settings):
+        self.kind = kind
+        self.settings = settings
+
+    def get_default(self):
+        if self.kind == 'POINTER': return self.settings['type']()
+        if 'default' in self.settings: return self.settings['default']
+        if self.kind == 'ENUM':
+            items = self.settings.get('items', [])
+            return items[0][0] if isinstance(items, (list, tuple)) and len(items) > 0 else ''
+        return {'STRING': '', 'BOOL': False, 'INT': 0, 'FLOAT': 0.0}.get(self.kind, ([0.0] * self.settings.get('size', 3)))
+
+    def __get__(self, obj, objtype=None):
+        # pointer properties assigned to types (e.g. Scene.catt_io): instance created on first access
+        if obj is None: return self
+        return obj.__dict__.setdefault('_property_{0}'.format(id(self)), self.get_default())
+
+
+def make_property(kind):
+    return lambda **settings: Property(kind, **settings)
+
+
+class StructRNA:
+
+    def __init__(self, cls):
+        self.properties = {name: value for klass in reversed(cls.__mro__) for name, value in getattr(klass, '__annotations__', dict()).items() if isinstance(value, Property)}
+        self.properties['rna_type'] = None
+
+
+class PropertyGroup:
+    """ property group: annotations become attributes set to their default value """
+
+    def __init__(self):
+        for name, prop in type(self).bl_rna.properties.items():
+            if prop is not None: setattr(self, name, prop.get_default())
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.bl_rna = StructRNA(cls)
+
+
+PropertyGroup.bl_rna = StructRNA(PropertyGroup)
+
+
+class Operator(PropertyGroup):
+    """ operator: reports are stored, errors raised by bpy.ops calls """
+
+    bl_idname = ''
+    bl_label = ''
+
+    def __init__(self):
+        super().__init__()
+        self.reports = []
+
+    def report(self, report_type, message):
+        self.reports.append((set(report_type), message))
+        print('{0}: {1}'.format('/'.join(sorted(report_type)), message))
+
+
+class Panel:
+    pass
+
+
+class OperatorNamespace:
+    """ bpy.ops.<category>.<name>(**properties) """
+
+    def __init__(self, category):
+        self.category = category
+
+    def __getattr__(self, name):
+
+        def call(**properties):
+            cls = registered_operators['{0}.{1}'.format(self.category, name)]
+            op = cls()
+            for key, value in properties.items(): setattr(op, key, value)
+            result = op.execute(context)
+            errors = [message for report_type, message in op.reports if 'ERROR' in report_type]
+            if len(errors) > 0: raise RuntimeError('Error: {0}'.format('\n'.join(errors)))
+            return result
+
+        return call
+
+
+class Ops:
+
+    def __getattr__(self, category):
+        return OperatorNamespace(category)
+
+
+# registered operator classes, by bl_idname
+registered_operators = dict()
+
+
+def register_class(cls):
+    if issubclass(cls, Operator): registered_operators[cls.bl_idname] = cls
+
+
+def unregister_class(cls):
+    if issubclass(cls, Operator): registered_operators.pop(cls.bl_idname, None)
+
+
+# registered timer functions, and their next call time (in s, see run_timers)
+registered_timers = dict()
+
+
+def register_timer(function, first_interval=0.0, persistent=False):
+    registered_timers[function] = first_interval
+
+
+def run_timers(duration):
+    """ stand-in only: advance time by duration (s), calling due timers (no actual waiting) """
+
+    elapsed = 0.0
+    while len(registered_timers) > 0:
+        function, call_time = min(registered_timers.items(), key=lambda item: item[1])
+        if call_time > duration: break
+        elapsed = call_time
+        interval = function()
+        if interval is None: registered_timers.pop(function)
+        else: registered_timers[function] = elapsed + interval
+
+    for function in registered_timers: registered_timers[function] -= duration
+
+
+def notify_update(*updates):
+    """ stand-in only: call depsgraph_update_post handlers with DepsgraphUpdate items """
+
+    depsgraph = Depsgraph(context.scene, updates)
+    for handler in list(sys.modules['bpy'].app.handlers.depsgraph_update_post): handler(context.scene, depsgraph)
+
+
+def abspath(path):
+    if path.startswith('//'): return os.path.join(os.path.dirname(data.filepath) or os.getcwd(), path[2:])
+    return path
+
+
+# module instances
+
+data = types.SimpleNamespace()
+context = Context()
+
+
+def reset():
+    """ reset data and scene """
+
+    global context
+    data.filepath = ''
+    data.objects = IDCollection(Object)
+    data.meshes = IDCollection(Mesh)
+    data.materials = IDCollection(Material)
+    data.collections = IDCollection(Collection)
+    data.texts = IDCollection(Text)
+    data.actions = IDCollection(ID)
+    data.scenes = IDCollection(Scene)
+    context = Context()
+    data.scenes.items[context.scene.name] = context.scene
+
+    # update modules
+    if 'bpy' in sys.modules and getattr(sys.modules['bpy'], 'is_standin', False): sys.modules['bpy'].context = context
+
+
+def new_module(name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    sys.modules[name] = module
+    return module
+
+
+def install():
+    """ register stand-in modules (bpy, bmesh, mathutils, bpy_extras) in sys.modules, return bpy """
+
+    reset()
+
+    # mathutils
+    bvhtree = new_module('mathutils.bvhtree', BVHTree=BVHTree)
+    geometry = new_module('mathutils.geometry', distance_point_to_plane=distance_point_to_plane, normal=normal)
+    new_module('mathutils', Vector=Vector, Matrix=Matrix, bvhtree=bvhtree, geometry=geometry)
+
+    # bmesh
+    ops = new_module('bmesh.ops', triangulate=bmesh_triangulate, reverse_faces=bmesh_reverse_faces)
+    new_module('bmesh', new=BMesh, ops=ops, from_edit_mesh=lambda mesh: BMesh(), update_edit_mesh=lambda *args, **kwargs: None)
+
+    # bpy
+    props = new_module('bpy.props', **{name: make_property(kind) for name, kind in [('StringProperty', 'STRING'), ('BoolProperty', 'BOOL'), ('IntProperty', 'INT'), ('FloatProperty', 'FLOAT'), ('FloatVectorProperty', 'FLOAT_VECTOR'), ('EnumProperty', 'ENUM'), ('PointerProperty', 'POINTER'), ('CollectionProperty', 'COLLECTION')]})
+    bpy_types = new_module('bpy.types', Operator=Operator, Panel=Panel, PropertyGroup=PropertyGroup, AddonPreferences=PropertyGroup, Scene=Scene, Object=Object, Mesh=Mesh, Material=Material, Collection=Collection)
+    handlers = new_module('bpy.app.handlers', persistent=lambda function: function, load_post=[], undo_post=[], redo_post=[], depsgraph_update_post=[], save_pre=[])
+    timers = new_module('bpy.app.timers', register=register_timer, unregister=lambda function: registered_timers.pop(function, None), is_registered=lambda function: function in registered_timers)
+    app = new_module('bpy.app', handlers=handlers, timers=timers, version=(4, 0, 0), version_string='4.0.0 (stand-in)', background=True)
+    path = new_module('bpy.path', abspath=abspath, basename=os.path.basename)
+    bpy_utils = new_module('bpy.utils', register_class=register_class, unregister_class=unregister_class)
+    bpy = new_module('bpy', data=data, context=context, ops=Ops(), props=props, types=bpy_types, app=app, path=path, utils=bpy_utils, is_standin=True)
+    new_module('bpy_extras')
+    new_module('bpy_extras.io_utils', ImportHelper=type('ImportHelper', (), {}), ExportHelper=type('ExportHelper', (), {}))
+
+    return bpy
+
+
+def load_addon():
+    """ import and register the add-on (parent folder of this script) """
+
+    folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if os.path.dirname(folder) not in sys.path: sys.path.append(os.path.dirname(folder))
+    addon = importlib.import_module(os.path.basename(folder))
+    addon.register()
+
+    return addon
+
+
+# scene building helpers
+
+def new_collection(name, parent=None):
+    """ create collection, child of parent (scene collection if None) """
+
+    collection = data.collections.new(name)
+    (context.scene.collection if parent is None else parent).children.link(collection)
+
+    return collection
+
+
+def new_mesh_object(name, vertices, faces, materials=(), collection=None, material_indices=None, matrix_world=None):
+    """ create mesh object from vertices (n x 3) and faces (list of vertex id lists, or (loop totals, loop vertices) arrays) """
+
+    mesh = data.meshes.new(name)
+    if isinstance(faces, tuple): mesh.set_arrays(np.asarray(vertices, dtype=np.float64), faces[0], faces[1], material_indices)
+    else: mesh.set_arrays(np.asarray(vertices, dtype=np.float64), np.array([len(face) for face in faces]), np.array([v for face in faces for v in face]), material_indices)
+    mesh.materials.extend(materials)
+
+    obj = data.objects.new(name, mesh)
+    if matrix_world is not None: obj.matrix_world = Matrix(matrix_world)
+    (context.scene.collection if collection is None else collection).objects.link(obj)
+
+    return obj
+
+
+def new_catt_material(name, absorption=None):
+    """ create catt material (add-on must be loaded) """
+
+    addon = sys.modules[os.path.basename(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))]
+    mat = data.materials.new(name)
+    addon.operators.convert_to_catt_material(mat, addon.operators.get_material_template(context))
+    if absorption is not None: mat['abs'] = list(absorption)
+
+    return mat